@@ -1,10 +1,10 @@
 import os
 import datetime
+import sqlite3
 from functools import wraps
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Blueprint, jsonify, request, current_app
 from flask_cors import CORS
 import mysql.connector
-from dotenv import load_dotenv
 import jwt
 from passlib.hash import bcrypt
 import sys
@@ -12,21 +12,24 @@ import sys
 # Add backend directory to Python path for module imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-# Load environment variables from .env file
-load_dotenv()
+# Load environment variables from .env file (once per process, see utils/env.py)
+from utils import env  # noqa: F401
 
 # Configure Flask app to serve frontend static files
 backend_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(backend_dir)
 frontend_dir = os.path.join(project_root, "Docket-system-frontend", "frontend")
 
-app = Flask(
-    __name__,
-    static_folder=frontend_dir,
-    static_url_path=""
-)
-# Enable CORS for cross-origin requests
-CORS(app, supports_credentials=True, resources={r"/*": {"origins": "*"}})
+# Per-route latency histograms, status counts and in-flight gauges, exposed at /metrics
+from utils import metrics
+
+# Admin-only per-request profiling, switched on with the X-Profile header
+from utils import profiling
+
+from utils import compression, json_provider
+
+# Batched, asynchronous writes to audit_logs
+from utils.audit import audit
 
 # JWT (JSON Web Token) configuration
 JWT_SECRET = os.getenv("JWT_SECRET", "change-me-please-and-use-long-random")
@@ -35,53 +38,9 @@ JWT_EXP_SECONDS = int(os.getenv("JWT_EXP_SECONDS", 60 * 60 * 8))  # 8 hours
 
 
 # -------------------- Database Connection --------------------
-# Establishes a database connection, supporting both local XAMPP (MariaDB) and TiDB with SSL.
-def get_db_connection():
-    db_platform = os.getenv("DB_PLATFORM")
-
-    try:
-        if db_platform == 'XAMPP':
-            # Configuration for local XAMPP (MariaDB) without SSL
-            return mysql.connector.connect(
-                host=os.getenv("DB_HOST", "localhost"),
-                user=os.getenv("DB_USER", "root"),
-                password=os.getenv("DB_PASSWORD", ""),
-                database=os.getenv("DB_NAME", "docket_system2"),
-                autocommit=False,
-                ssl_disabled=True
-            )
-        else:
-            # Configuration for TiDB with SSL
-            ca_path = os.getenv("CA_PATH")
-            if ca_path and not os.path.exists(ca_path):
-                # If CA_PATH is provided but file doesn't exist, it might be the cert content
-                ca_path = "/tmp/tidb_ca.pem"
-                with open(ca_path, "w") as f:
-                    f.write(os.getenv("CA_PATH"))
-            return mysql.connector.connect(
-                host=os.getenv("HOST"),
-                port=int(os.getenv("PORT", 4000)),
-                user=os.getenv("USERNAME"),
-                password=os.getenv("PASSWORD"),
-                database=os.getenv("DATABASE"),
-                autocommit=False,
-                ssl_ca=ca_path,
-                ssl_verify_cert=True if ca_path else False
-            )
-        # else: # Default to render
-        #     # Default configuration for Render with SSL
-        #     return mysql.connector.connect(
-        #         host=os.getenv("DB_HOST"),
-        #         user=os.getenv("DB_USER"),
-        #         password=os.getenv("DB_PASSWORD"),
-        #         database=os.getenv("DB_NAME"),
-        #         autocommit=False,
-        #         ssl_verify_cert=True,
-        #         ssl_ca=os.getenv("DB_SSL_CA_PATH", "/etc/ssl/certs/ca-certificates.crt") # Common path for CA certs
-        #     )
-    except mysql.connector.Error as err:
-        app.logger.error(f"Database connection error ({db_platform}): {err}")
-        raise
+# Connections come from utils/db.py, which supports both local XAMPP (MariaDB) and TiDB with SSL
+# and instruments every statement for /metrics.
+from utils.db import get_db_connection
 
 
 # -------------------- JWT Auth Decorator --------------------
@@ -118,20 +77,26 @@ def jwt_required(role=None):
 
 
 # -------------------- Routes --------------------
+# Login, logout and the basic API routes, registered on the app by create_app().
+core_bp = Blueprint("core", __name__)
+
+
 # Basic API route to confirm backend is running.
-@app.route("/api")
+@core_bp.route("/api")
 def home():
     return jsonify({"message": "Docket System Backend Running ✅"})
 
 
 # Handles user login, authenticates credentials, generates JWT, and sets cookies.
-@app.route("/login", methods=["POST"])
+@core_bp.route("/login", methods=["POST"])
 def login():
     try:
         data = request.json or {}
         username = data.get("student_number")
         password = data.get("password")
         role = data.get("role", "student")
+        # audit_logs.user_type only takes these two values, and role comes straight from the request.
+        user_type = "admin" if role == "admin" else "student"
         use_cookie = data.get("use_cookie", False)
 
         if not username or not password:
@@ -157,12 +122,16 @@ def login():
         conn.close()
 
         if not user or not user.get("password_hash"):
+            audit(user_type, 0, "login_failed", f"Unknown {user_type} '{username}'")
             return jsonify({"ok": False, "error": "Invalid credentials"}), 401
 
         # I truncated the password to 72 bytes to avoid bcrypt error I was getting
         password = password[:72]
 
-        if not bcrypt.verify(password, user["password_hash"]):
+        with metrics.BCRYPT_SECONDS.time():
+            password_ok = bcrypt.verify(password, user["password_hash"])
+        if not password_ok:
+            audit(user_type, user["id"], "login_failed", "Wrong password")
             return jsonify({"ok": False, "error": "Invalid credentials"}), 401
 
         now = datetime.datetime.utcnow()
@@ -174,6 +143,7 @@ def login():
         }
 
         token = jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGO)
+        audit(user_type, user["id"], "login")
 
         resp = jsonify({
             "ok": True,
@@ -197,12 +167,12 @@ def login():
         return resp
 
     except mysql.connector.Error as err:
-        app.logger.error(f"Database error during login: {err}")
+        current_app.logger.error(f"Database error during login: {err}")
         return jsonify({"ok": False, "error": "Database connection error. Please try again later."}), 500
 
 
 # Handles user logout by clearing the access token cookie.
-@app.route("/logout", methods=["POST"])
+@core_bp.route("/logout", methods=["POST"])
 @jwt_required()
 def logout():
     resp = jsonify({"ok": True})
@@ -211,50 +181,85 @@ def logout():
 
 
 # Returns information about the currently authenticated user.
-@app.route("/me", methods=["GET"])
+@core_bp.route("/me", methods=["GET"])
 @jwt_required()
 def me():
     payload = request.user
     return jsonify({"ok": True, "user": payload})
 
 
-# -------------------- Serve Frontend --------------------
-# Serves the main admin portal HTML file.
-@app.route("/")
-def serve_index():
-    """Serve admin portal HTML"""
-    return send_from_directory(app.static_folder, "admin-login.html")
-
-
-# Serves all other static frontend files (CSS, JS, images, etc.).
-@app.route("/<path:path>")
-def serve_static_files(path):
-    """Serve static frontend files (HTML, CSS, JS, etc.)"""
-    file_path = os.path.join(app.static_folder, path)
-    if os.path.exists(file_path):
-        return send_from_directory(app.static_folder, path)
-    else:
-        return jsonify({"error": "File not found"}), 404
+# Change events after ?after= (see utils/events.py), returned right away. Under asgi.py this route
+# is served by the async app instead, which streams (/events) or waits for events (long-poll).
+@core_bp.route("/events/poll", methods=["GET"])
+@jwt_required(role="admin")
+def event_poll():
+    from utils.events import parse_event_id, parse_topics, resume
+    topics = parse_topics(request.args.get("topics"))
+    try:
+        events, position = resume(parse_event_id(request.args.get("after")))
+    except sqlite3.Error as e:
+        current_app.logger.warning(f"Event log unavailable: {e}")
+        return jsonify({"ok": False, "error": "Events are unavailable."}), 503
+    events = [e for e in events if topics is None or e["topic"] in topics or e["topic"] == "reset"]
+    return jsonify({"ok": True, "events": events, "last_event_id": position})
 
 
-# -------------------- Health Check --------------------
-# Endpoint for application health checks.
-@app.route("/health")
+# Endpoint for application health checks (liveness only: it never touches the database).
+@core_bp.route("/health")
 def health_check():
     return "OK", 200
 
 
-# -------------------- Register Blueprints --------------------
-# Import and register blueprints for modularizing routes.
-from routes.dockets import dockets_bp
-from routes.verification import verification_bp
-from routes.admin_controls import admin_controls_bp
-app.register_blueprint(dockets_bp, url_prefix="/dockets")
-app.register_blueprint(verification_bp, url_prefix="/verification")
-app.register_blueprint(admin_controls_bp, url_prefix="/admin")
+# -------------------- App Factory --------------------
+# Builds the Flask app. Importing this module only loads the light parts of the backend (the PDF
+# stack is imported on first use, see utils/docket_pdf.py) and opens no connections, so gunicorn
+# can build the app once in the master with --preload and fork workers from it. Per-worker
+# resources (DB pool, audit flusher, local store connections) are created after the fork: lazily
+# on first use, or up front by the post_worker_init hook in gunicorn.conf.py.
+def create_app():
+    # Static files are served by utils/static_assets.py (fingerprinted, precompressed, cached),
+    # so Flask's own static route is disabled.
+    app = Flask(__name__, static_folder=None)
+    # Enable CORS for cross-origin requests
+    CORS(app, supports_credentials=True, resources={r"/*": {"origins": "*"}})
+    # orjson-backed jsonify with Flask's Decimal/datetime conventions (see utils/json_provider.py)
+    json_provider.init_app(app)
+
+    metrics.init_app(app)
+    profiling.init_app(app)
+    # gzip/brotli for JSON and text responses above COMPRESS_MIN_BYTES
+    compression.init_app(app)
+
+    # "/" serves the admin portal and "/<path>" every other frontend file, with hashed asset URLs,
+    # gzip/brotli variants and long-lived caching (see utils/static_assets.py).
+    from utils import static_assets
+    static_assets.init_app(app, frontend_dir)
+
+    # /health/live and /health/ready (cached DB pool, settings and PDF template checks)
+    from utils import health
+    health.init_app(app)
+
+    # Import and register blueprints for modularizing routes.
+    from routes.dockets import dockets_bp
+    from routes.verification import verification_bp
+    from routes.admin_controls import admin_controls_bp
+    from routes.students import students_bp
+    app.register_blueprint(core_bp)
+    app.register_blueprint(dockets_bp, url_prefix="/dockets")
+    app.register_blueprint(verification_bp, url_prefix="/verification")
+    app.register_blueprint(admin_controls_bp, url_prefix="/admin")
+    app.register_blueprint(students_bp, url_prefix="/students")
+    return app
+
+
+# Module-level app for "gunicorn app:app" and the development server.
+app = create_app()
 
 
 # -------------------- Run Server --------------------
 # Entry point to run the Flask development server.
 if __name__ == '__main__':
+    # Start from empty metrics; under gunicorn this is done by gunicorn.conf.py
+    for name in os.listdir(metrics.MULTIPROC_DIR):
+        os.remove(os.path.join(metrics.MULTIPROC_DIR, name))
     app.run(debug=True, host='127.0.0.1')
\ No newline at end of file
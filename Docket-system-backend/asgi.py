@@ -0,0 +1,328 @@
+# asgi.py
+# Async serving mode (ASGI) for the I/O-bound scanner endpoints.
+# /verification/verify, /verification/sync, /dockets/sync/students and /dockets/sync/tokens spend
+# nearly all their time waiting on round trips to TiDB. Here they are served by async views on an
+# aiomysql pool (utils/aio_db.py), so one worker process keeps hundreds of scanners in flight
+# instead of one per sync gunicorn worker. Every other route is the regular Flask app, mounted
+# through asgiref's WSGI adapter, so both share auth (utils/auth.py), the settings and blocklist
+# files, the SQL (repositories/), the audit log and /metrics.
+# With DB_PLATFORM=SQLITE the async views are not registered and the Flask app serves everything,
+# except the push channel (/events, /events/poll), which doesn't touch the database.
+#
+# Run with gunicorn (keeps the hooks in gunicorn.conf.py):
+#   gunicorn -k uvicorn.workers.UvicornWorker --workers 2 -c Docket-system-backend/gunicorn.conf.py \
+#       --bind 0.0.0.0:$PORT Docket-system-backend.asgi:app
+# or for local runs: uvicorn asgi:app --app-dir Docket-system-backend --port 5000
+
+import os
+import sqlite3
+import sys
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from functools import wraps
+
+# Add backend directory to Python path for module imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils import env  # noqa: E402,F401
+from starlette.applications import Starlette  # noqa: E402
+from starlette.concurrency import run_in_threadpool  # noqa: E402
+from starlette.middleware import Middleware  # noqa: E402
+from starlette.middleware.cors import CORSMiddleware  # noqa: E402
+from starlette.responses import JSONResponse, Response, StreamingResponse  # noqa: E402
+from starlette.routing import Mount, Route  # noqa: E402
+from asgiref.wsgi import WsgiToAsgi  # noqa: E402
+import pymysql  # noqa: E402
+
+from app import app as flask_app  # noqa: E402
+from utils.auth import check_token, extract_token  # noqa: E402
+from utils.db import db_dialect  # noqa: E402
+from utils.aio_db import aio_pool  # noqa: E402
+from utils.audit import audit_log  # noqa: E402
+from utils.metrics import HTTP_REQUEST_SECONDS, HTTP_REQUESTS_TOTAL, HTTP_IN_FLIGHT  # noqa: E402
+from utils import eligibility_cache, sync_cache  # noqa: E402
+from utils.events import (  # noqa: E402
+    event_hub, publish_batch, parse_event_id, parse_topics, sse_message, EVENTS_HEARTBEAT_SECONDS,
+)
+from utils.verification_stats import device_key, parse_device_id, record_scans  # noqa: E402
+from repositories import aio  # noqa: E402
+from routes.dockets import read_json_file, BLOCKLIST_FILE, SETTINGS_FILE  # noqa: E402
+from routes.verification import (  # noqa: E402
+    parse_qr_data, parse_scan_time, record_synced_scans, BLOCKED_ERROR, EXPIRED_DOCKET_ERROR, INVALID_DOCKET_ERROR,
+)
+
+logger = flask_app.logger
+
+
+# Helper function returning the caller's IP, honouring the proxy header Render sets (as utils/audit.py does).
+def client_ip(request):
+    forwarded = request.headers.get("x-forwarded-for", "")
+    ip = forwarded.split(",")[0].strip() if forwarded else (request.client.host if request.client else None)
+    return ip[:50] if ip else None
+
+
+def audit(request, action_type, description=None):
+    user = request.state.user
+    audit_log.record(user.get("role"), user.get("sub"), action_type, description, ip_address=client_ip(request))
+
+
+def error(message, status):
+    return JSONResponse({"ok": False, "error": message}, status_code=status)
+
+
+# The sync lists come from utils/sync_cache.py, already serialized and compressed once for
+# every scanner asking at the same time.
+def sync_response(request, payload):
+    status, body, headers = payload.respond(request.headers.get("accept-encoding"), request.headers.get("if-none-match"))
+    return Response(body, status_code=status, media_type="application/json", headers=headers)
+
+
+# Decorator for async views: admin JWT check (the same rules as @jwt_required) and the same
+# per-route metrics the Flask app records.
+def admin_route(route):
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request):
+            started = time.perf_counter()
+            HTTP_IN_FLIGHT.labels(route).inc()
+            status = 500
+            try:
+                token = extract_token(request.headers.get("authorization", ""), request.cookies)
+                payload, failure = check_token(token, role="admin")
+                if failure:
+                    response = error(*failure)
+                else:
+                    request.state.user = payload
+                    response = await view(request)
+                status = response.status_code
+                return response
+            finally:
+                HTTP_IN_FLIGHT.labels(route).dec()
+                HTTP_REQUEST_SECONDS.labels(request.method, route).observe(time.perf_counter() - started)
+                HTTP_REQUESTS_TOTAL.labels(request.method, route, str(status)).inc()
+        return wrapper
+    return decorator
+
+
+async def read_json_body(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+# Async version of routes/verification.py verify_docket.
+@admin_route("/verification/verify")
+async def verify_docket(request):
+    data = await read_json_body(request)
+    if data is None:
+        return error("Invalid JSON body.", 400)
+    qr_data = data.get("qr_data")
+    admin_id = request.state.user["sub"]
+    device_id = parse_device_id(data.get("device_id"))
+    device = device_key(device_id, admin_id)
+
+    if not qr_data:
+        return error("Missing QR code data.", 400)
+
+    try:
+        student_number, exam_type, token_hash = parse_qr_data(qr_data)
+
+        # Check if the student is on the blocklist.
+        if student_number in read_json_file(BLOCKLIST_FILE):
+            raise ValueError(BLOCKED_ERROR)
+        if exam_type != read_json_file(SETTINGS_FILE).get("active_exam"):
+            raise ValueError(EXPIRED_DOCKET_ERROR)
+
+        async with aio_pool.transaction() as cur:
+            token_row = await aio.find_active_token(cur, token_hash, student_number, exam_type)
+            if token_row:
+                await aio.mark_token_used(cur, token_row["token_id"])
+                await aio.record_verification(cur, token_row["docket_id"], admin_id, 'valid', 'Docket successfully verified', device_id)
+                student_details = await aio.get_verification_details(cur, token_row["student_id"])
+
+        if not token_row:
+            await run_in_threadpool(record_scans, device, rejected=1)
+            audit(request, "verify_docket", f"Rejected {exam_type} docket for student {student_number}")
+            return error(INVALID_DOCKET_ERROR, 404)
+
+        await run_in_threadpool(record_scans, device, valid=1, exam_type=exam_type)
+        await run_in_threadpool(eligibility_cache.invalidate, [token_row["student_id"]])
+        await run_in_threadpool(publish_batch, "tokens", "token_hashes", [token_hash], change="used")
+        audit(request, "verify_docket", f"Verified {exam_type} docket for student {student_number}")
+        return JSONResponse({"ok": True, "student": student_details, "exam_type": exam_type})
+
+    except pymysql.MySQLError as err:
+        logger.error(f"Database error during verification: {err}")
+        return error("A database error occurred.", 500)
+    except ValueError as e:
+        await run_in_threadpool(record_scans, device, rejected=1)
+        audit(request, "verify_docket", f"Rejected docket: {e}")
+        return error(str(e), 400)
+    except Exception as e:
+        return error(f"An unexpected error occurred: {e}", 500)
+
+
+# Async version of routes/verification.py sync_verifications.
+@admin_route("/verification/sync")
+async def sync_verifications(request):
+    data = await read_json_body(request)
+    if data is None:
+        return error("Invalid JSON body.", 400)
+    pending = data.get("pending_verifications", [])
+    admin_id = request.state.user["sub"]
+    device_id = parse_device_id(data.get("device_id"))
+
+    if not pending:
+        return JSONResponse({"ok": True, "message": "No items to sync."})
+
+    try:
+        synced = Counter()  # valid scans per exam type
+        used, scanned = [], []
+        async with aio_pool.transaction() as cur:
+            for item in pending:
+                qr_data = item.get("qr_data")
+                if not qr_data:
+                    continue
+                try:
+                    student_number, exam_type, token_hash = parse_qr_data(qr_data)
+                except ValueError:
+                    continue
+
+                scanned_at = parse_scan_time(item.get("timestamp"))
+                token_row = await aio.find_active_token(cur, token_hash, student_number, exam_type, at=scanned_at)
+                if token_row:
+                    await aio.mark_token_used(cur, token_row["token_id"])
+                    await aio.record_verification(cur, token_row["docket_id"], admin_id, 'valid', 'Synced from offline verification', device_id)
+                    synced[exam_type] += 1
+                    used.append(token_hash)
+                    scanned.append(token_row["student_id"])
+
+        await run_in_threadpool(eligibility_cache.invalidate, scanned)
+        await run_in_threadpool(record_synced_scans, device_key(device_id, admin_id), synced, len(pending))
+        if used:
+            await run_in_threadpool(publish_batch, "tokens", "token_hashes", used, change="used")
+        audit(request, "sync_verifications", f"Synced {sum(synced.values())} of {len(pending)} offline verifications")
+        return JSONResponse({"ok": True, "message": "Sync successful"})
+
+    except pymysql.MySQLError as err:
+        logger.error(f"Database error during sync: {err}")
+        return error("Database error during sync.", 500)
+    except Exception as e:
+        return error(f"An unexpected error occurred during sync: {e}", 500)
+
+
+# Async version of routes/dockets.py sync_students.
+@admin_route("/dockets/sync/students")
+async def sync_students(request):
+    async def build():
+        async with aio_pool.transaction() as cur:
+            return {"ok": True, "students": await aio.list_for_sync(cur)}
+    try:
+        payload = await sync_cache.students.aget(build, run_in_threadpool)
+    except pymysql.MySQLError as err:
+        logger.error(f"Database error during students sync: {err}")
+        return error("A database error occurred.", 500)
+    return sync_response(request, payload)
+
+
+# Async version of routes/dockets.py sync_tokens.
+@admin_route("/dockets/sync/tokens")
+async def sync_tokens(request):
+    async def build():
+        async with aio_pool.transaction() as cur:
+            return {"ok": True, "tokens": await aio.list_active_token_hashes(cur)}
+    try:
+        payload = await sync_cache.tokens.aget(build, run_in_threadpool)
+    except pymysql.MySQLError as err:
+        logger.error(f"Database error during tokens sync: {err}")
+        return error("A database error occurred.", 500)
+    return sync_response(request, payload)
+
+
+# Server-sent events stream of changes (see utils/events.py). Resumes after the Last-Event-ID
+# header (or ?after=) and can be limited with ?topics=blocklist,tokens. Browsers' EventSource
+# can't set headers, so it authenticates with the access_token cookie.
+@admin_route("/events")
+async def event_stream(request):
+    after_id = parse_event_id(request.headers.get("last-event-id") or request.query_params.get("after"))
+    try:
+        subscriber = await event_hub.subscribe(after_id, parse_topics(request.query_params.get("topics")), run_in_threadpool)
+    except sqlite3.Error as e:
+        logger.warning(f"Event log unavailable: {e}")
+        return error("Events are unavailable.", 503)
+
+    async def stream():
+        try:
+            # A new client learns its resume point up front; a resuming one from the replayed events.
+            yield f"retry: 3000\nid: {subscriber.position}\n\n" if not subscriber.backlog else "retry: 3000\n\n"
+            while True:
+                events = await subscriber.next_events(EVENTS_HEARTBEAT_SECONDS)
+                if not events:
+                    yield ": ping\n\n"  # keeps proxies from closing an idle stream
+                for event in events:
+                    yield sse_message(event)
+        finally:
+            event_hub.unsubscribe(subscriber)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# Long-poll version of /events for clients that can't keep a stream open: waits up to ?timeout=
+# seconds (25 at most) for events after ?after= and returns them with the id to pass next time.
+@admin_route("/events/poll")
+async def event_poll(request):
+    after_id = parse_event_id(request.query_params.get("after"))
+    try:
+        timeout = min(max(float(request.query_params.get("timeout", 25)), 0), 25)
+    except ValueError:
+        return error("Invalid timeout.", 400)
+    try:
+        subscriber = await event_hub.subscribe(after_id, parse_topics(request.query_params.get("topics")), run_in_threadpool)
+    except sqlite3.Error as e:
+        logger.warning(f"Event log unavailable: {e}")
+        return error("Events are unavailable.", 503)
+    try:
+        events = await subscriber.next_events(timeout) if after_id is not None else []
+    finally:
+        event_hub.unsubscribe(subscriber)
+    return JSONResponse({"ok": True, "events": events, "last_event_id": subscriber.position})
+
+
+# Opens the async pool when the worker starts, so the first scan doesn't pay for the connections.
+# A failure is logged and the pool is retried on first use.
+@asynccontextmanager
+async def lifespan(app):
+    if async_enabled:
+        try:
+            await aio_pool.open()
+        except Exception as e:
+            logger.warning(f"Async DB pool warmup failed, connecting on first request instead: {e}")
+    yield
+    await aio_pool.close()
+
+
+async_enabled = db_dialect() == "mysql"
+routes = []
+if async_enabled:
+    routes = [
+        Route("/verification/verify", verify_docket, methods=["POST"]),
+        Route("/verification/sync", sync_verifications, methods=["POST"]),
+        Route("/dockets/sync/students", sync_students, methods=["GET"]),
+        Route("/dockets/sync/tokens", sync_tokens, methods=["GET"]),
+    ]
+routes += [
+    Route("/events", event_stream, methods=["GET"]),
+    Route("/events/poll", event_poll, methods=["GET"]),
+    Mount("/", app=WsgiToAsgi(flask_app)),
+]
+
+app = Starlette(
+    routes=routes,
+    lifespan=lifespan,
+    # Same policy as the Flask app's CORS(..., supports_credentials=True, origins "*")
+    middleware=[Middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])],
+)
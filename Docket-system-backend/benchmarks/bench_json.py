@@ -0,0 +1,123 @@
+# benchmarks/bench_json.py
+# Compares JSON serialization and response compression for the large API payloads: the scanner
+# roster (/dockets/sync/students), the active token list (/dockets/sync/tokens) and a payments
+# page with DECIMAL balances (/dockets/payments). For each payload it reports the serialize time
+# of Flask's default provider (stdlib json, what jsonify used before) and of the orjson provider
+# in utils/json_provider.py, and the bytes on the wire raw, gzip and brotli (with the levels
+# utils/compression.py uses) along with the time each compression takes.
+#
+# Usage: python benchmarks/bench_json.py [--students 50000] [--repeats 5] [--json results.json]
+
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import statistics
+from decimal import Decimal
+
+# Add the backend directory to the python path for module imports
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_dir)
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+from utils import compression  # noqa: E402
+from utils.json_provider import dumps_bytes, orjson  # noqa: E402
+
+FIRST_NAMES = ["Alice", "Bwalya", "Chanda", "Mutale", "Natasha", "Rewardson", "Thandiwe", "Mwila", "Kondwani", "Lweendo"]
+LAST_NAMES = ["Banda", "Phiri", "Mwansa", "Tembo", "Zulu", "Bukuru", "Lungu", "Mulenga", "Sakala", "Ngoma"]
+PROGRAMMES = ["Bachelor of Business Administration", "Bachelor of Science in Computing",
+              "Bachelor of Laws", "Diploma in Accountancy", "Bachelor of Public Health"]
+
+
+# Synthetic payloads shaped like the real responses, with a fixed seed so runs are comparable.
+def make_payloads(count):
+    rng = random.Random(42)
+    roster = [{
+        "id": i + 1,
+        "first_name": rng.choice(FIRST_NAMES),
+        "last_name": rng.choice(LAST_NAMES),
+        "student_number": str(200000 + i),
+        "programme_name": rng.choice(PROGRAMMES),
+    } for i in range(count)]
+    tokens = [hashlib.sha256(f"token-{i}".encode()).hexdigest() for i in range(count)]
+    balances = []
+    for student in roster[:min(count, 500)]:
+        total = Decimal(rng.choice([9000, 10000, 12000, 15000]))
+        paid = (total * Decimal(rng.randint(0, 100)) / 100).quantize(Decimal("0.01"))
+        balances.append({**student, "total_fee": total, "amount_paid": paid, "balance": total - paid,
+                         "ca1_status": "eligible" if paid * 4 >= total else "blocked"})
+    return {
+        "sync_students": {"ok": True, "students": roster},
+        "sync_tokens": {"ok": True, "tokens": tokens},
+        "payments_page": {"ok": True, "students": balances, "next_cursor": "WyJCYW5kYSIsIkFsaWNlIiwxMjM2XQ"},
+    }
+
+
+# Returns (median milliseconds, last result) over `repeats` calls.
+def timed(fn, repeats):
+    timings, result = [], None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(timings), 2), result
+
+
+def bench_payload(name, payload, repeats):
+    # Flask's default provider as jsonify used it: compact separators, sorted keys.
+    stdlib = DefaultJSONProvider(Flask(__name__))
+    stdlib_ms, stdlib_body = timed(lambda: stdlib.dumps(payload, separators=(",", ":")).encode("utf-8"), repeats)
+    fast_ms, body = timed(lambda: dumps_bytes(payload), repeats)
+    if json.loads(body) != json.loads(stdlib_body):
+        raise SystemExit(f"{name}: orjson output differs from the default provider")
+
+    result = {
+        "stdlib_serialize_ms": stdlib_ms,
+        "orjson_serialize_ms": fast_ms if orjson is not None else None,
+        "raw_bytes": len(body),
+    }
+    encodings = ["gzip"] + (["br"] if compression.brotli is not None else [])
+    for encoding in encodings:
+        ms, compressed = timed(lambda: compression.compress(body, encoding), repeats)
+        result[f"{encoding}_bytes"] = len(compressed)
+        result[f"{encoding}_ms"] = ms
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON serialization and compression of large payloads.")
+    parser.add_argument("--students", type=int, default=50000, help="Roster size (default 50000)")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed repeats; the median is reported")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    if orjson is None:
+        print("orjson is not installed: the app falls back to the stdlib provider, timed twice below.")
+    if compression.brotli is None:
+        print("Brotli is not installed: only gzip is measured.")
+
+    results = {}
+    for name, payload in make_payloads(args.students).items():
+        results[name] = bench_payload(name, payload, args.repeats)
+
+    print(f"{'payload':<16} {'stdlib ms':>10} {'orjson ms':>10} {'raw KB':>9} {'gzip KB':>9} {'gzip ms':>8} {'br KB':>8} {'br ms':>7}")
+    for name, r in results.items():
+        def cell(key, scale=1, width=8):
+            value = r.get(key)
+            return f"{value / scale:>{width}.1f}" if value is not None else f"{'-':>{width}}"
+        print(f"{name:<16} {cell('stdlib_serialize_ms', width=10)} {cell('orjson_serialize_ms', width=10)} "
+              f"{cell('raw_bytes', 1024, 9)} {cell('gzip_bytes', 1024, 9)} {cell('gzip_ms')} "
+              f"{cell('br_bytes', 1024)} {cell('br_ms', width=7)}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"students": args.students, "results": results}, f, indent=2)
+
+
+# Entry point for the script.
+if __name__ == "__main__":
+    main()
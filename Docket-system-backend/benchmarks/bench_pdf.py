@@ -0,0 +1,158 @@
+# benchmarks/bench_pdf.py
+# Micro-benchmarks for the CPU-heaviest code in the backend: docket PDF rendering and QR encoding.
+# For each course count it measures dockets rendered per second, peak Python memory of one render
+# (tracemalloc) and the PDF size; QR encoding is timed on its own. Results are compared with
+# benchmarks/baseline.json and the run fails (exit 1) when any metric regresses by more than
+# --threshold (default 20%). Record a new baseline with --update-baseline on the reference machine.
+#
+# Usage: python benchmarks/bench_pdf.py [--courses 4,8,16] [--iterations 20] [--repeats 5]
+#        [--threshold 0.2] [--update-baseline] [--json results.json]
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+import tracemalloc
+from io import BytesIO
+
+# Add the backend directory to the python path for module imports
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_dir)
+
+# generate_docket_pdf looks the logo up relative to the working directory, as it does under gunicorn
+os.chdir(os.path.dirname(backend_dir))
+
+import qrcode  # noqa: E402
+import reportlab  # noqa: E402
+from utils.docket_pdf import generate_docket_pdf  # noqa: E402
+
+BASELINE_FILE = os.path.join(backend_dir, "benchmarks", "baseline.json")
+QR_DATA = "104775|ca1|zLQRYl3ipOM7DwCCfO6H2g"
+
+# Which direction is better for each metric, used when comparing against the baseline
+HIGHER_IS_BETTER = {"dockets_per_sec": True, "encodes_per_sec": True, "peak_kb": False, "size_bytes": False}
+
+STUDENT = {
+    "student_number": "104775",
+    "first_name": "Rewardson",
+    "last_name": "Bukuru",
+    "programme_name": "Bachelor of Business Administration",
+}
+
+
+def make_courses(count):
+    return [{"course_code": f"BBA{100 + i}", "course_name": f"Benchmark Module {i + 1}"} for i in range(count)]
+
+
+# Runs fn `iterations` times per repeat and returns the median calls per second.
+def rate(fn, iterations, repeats):
+    fn()  # warm-up: imports, fonts, style sheets
+    rates = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        rates.append(iterations / (time.perf_counter() - started))
+    return statistics.median(rates)
+
+
+def peak_memory_kb(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def bench_pdf(course_count, iterations, repeats):
+    courses = make_courses(course_count)
+    render = lambda: generate_docket_pdf(STUDENT, courses, "ca1", QR_DATA)  # noqa: E731
+    return {
+        "dockets_per_sec": round(rate(render, iterations, repeats), 2),
+        "peak_kb": round(peak_memory_kb(render), 1),
+        "size_bytes": len(render().getvalue()),
+    }
+
+
+def bench_qr(iterations, repeats):
+    def encode():
+        qrcode.make(QR_DATA).save(BytesIO())
+    per_sec = rate(encode, iterations * 5, repeats)
+    return {"encodes_per_sec": round(per_sec, 2), "ms_per_encode": round(1000 / per_sec, 3)}
+
+
+# Returns a list of human-readable regressions beyond the threshold.
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, metrics in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric, value in metrics.items():
+            if metric not in HIGHER_IS_BETTER or not base.get(metric):
+                continue
+            change = (value - base[metric]) / base[metric]
+            worse = -change if HIGHER_IS_BETTER[metric] else change
+            if worse > threshold:
+                regressions.append(f"{name}.{metric}: {base[metric]} -> {value} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark docket PDF rendering and QR encoding.")
+    parser.add_argument("--courses", default="4,8,16", help="Comma-separated course counts to render")
+    parser.add_argument("--iterations", type=int, default=20, help="Renders per timed repeat")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed repeats; the median is reported")
+    parser.add_argument("--threshold", type=float, default=float(os.getenv("BENCH_THRESHOLD", 0.2)),
+                        help="Allowed regression as a fraction (0.2 = 20%%)")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--json", help="Also write this run's results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    for count in (int(c) for c in args.courses.split(",") if c.strip()):
+        results[f"pdf_{count}_courses"] = bench_pdf(count, args.iterations, args.repeats)
+        print(f"pdf_{count}_courses: {results[f'pdf_{count}_courses']}")
+    results["qr_encode"] = bench_qr(args.iterations, args.repeats)
+    print(f"qr_encode: {results['qr_encode']}")
+
+    environment = {
+        "python": platform.python_version(),
+        "reportlab": reportlab.Version,
+        "machine": platform.machine(),
+        "recorded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"environment": environment, "results": results}, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"environment": environment, "results": results}, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}.")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("No baseline yet; run with --update-baseline to record one.")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline.get("results", {}), args.threshold)
+    if regressions:
+        print(f"Regressed by more than {args.threshold:.0%} against the baseline "
+              f"(recorded {baseline.get('environment', {}).get('recorded_at', 'unknown')}):")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"No regressions beyond {args.threshold:.0%}.")
+
+
+# Entry point for the script.
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+-- SQLite version of the docket_system2 schema, used when DB_PLATFORM=SQLITE for local runs,
+-- load tests and benchmarks. It mirrors docket_system2_xampp.sql plus migrations 002 to 006,
+-- without the XAMPP triggers (the app maintains balances and clearances itself, as on TiDB).
+-- Timestamps are stored as local 'YYYY-MM-DD HH:MM:SS' text, like MySQL's NOW().
+-- Create a database with: python scripts/init_sqlite.py
+
+CREATE TABLE IF NOT EXISTS `admins` (
+  `admin_id` INTEGER PRIMARY KEY,
+  `username` VARCHAR(50) NOT NULL UNIQUE,
+  `password_hash` VARCHAR(255) NOT NULL,
+  `role` VARCHAR(20) NOT NULL,
+  `status` VARCHAR(10) DEFAULT 'active',
+  `created_at` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime')),
+  `updated_at` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime')),
+  `password` VARCHAR(255) DEFAULT NULL
+);
+
+CREATE TABLE IF NOT EXISTS `audit_logs` (
+  `log_id` INTEGER PRIMARY KEY,
+  `user_type` VARCHAR(10) NOT NULL,
+  `user_id` INTEGER NOT NULL,
+  `action_type` VARCHAR(100) NOT NULL,
+  `action_description` TEXT DEFAULT NULL,
+  `action_time` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime')),
+  `ip_address` VARCHAR(50) DEFAULT NULL
+);
+
+CREATE TABLE IF NOT EXISTS `clearances` (
+  `clearance_id` INTEGER PRIMARY KEY,
+  `student_id` INTEGER NOT NULL,
+  `programme_id` INTEGER NOT NULL,
+  `year_of_study` INTEGER NOT NULL,
+  `semester` INTEGER NOT NULL,
+  `ca1_status` VARCHAR(10) NOT NULL DEFAULT 'blocked',
+  `ca2_status` VARCHAR(10) NOT NULL DEFAULT 'blocked',
+  `exam_status` VARCHAR(10) NOT NULL DEFAULT 'blocked',
+  `last_checked` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS `idx_clearances_term` ON `clearances` (`student_id`, `year_of_study`, `semester`);
+
+CREATE TABLE IF NOT EXISTS `clearance_rules` (
+  `rule_id` INTEGER PRIMARY KEY,
+  `exam_type` VARCHAR(4) NOT NULL,
+  `required_percentage` DECIMAL(5,2) NOT NULL,
+  `created_at` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+
+CREATE TABLE IF NOT EXISTS `courses` (
+  `course_id` INTEGER PRIMARY KEY,
+  `course_code` VARCHAR(20) NOT NULL UNIQUE,
+  `course_name` VARCHAR(100) NOT NULL,
+  `programme_id` INTEGER NOT NULL,
+  `year_of_study` INTEGER NOT NULL,
+  `semester` INTEGER NOT NULL,
+  `credits` INTEGER NOT NULL DEFAULT 3,
+  `created_at` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime')),
+  `updated_at` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+
+CREATE TABLE IF NOT EXISTS `curriculum` (
+  `curriculum_id` INTEGER PRIMARY KEY,
+  `programme_id` INTEGER NOT NULL,
+  `course_id` INTEGER NOT NULL,
+  `year_of_study` INTEGER NOT NULL,
+  `semester` INTEGER NOT NULL,
+  `created_at` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS `idx_curriculum_programme` ON `curriculum` (`programme_id`);
+
+CREATE TABLE IF NOT EXISTS `device_registry` (
+  `device_id` INTEGER PRIMARY KEY,
+  `device_name` VARCHAR(100) NOT NULL,
+  `device_type` VARCHAR(50) DEFAULT 'scanner',
+  `registered_by` INTEGER NOT NULL,
+  `status` VARCHAR(10) DEFAULT 'active',
+  `registered_at` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime')),
+  `last_used` TIMESTAMP NULL DEFAULT NULL
+);
+
+CREATE TABLE IF NOT EXISTS `dockets` (
+  `docket_id` INTEGER PRIMARY KEY,
+  `student_id` INTEGER NOT NULL,
+  `programme_id` INTEGER NOT NULL,
+  `exam_type` VARCHAR(10) NOT NULL,
+  `course_id` INTEGER DEFAULT NULL,
+  `year_of_study` INTEGER NOT NULL,
+  `semester` INTEGER NOT NULL,
+  `qr_code` VARCHAR(255) NOT NULL UNIQUE,
+  `issued_at` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime')),
+  `expires_at` TIMESTAMP NULL DEFAULT NULL,
+  `status` VARCHAR(10) DEFAULT 'active',
+  `printed_count` INTEGER DEFAULT 1,
+  `created_at` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime')),
+  `updated_at` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS `idx_dockets_student` ON `dockets` (`student_id`);
+
+CREATE TABLE IF NOT EXISTS `docket_tokens` (
+  `token_id` INTEGER PRIMARY KEY,
+  `docket_id` INTEGER NOT NULL,
+  `token_hash` VARCHAR(255) NOT NULL UNIQUE,
+  `issued_at` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime')),
+  `expires_at` TIMESTAMP NULL DEFAULT NULL,
+  `status` VARCHAR(10) DEFAULT 'active',
+  `used_at` TIMESTAMP NULL DEFAULT NULL
+);
+CREATE INDEX IF NOT EXISTS `idx_docket_tokens_docket` ON `docket_tokens` (`docket_id`);
+CREATE INDEX IF NOT EXISTS `idx_docket_tokens_status` ON `docket_tokens` (`status`);
+
+CREATE TABLE IF NOT EXISTS `enrollments` (
+  `enrollment_id` INTEGER PRIMARY KEY,
+  `student_id` INTEGER NOT NULL,
+  `curriculum_id` INTEGER NOT NULL,
+  `year_of_study` INTEGER NOT NULL,
+  `semester` INTEGER NOT NULL,
+  `enrollment_status` VARCHAR(10) DEFAULT 'active',
+  `created_at` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime')),
+  `updated_at` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS `idx_enrollments_student` ON `enrollments` (`student_id`);
+
+CREATE TABLE IF NOT EXISTS `fee_schedule` (
+  `schedule_id` INTEGER PRIMARY KEY,
+  `exam_type` VARCHAR(4) NOT NULL,
+  `required_percentage` DECIMAL(5,2) NOT NULL,
+  `created_at` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+
+CREATE TABLE IF NOT EXISTS `payments` (
+  `payment_id` INTEGER PRIMARY KEY,
+  `student_id` INTEGER NOT NULL,
+  `programme_id` INTEGER NOT NULL,
+  `course_id` INTEGER DEFAULT NULL,
+  `amount` DECIMAL(10,2) NOT NULL,
+  `payment_type` VARCHAR(10) NOT NULL,
+  `payment_date` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime')),
+  `payment_status` VARCHAR(10) DEFAULT 'completed',
+  `receipt_number` VARCHAR(50) DEFAULT NULL UNIQUE,
+  `created_at` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS `idx_payments_student` ON `payments` (`student_id`);
+
+CREATE TABLE IF NOT EXISTS `programmes` (
+  `programme_id` INTEGER PRIMARY KEY,
+  `programme_name` VARCHAR(100) NOT NULL UNIQUE,
+  `programme_code` VARCHAR(10) DEFAULT NULL UNIQUE,
+  `total_years` INTEGER NOT NULL DEFAULT 4,
+  `semesters_per_year` INTEGER NOT NULL DEFAULT 2,
+  `created_at` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime')),
+  `updated_at` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime')),
+  `duration_years` INTEGER DEFAULT 4,
+  `total_fee` DECIMAL(10,2) NOT NULL DEFAULT 0.00
+);
+
+CREATE TABLE IF NOT EXISTS `students` (
+  `id` INTEGER PRIMARY KEY,
+  `student_number` CHAR(6) NOT NULL UNIQUE,
+  `first_name` VARCHAR(50) NOT NULL,
+  `last_name` VARCHAR(50) NOT NULL,
+  `email` VARCHAR(100) NOT NULL UNIQUE,
+  `programme_id` INTEGER DEFAULT NULL,
+  `current_year` INTEGER NOT NULL,
+  `current_semester` INTEGER NOT NULL,
+  `password` VARCHAR(255) NOT NULL,
+  `status` VARCHAR(10) DEFAULT 'active',
+  `created_at` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime')),
+  `created_by` VARCHAR(50) DEFAULT 'system',
+  `password_hash` VARCHAR(255) DEFAULT NULL,
+  `updated_at` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS `idx_students_name_keyset` ON `students` (`last_name`, `first_name`, `id`);
+CREATE INDEX IF NOT EXISTS `idx_students_updated_at` ON `students` (`updated_at`);
+CREATE INDEX IF NOT EXISTS `idx_students_programme` ON `students` (`programme_id`);
+
+CREATE TABLE IF NOT EXISTS `student_balances` (
+  `balance_id` INTEGER PRIMARY KEY,
+  `student_id` INTEGER NOT NULL,
+  `programme_id` INTEGER NOT NULL,
+  `year_of_study` INTEGER NOT NULL,
+  `semester` INTEGER NOT NULL,
+  `total_fee` DECIMAL(10,2) NOT NULL,
+  `amount_paid` DECIMAL(10,2) DEFAULT 0.00,
+  `balance` DECIMAL(10,2) GENERATED ALWAYS AS (`total_fee` - `amount_paid`) STORED,
+  `last_updated` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS `idx_student_balances_term` ON `student_balances` (`student_id`, `year_of_study`, `semester`);
+
+CREATE TABLE IF NOT EXISTS `token_keys` (
+  `key_id` INTEGER PRIMARY KEY,
+  `key_name` VARCHAR(100) NOT NULL,
+  `secret_key` VARCHAR(255) NOT NULL,
+  `created_at` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime')),
+  `status` VARCHAR(10) DEFAULT 'active'
+);
+
+CREATE TABLE IF NOT EXISTS `verifications` (
+  `verification_id` INTEGER PRIMARY KEY,
+  `docket_id` INTEGER NOT NULL,
+  `scanned_by` INTEGER NOT NULL,
+  `scanned_at` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime')),
+  `scan_result` VARCHAR(10) NOT NULL,
+  `device_id` INTEGER DEFAULT NULL,
+  `remarks` TEXT DEFAULT NULL
+);
+CREATE INDEX IF NOT EXISTS `idx_verifications_docket` ON `verifications` (`docket_id`);
+CREATE INDEX IF NOT EXISTS `idx_verifications_scanned_at` ON `verifications` (`scanned_at`);
+
+CREATE TABLE IF NOT EXISTS `verifications_archive` (
+  `verification_id` INTEGER PRIMARY KEY,
+  `docket_id` INTEGER NOT NULL,
+  `scanned_by` INTEGER NOT NULL,
+  `scanned_at` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime')),
+  `scan_result` VARCHAR(10) NOT NULL,
+  `device_id` INTEGER DEFAULT NULL,
+  `remarks` TEXT DEFAULT NULL,
+  `archived_at` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS `idx_verifications_archive_docket` ON `verifications_archive` (`docket_id`);
+
+CREATE TABLE IF NOT EXISTS `docket_tokens_archive` (
+  `token_id` INTEGER PRIMARY KEY,
+  `docket_id` INTEGER NOT NULL,
+  `token_hash` VARCHAR(255) NOT NULL,
+  `issued_at` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime')),
+  `expires_at` TIMESTAMP NULL DEFAULT NULL,
+  `status` VARCHAR(10) DEFAULT NULL,
+  `used_at` TIMESTAMP NULL DEFAULT NULL,
+  `archived_at` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS `idx_docket_tokens_archive_docket` ON `docket_tokens_archive` (`docket_id`);
+
+CREATE TABLE IF NOT EXISTS `dockets_archive` (
+  `docket_id` INTEGER PRIMARY KEY,
+  `student_id` INTEGER NOT NULL,
+  `programme_id` INTEGER NOT NULL,
+  `exam_type` VARCHAR(10) NOT NULL,
+  `course_id` INTEGER DEFAULT NULL,
+  `year_of_study` INTEGER NOT NULL,
+  `semester` INTEGER NOT NULL,
+  `qr_code` VARCHAR(255) NOT NULL,
+  `issued_at` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime')),
+  `expires_at` TIMESTAMP NULL DEFAULT NULL,
+  `status` VARCHAR(10) DEFAULT NULL,
+  `printed_count` INTEGER DEFAULT 1,
+  `created_at` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime')),
+  `updated_at` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime')),
+  `archived_at` TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS `idx_dockets_archive_student` ON `dockets_archive` (`student_id`);
+
+-- ON UPDATE current_timestamp() equivalents. The student search index relies on students.updated_at.
+CREATE TRIGGER IF NOT EXISTS `students_updated_at` AFTER UPDATE ON `students`
+FOR EACH ROW WHEN NEW.`updated_at` IS OLD.`updated_at` BEGIN
+  UPDATE `students` SET `updated_at` = datetime('now', 'localtime') WHERE `id` = NEW.`id`;
+END;
+
+CREATE TRIGGER IF NOT EXISTS `student_balances_last_updated` AFTER UPDATE ON `student_balances`
+FOR EACH ROW WHEN NEW.`last_updated` IS OLD.`last_updated` BEGIN
+  UPDATE `student_balances` SET `last_updated` = datetime('now', 'localtime') WHERE `balance_id` = NEW.`balance_id`;
+END;
+
+CREATE TRIGGER IF NOT EXISTS `dockets_updated_at` AFTER UPDATE ON `dockets`
+FOR EACH ROW WHEN NEW.`updated_at` IS OLD.`updated_at` BEGIN
+  UPDATE `dockets` SET `updated_at` = datetime('now', 'localtime') WHERE `docket_id` = NEW.`docket_id`;
+END;
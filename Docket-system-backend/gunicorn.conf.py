@@ -0,0 +1,69 @@
+# gunicorn.conf.py
+# Server hooks for running the backend under gunicorn (see Procfile / render.yaml).
+# Worker count and bind address stay on the command line.
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+# So the hooks below can import backend modules even before the app itself is loaded.
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from utils import env  # noqa: E402,F401  (the settings below may come from .env)
+
+
+# Helper function reading an on/off setting from the environment.
+def _flag(name, default):
+    return os.getenv(name, "1" if default else "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+# Build the app once in the master and fork workers from it, so a (re)started worker is ready
+# to serve almost immediately. Set GUNICORN_PRELOAD=0 to load the app in each worker instead.
+preload_app = _flag("GUNICORN_PRELOAD", True)
+
+# Each worker writes its metrics to files in this directory and /metrics merges them.
+# Set here as well so the master and every worker agree on the location.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "docket_prometheus"))
+
+
+# Runs once in the master before any worker starts: clear out metrics left by a previous run.
+def on_starting(server):
+    metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+# Runs in the master once it is ready to fork workers. With PDF_PRELOAD=1 the PDF stack
+# (reportlab, qrcode, PIL) is imported and warmed here, so every worker inherits it instead of
+# paying for it on its first docket. Off by default: scan and sync traffic never needs it.
+def when_ready(server):
+    if _flag("PDF_PRELOAD", False):
+        started = time.perf_counter()
+        from utils.docket_pdf import warm_pdf_templates
+        warm_pdf_templates()
+        server.log.info("PDF stack warmed in the master in %.0f ms", (time.perf_counter() - started) * 1000)
+
+
+# Runs in each worker after the fork, once the app is loaded: open this worker's DB pool before
+# it accepts requests (DB_POOL_WARM=0 to leave it to the first request). A failure is logged
+# and the pool is retried on first use, so a database outage doesn't stop workers booting.
+def post_worker_init(worker):
+    from utils.db import db_pool, db_dialect
+    if db_dialect() == "mysql" and _flag("DB_POOL_WARM", True):
+        try:
+            db_pool.warm()
+        except Exception as e:
+            worker.log.warning("DB pool warmup failed, connecting on first request instead: %s", e)
+
+
+# Runs in the master when a worker exits, so its in-flight gauge no longer counts.
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+# Runs in a worker as it shuts down: write out the audit events it still has queued.
+def worker_exit(server, worker):
+    from utils.audit import audit_log
+    audit_log.shutdown()
@@ -0,0 +1,6 @@
+-- Clearance statuses are now recomputed by repositories/clearances.py on every platform
+-- (update_payment, the bulk payment import and the full recompute after a fee_schedule change).
+-- The XAMPP trigger applied the same rules a second time, so it is dropped to keep one code path.
+-- Apply with: mysql docket_system2 < migrations/001_drop_clearance_trigger.sql
+
+DROP TRIGGER IF EXISTS `update_clearance_after_balance_update`;
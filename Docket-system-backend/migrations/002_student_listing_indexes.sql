@@ -0,0 +1,7 @@
+-- Indexes behind the keyset-paginated /dockets/payments listing.
+-- students is walked in (last_name, first_name, id) order, and the current-term balance and
+-- clearance rows are looked up per student by (student_id, year_of_study, semester).
+
+CREATE INDEX `idx_students_name_keyset` ON `students` (`last_name`, `first_name`, `id`);
+CREATE INDEX `idx_student_balances_term` ON `student_balances` (`student_id`, `year_of_study`, `semester`);
+CREATE INDEX `idx_clearances_term` ON `clearances` (`student_id`, `year_of_study`, `semester`);
@@ -0,0 +1,7 @@
+-- Change watermark for the in-process student search index (utils/student_search.py).
+-- Each worker re-reads only the students whose updated_at is at or after the newest one it has seen.
+
+ALTER TABLE `students`
+  ADD COLUMN `updated_at` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE current_timestamp();
+
+CREATE INDEX `idx_students_updated_at` ON `students` (`updated_at`);
@@ -0,0 +1,47 @@
+-- Archive tables for the retention job (scripts/archive_records.py, repositories/retention.py).
+-- Finished tokens, old verifications and their dockets from past terms are moved here in small
+-- batches, so the live tables and their indexes only hold what scans and syncs still need.
+-- Rows keep their original ids; archived_at records when each one was moved.
+
+CREATE TABLE IF NOT EXISTS `verifications_archive` (
+  `verification_id` int(11) NOT NULL PRIMARY KEY,
+  `docket_id` int(11) NOT NULL,
+  `scanned_by` int(11) NOT NULL,
+  `scanned_at` timestamp NOT NULL DEFAULT current_timestamp(),
+  `scan_result` varchar(50) NOT NULL,
+  `device_id` int(11) DEFAULT NULL,
+  `remarks` text DEFAULT NULL,
+  `archived_at` timestamp NOT NULL DEFAULT current_timestamp(),
+  KEY `idx_verifications_archive_docket` (`docket_id`)
+);
+
+CREATE TABLE IF NOT EXISTS `docket_tokens_archive` (
+  `token_id` int(11) NOT NULL PRIMARY KEY,
+  `docket_id` int(11) NOT NULL,
+  `token_hash` varchar(255) NOT NULL,
+  `issued_at` timestamp NOT NULL DEFAULT current_timestamp(),
+  `expires_at` timestamp NULL DEFAULT NULL,
+  `status` varchar(50) DEFAULT NULL,
+  `used_at` timestamp NULL DEFAULT NULL,
+  `archived_at` timestamp NOT NULL DEFAULT current_timestamp(),
+  KEY `idx_docket_tokens_archive_docket` (`docket_id`)
+);
+
+CREATE TABLE IF NOT EXISTS `dockets_archive` (
+  `docket_id` int(11) NOT NULL PRIMARY KEY,
+  `student_id` int(11) NOT NULL,
+  `programme_id` int(11) NOT NULL,
+  `exam_type` varchar(10) NOT NULL,
+  `course_id` int(11) DEFAULT NULL,
+  `year_of_study` int(11) NOT NULL,
+  `semester` int(11) NOT NULL,
+  `qr_code` varchar(255) NOT NULL,
+  `issued_at` timestamp NOT NULL DEFAULT current_timestamp(),
+  `expires_at` timestamp NULL DEFAULT NULL,
+  `status` varchar(50) DEFAULT NULL,
+  `printed_count` int(11) DEFAULT 1,
+  `created_at` timestamp NOT NULL DEFAULT current_timestamp(),
+  `updated_at` timestamp NOT NULL DEFAULT current_timestamp(),
+  `archived_at` timestamp NOT NULL DEFAULT current_timestamp(),
+  KEY `idx_dockets_archive_student` (`student_id`)
+);
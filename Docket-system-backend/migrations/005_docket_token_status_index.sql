@@ -0,0 +1,5 @@
+-- Index behind the active-token list (/dockets/sync/tokens) and the expiry sweep
+-- (utils/token_expiry.py), which both look tokens up by status. InnoDB appends the primary key,
+-- so the sweep can walk active tokens in token_id order from the index.
+
+CREATE INDEX `idx_docket_tokens_status` ON `docket_tokens` (`status`);
@@ -0,0 +1,4 @@
+-- Index behind the live verification stats reconciliation (utils/verification_stats.py), which
+-- recounts the valid scans of the last window by scanned_at every few minutes.
+
+CREATE INDEX `idx_verifications_scanned_at` ON `verifications` (`scanned_at`);
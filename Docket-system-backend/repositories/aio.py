@@ -0,0 +1,35 @@
+from datetime import datetime
+from repositories import dockets, students, verifications
+
+# Async versions of the queries used by the async serving path (asgi.py).
+# They take an async cursor from utils/aio_db.py and run the same statements as the sync
+# functions in the other repository modules, which remain the reference for what each one does.
+
+
+async def find_active_token(cur, token_hash, student_number, exam_type, at=None):
+    await cur.execute(dockets.FIND_ACTIVE_TOKEN_SQL, (token_hash, student_number, exam_type, at or datetime.now()))
+    return await cur.fetchone()
+
+
+async def mark_token_used(cur, token_id) -> None:
+    await cur.execute(dockets.MARK_TOKEN_USED_SQL, (token_id,))
+
+
+async def list_active_token_hashes(cur) -> list:
+    await cur.execute(dockets.ACTIVE_TOKEN_HASHES_SQL)
+    return [row['token_hash'] for row in await cur.fetchall()]
+
+
+async def record_verification(cur, docket_id, scanned_by, scan_result, remarks=None, device_id=None) -> int:
+    await cur.execute(verifications.RECORD_VERIFICATION_SQL, (docket_id, scanned_by, scan_result, device_id, remarks))
+    return cur.lastrowid
+
+
+async def get_verification_details(cur, student_id):
+    await cur.execute(students.VERIFICATION_DETAILS_SQL, (student_id,))
+    return await cur.fetchone()
+
+
+async def list_for_sync(cur) -> list:
+    await cur.execute(students.SYNC_LIST_SQL)
+    return list(await cur.fetchall())
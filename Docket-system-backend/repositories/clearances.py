@@ -0,0 +1,223 @@
+from decimal import Decimal
+from typing import Optional
+from utils.db import db_dialect
+
+# Clearance engine and clearance queries.
+# Finance clearance for CA1, CA2 and the final exam is derived from the share of the current-term
+# fee a student has paid, compared against the percentages in fee_schedule. This module is the one
+# place those rules are applied: update_payment, the bulk payment import and the full recompute
+# after a fee_schedule change all go through recompute_clearances on every platform.
+
+EXAM_TYPES = ("CA1", "CA2", "EXAM")
+# Clearance column for each exam type as named in exam_settings.json and on dockets.
+CLEARANCE_COLUMNS = {"ca1": "ca1_status", "ca2": "ca2_status", "exam": "exam_status"}
+
+# Share of the fee paid, as a percentage. A zero fee counts as 0% paid, as it always has.
+# 100.0 keeps the division fractional on SQLite, where whole amounts are stored as integers.
+_PERCENT_PAID = "CASE WHEN sb.total_fee > 0 THEN sb.amount_paid * 100.0 / sb.total_fee ELSE 0 END"
+
+# New status for each clearance column, compared against the matching fee_schedule requirement.
+_STATUS_EXPR = {
+    "ca1_status": f"CASE WHEN {_PERCENT_PAID} >= fs.ca1_req THEN 'eligible' ELSE 'blocked' END",
+    "ca2_status": f"CASE WHEN {_PERCENT_PAID} >= fs.ca2_req THEN 'eligible' ELSE 'blocked' END",
+    "exam_status": f"CASE WHEN {_PERCENT_PAID} >= fs.exam_req THEN 'eligible' ELSE 'blocked' END",
+}
+
+# Pivots fee_schedule into a single row. A missing rule counts as 0% required.
+_RULES_SUBQUERY = """
+    SELECT
+        COALESCE(MAX(CASE WHEN exam_type = 'CA1' THEN required_percentage END), 0) AS ca1_req,
+        COALESCE(MAX(CASE WHEN exam_type = 'CA2' THEN required_percentage END), 0) AS ca2_req,
+        COALESCE(MAX(CASE WHEN exam_type = 'EXAM' THEN required_percentage END), 0) AS exam_req
+    FROM fee_schedule
+"""
+
+# Join of a clearance row to its student's current term and the matching balance row.
+_CURRENT_TERM = """
+    s.id = c.student_id
+    AND c.programme_id = s.programme_id
+    AND c.year_of_study = s.current_year
+    AND c.semester = s.current_semester
+    AND sb.student_id = c.student_id
+    AND sb.programme_id = c.programme_id
+    AND sb.year_of_study = c.year_of_study
+    AND sb.semester = c.semester
+"""
+
+# Join condition picking one clearance row c for student s's current term. Some student-terms in
+# the schema dumps have several clearance rows, so only the lowest-id one is joined (a lookup on
+# idx_clearances_term) and every student appears once.
+_ONE_CURRENT_CLEARANCE = """
+    c.clearance_id = (
+        SELECT MIN(cl.clearance_id) FROM clearances cl
+        WHERE cl.student_id = s.id
+            AND cl.programme_id = s.programme_id
+            AND cl.year_of_study = s.current_year
+            AND cl.semester = s.current_semester
+    )
+"""
+
+
+# Recomputes current-term clearances in one set-based UPDATE and returns how many rows changed.
+# Pass a list of student ids to limit the pass to those students, or None to recompute everyone.
+# Only rows whose status actually changes are written, which keeps a full recompute cheap.
+def recompute_clearances(cur, student_ids: Optional[list] = None) -> int:
+    if student_ids is not None and not student_ids:
+        return 0
+
+    changed = " OR ".join(f"c.{col} <> {expr}" for col, expr in _STATUS_EXPR.items())
+    if db_dialect() == "sqlite":
+        # SQLite has no UPDATE ... JOIN; UPDATE ... FROM does the same, with unqualified SET targets.
+        assignments = ", ".join(f"{col} = {expr}" for col, expr in _STATUS_EXPR.items())
+        sql = f"""
+            UPDATE clearances AS c
+            SET {assignments}, last_checked = NOW()
+            FROM students s, student_balances sb, ({_RULES_SUBQUERY}) fs
+            WHERE {_CURRENT_TERM} AND ({changed})
+        """
+    else:
+        assignments = ", ".join(f"c.{col} = {expr}" for col, expr in _STATUS_EXPR.items())
+        sql = f"""
+            UPDATE clearances c
+            JOIN students s ON s.id = c.student_id
+                AND c.programme_id = s.programme_id
+                AND c.year_of_study = s.current_year
+                AND c.semester = s.current_semester
+            JOIN student_balances sb ON sb.student_id = c.student_id
+                AND sb.programme_id = c.programme_id
+                AND sb.year_of_study = c.year_of_study
+                AND sb.semester = c.semester
+            CROSS JOIN ({_RULES_SUBQUERY}) fs
+            SET {assignments}, c.last_checked = NOW()
+            WHERE ({changed})
+        """
+    params = ()
+    if student_ids is not None:
+        sql += f" AND c.student_id IN ({', '.join(['%s'] * len(student_ids))})"
+        params = tuple(student_ids)
+
+    cur.execute(sql, params)
+    return cur.rowcount
+
+
+# Returns the fee_schedule as {"CA1": Decimal, "CA2": Decimal, "EXAM": Decimal}.
+def fetch_fee_schedule(cur) -> dict:
+    cur.execute("SELECT exam_type, required_percentage FROM fee_schedule")
+    rules = {exam_type: Decimal("0") for exam_type in EXAM_TYPES}
+    for row in cur.fetchall():
+        if isinstance(row, dict):
+            rules[row["exam_type"]] = row["required_percentage"]
+        else:
+            rules[row[0]] = row[1]
+    return rules
+
+
+# Writes new fee_schedule percentages and recomputes every student's clearance against them.
+# Runs in the caller's transaction; returns the number of clearance rows that changed.
+def update_fee_schedule(cur, percentages: dict) -> int:
+    cur.execute("SELECT exam_type FROM fee_schedule")
+    existing = {row["exam_type"] if isinstance(row, dict) else row[0] for row in cur.fetchall()}
+
+    for exam_type, percentage in percentages.items():
+        if exam_type in existing:
+            cur.execute(
+                "UPDATE fee_schedule SET required_percentage = %s WHERE exam_type = %s",
+                (percentage, exam_type),
+            )
+        else:
+            cur.execute(
+                "INSERT INTO fee_schedule (exam_type, required_percentage) VALUES (%s, %s)",
+                (exam_type, percentage),
+            )
+    return recompute_clearances(cur)
+
+
+# Returns a student's clearance statuses (ca1_status, ca2_status, exam_status), or None.
+def get_clearance(cur, student_id) -> Optional[dict]:
+    cur.execute(
+        "SELECT ca1_status, ca2_status, exam_status FROM clearances WHERE student_id=%s LIMIT 1",
+        (student_id,),
+    )
+    return cur.fetchone()
+
+
+# Runs the batch eligibility query and leaves the rows on the cursor, so callers can either
+# fetchall() or stream them with fetchmany(). Select students by "id" or "student_number"
+# (keys is the list of values) or by "programme_id" (keys is the programme id).
+def select_current_clearances(cur, column: str, keys) -> None:
+    if column == "programme_id":
+        where_sql, params = "s.programme_id = %s", (keys,)
+    else:
+        where_sql = f"s.{column} IN ({', '.join(['%s'] * len(keys))})"
+        params = tuple(keys)
+    cur.execute(f"""
+        SELECT s.id, s.student_number, c.ca1_status, c.ca2_status, c.exam_status
+        FROM students s
+        LEFT JOIN clearances c ON {_ONE_CURRENT_CLEARANCE}
+        WHERE {where_sql}
+        ORDER BY s.id
+    """, params)
+
+
+# Returns the docket fields (as students.get_docket_details) of every student cleared for
+# exam_type in their current term, with one query. Pass student_ids to check only those students.
+def list_cleared_students(cur, exam_type: str, student_ids: Optional[list] = None) -> list:
+    column = CLEARANCE_COLUMNS[exam_type]
+    where_ids, params = "", ()
+    if student_ids is not None:
+        if not student_ids:
+            return []
+        where_ids = f"AND s.id IN ({', '.join(['%s'] * len(student_ids))})"
+        params = tuple(student_ids)
+    cur.execute(f"""
+        SELECT s.id, s.first_name, s.last_name, s.student_number, s.programme_id, p.programme_name,
+               s.current_year, s.current_semester
+        FROM students s
+        JOIN programmes p ON s.programme_id = p.programme_id
+        JOIN clearances c ON {_ONE_CURRENT_CLEARANCE}
+        WHERE c.{column} = 'eligible' {where_ids}
+        ORDER BY s.id
+    """, params)
+    return cur.fetchall()
+
+
+# Returns {exam_type: students cleared for it in their current term}, with one query. Students
+# are counted once however many clearance rows their term has.
+def count_cleared_students(cur) -> dict:
+    cur.execute(f"""
+        SELECT {', '.join(f"COUNT(DISTINCT CASE WHEN c.{column} = 'eligible' THEN s.id END) AS {exam_type}"
+                          for exam_type, column in CLEARANCE_COLUMNS.items())}
+        FROM students s
+        JOIN clearances c ON c.student_id = s.id
+            AND c.programme_id = s.programme_id
+            AND c.year_of_study = s.current_year
+            AND c.semester = s.current_semester
+    """)
+    row = cur.fetchone() or {}
+    return {exam_type: int(row.get(exam_type) or 0) for exam_type in CLEARANCE_COLUMNS}
+
+
+# Returns which of the given students have a clearance row for their current term.
+def cleared_in_current_term(cur, student_ids) -> set:
+    if not student_ids:
+        return set()
+    cur.execute(f"""
+        SELECT c.student_id
+        FROM clearances c
+        JOIN students s ON s.id = c.student_id
+            AND c.programme_id = s.programme_id
+            AND c.year_of_study = s.current_year
+            AND c.semester = s.current_semester
+        WHERE c.student_id IN ({', '.join(['%s'] * len(student_ids))})
+    """, tuple(student_ids))
+    return {row["student_id"] for row in cur.fetchall()}
+
+
+# Creates clearance rows (every exam 'blocked' until recompute_clearances runs);
+# rows are (student_id, programme_id, year_of_study, semester).
+def insert_clearances(cur, rows) -> None:
+    if rows:
+        cur.executemany(
+            "INSERT INTO clearances (student_id, programme_id, year_of_study, semester) VALUES (%s, %s, %s, %s)",
+            rows,
+        )
@@ -0,0 +1,182 @@
+import secrets
+from datetime import datetime
+from typing import Optional
+
+# Docket and docket token queries.
+# Functions take an open cursor and run inside the caller's transaction. Token lookups lock the
+# token row (FOR UPDATE on MySQL/TiDB; on SQLite the caller's BEGIN IMMEDIATE does the same job).
+
+
+# Returns the active token key id, creating the default key when there is none.
+def ensure_token_key(cur) -> int:
+    cur.execute("SELECT key_id, secret_key FROM token_keys WHERE status='active' LIMIT 1")
+    key_row = cur.fetchone()
+    if key_row:
+        return key_row["key_id"]
+    cur.execute('''
+        INSERT INTO token_keys (key_name, secret_key, created_at, status)
+        VALUES (%s, %s, NOW(), %s)
+    ''', ("default_verification_key", secrets.token_urlsafe(32), "active"))
+    return cur.lastrowid
+
+
+# Records an issued docket for the student's current term and returns its id.
+def insert_docket(cur, student, exam_type, qr_data, expires_at=None) -> int:
+    cur.execute('''
+        INSERT INTO dockets (student_id, programme_id, exam_type, year_of_study, semester, qr_code, issued_at, expires_at, status, printed_count, created_at, updated_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW())
+    ''', (
+        student['id'],
+        student['programme_id'],
+        exam_type,
+        student['current_year'],
+        student['current_semester'],
+        qr_data,
+        datetime.now(),
+        expires_at,
+        "issued",
+        1
+    ))
+    return cur.lastrowid
+
+
+# Stores the hash of a docket's verification token as active.
+def insert_token(cur, docket_id, token_hash, expires_at=None) -> int:
+    cur.execute('''
+        INSERT INTO docket_tokens (docket_id, token_hash, issued_at, expires_at, status)
+        VALUES (%s, %s, %s, %s, %s)
+    ''', (docket_id, token_hash, datetime.now(), expires_at, "active"))
+    return cur.lastrowid
+
+
+# Issues dockets in bulk (pre-issuance): rows are (student, exam_type, qr_data, expires_at).
+# Returns {qr_data: docket_id}; qr_code is unique, which is how the new ids are read back.
+def insert_dockets(cur, rows) -> dict:
+    if not rows:
+        return {}
+    now = datetime.now()
+    cur.executemany('''
+        INSERT INTO dockets (student_id, programme_id, exam_type, year_of_study, semester, qr_code, issued_at, expires_at, status, printed_count, created_at, updated_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW())
+    ''', [
+        (student['id'], student['programme_id'], exam_type, student['current_year'], student['current_semester'],
+         qr_data, now, expires_at, "issued", 1)
+        for student, exam_type, qr_data, expires_at in rows
+    ])
+    qr_codes = [qr_data for _, _, qr_data, _ in rows]
+    cur.execute(
+        f"SELECT docket_id, qr_code FROM dockets WHERE qr_code IN ({', '.join(['%s'] * len(qr_codes))})",
+        qr_codes,
+    )
+    return {row['qr_code']: row['docket_id'] for row in cur.fetchall()}
+
+
+# Stores many active tokens at once: rows are (docket_id, token_hash, expires_at).
+def insert_tokens(cur, rows) -> None:
+    if not rows:
+        return
+    now = datetime.now()
+    cur.executemany('''
+        INSERT INTO docket_tokens (docket_id, token_hash, issued_at, expires_at, status)
+        VALUES (%s, %s, %s, %s, %s)
+    ''', [(docket_id, token_hash, now, expires_at, "active") for docket_id, token_hash, expires_at in rows])
+
+
+# Returns which of the given dockets still have a token that can be scanned (active and not
+# past expires_at), as a set of docket ids.
+def dockets_with_usable_tokens(cur, docket_ids) -> set:
+    usable = set()
+    for start in range(0, len(docket_ids), 1000):
+        chunk = docket_ids[start:start + 1000]
+        cur.execute(f"""
+            SELECT DISTINCT docket_id FROM docket_tokens
+            WHERE docket_id IN ({', '.join(['%s'] * len(chunk))})
+            AND status = 'active' AND (expires_at IS NULL OR expires_at > NOW())
+        """, tuple(chunk))
+        usable.update(row['docket_id'] for row in cur.fetchall())
+    return usable
+
+
+# Returns the student's latest docket for exam_type whose token can still be scanned, or None.
+def find_usable_docket(cur, student_id, exam_type) -> Optional[dict]:
+    cur.execute("""
+        SELECT d.docket_id, d.exam_type, d.issued_at, d.expires_at
+        FROM dockets d
+        WHERE d.student_id = %s AND d.exam_type = %s
+        AND EXISTS (
+            SELECT 1 FROM docket_tokens t
+            WHERE t.docket_id = d.docket_id AND t.status = 'active'
+            AND (t.expires_at IS NULL OR t.expires_at > NOW())
+        )
+        ORDER BY d.docket_id DESC
+        LIMIT 1
+    """, (student_id, exam_type))
+    return cur.fetchone()
+
+
+# Statements shared with the async versions in repositories/aio.py.
+# A token is usable at a given time when it is active, or was expired by the sweep after that
+# time (an offline scan made before the exam switched), and its expires_at is later than it.
+FIND_ACTIVE_TOKEN_SQL = """
+    SELECT dt.token_id, dt.docket_id, d.student_id
+    FROM docket_tokens dt
+    JOIN dockets d ON dt.docket_id = d.docket_id
+    JOIN students s ON d.student_id = s.id
+    WHERE dt.token_hash = %s
+    AND s.student_number = %s
+    AND d.exam_type = %s
+    AND dt.status IN ('active', 'expired')
+    AND (dt.expires_at IS NULL OR dt.expires_at > %s)
+    LIMIT 1 FOR UPDATE
+"""
+MARK_TOKEN_USED_SQL = "UPDATE docket_tokens SET status = 'used', used_at = NOW() WHERE token_id = %s"
+ACTIVE_TOKEN_HASHES_SQL = """
+    SELECT token_hash FROM docket_tokens
+    WHERE status = 'active' AND (expires_at IS NULL OR expires_at > NOW())
+"""
+
+
+# Finds the token matching a scanned QR code that was usable at `at` (default now) and locks
+# it; None when it is unknown, used or expired.
+def find_active_token(cur, token_hash, student_number, exam_type, at=None) -> Optional[dict]:
+    cur.execute(FIND_ACTIVE_TOKEN_SQL, (token_hash, student_number, exam_type, at or datetime.now()))
+    return cur.fetchone()
+
+
+def mark_token_used(cur, token_id) -> None:
+    cur.execute(MARK_TOKEN_USED_SQL, (token_id,))
+
+
+# Returns the hashes of every active token, for the scanners' offline cache.
+def list_active_token_hashes(cur) -> list:
+    cur.execute(ACTIVE_TOKEN_HASHES_SQL)
+    return [row['token_hash'] for row in cur.fetchall()]
+
+
+# Returns the ids of the next `limit` active tokens after after_id that are past their
+# expires_at or belong to an exam other than active_exam.
+def next_expirable_tokens(cur, active_exam, after_id, limit) -> list:
+    cur.execute("""
+        SELECT dt.token_id
+        FROM docket_tokens dt
+        JOIN dockets d ON dt.docket_id = d.docket_id
+        WHERE dt.status = 'active' AND dt.token_id > %s
+        AND (d.exam_type <> %s OR dt.expires_at <= NOW())
+        ORDER BY dt.token_id
+        LIMIT %s
+    """, (after_id, active_exam, limit))
+    return [row['token_id'] for row in cur.fetchall()]
+
+
+# Marks tokens expired, recording when in expires_at (kept if it is already in the past).
+def expire_tokens(cur, token_ids) -> int:
+    if not token_ids:
+        return 0
+    marks = ", ".join(["%s"] * len(token_ids))
+    cur.execute(f"""
+        UPDATE docket_tokens
+        SET status = 'expired',
+            expires_at = CASE WHEN expires_at IS NULL OR expires_at > NOW() THEN NOW() ELSE expires_at END
+        WHERE token_id IN ({marks}) AND status = 'active'
+    """, list(token_ids))
+    return cur.rowcount
@@ -0,0 +1,173 @@
+from typing import Optional
+from utils.db import db_dialect
+
+# Payment and balance queries.
+# Functions take an open cursor and run inside the caller's transaction.
+
+# Columns a client may ask for through the "fields" argument of /dockets/payments.
+BALANCE_COLUMNS = {
+    "id": "s.id",
+    "first_name": "s.first_name",
+    "last_name": "s.last_name",
+    "student_number": "s.student_number",
+    "programme_id": "s.programme_id",
+    "programme_name": "p.programme_name",
+    "total_fee": "sb.total_fee",
+    "amount_paid": "sb.amount_paid",
+    "balance": "sb.balance",
+    "ca1_status": "c.ca1_status",
+    "ca2_status": "c.ca2_status",
+    "exam_status": "c.exam_status",
+}
+
+# Balances and clearances are joined on the current term only. The schema dumps hold several
+# balance and clearance rows for some student-terms (neither table has a unique key on the term),
+# so only the lowest-id row of each is joined and every student appears exactly once. The
+# subqueries are lookups on the idx_*_term indexes.
+_BALANCES_FROM = """
+    FROM students s
+    JOIN programmes p ON s.programme_id = p.programme_id
+    LEFT JOIN student_balances sb ON sb.balance_id = (
+        SELECT MIN(b.balance_id) FROM student_balances b
+        WHERE b.student_id = s.id
+            AND b.programme_id = s.programme_id
+            AND b.year_of_study = s.current_year
+            AND b.semester = s.current_semester
+    )
+    LEFT JOIN clearances c ON c.clearance_id = (
+        SELECT MIN(cl.clearance_id) FROM clearances cl
+        WHERE cl.student_id = s.id
+            AND cl.programme_id = s.programme_id
+            AND cl.year_of_study = s.current_year
+            AND cl.semester = s.current_semester
+    )
+"""
+
+
+# Records one completed payment and returns its id.
+def insert_payment(cur, student_id, programme_id, amount, receipt_number=None, payment_type="General") -> int:
+    cur.execute("""
+        INSERT INTO payments (student_id, programme_id, amount, payment_type, payment_date, payment_status, receipt_number)
+        VALUES (%s, %s, %s, %s, NOW(), 'completed', %s)
+    """, (student_id, programme_id, amount, payment_type, receipt_number))
+    return cur.lastrowid
+
+
+# Records many completed payments; rows are (student_id, programme_id, amount, receipt_number).
+def insert_payments(cur, rows) -> None:
+    cur.executemany("""
+        INSERT INTO payments (student_id, programme_id, amount, payment_type, payment_date, payment_status, receipt_number)
+        VALUES (%s, %s, %s, 'General', NOW(), 'completed', %s)
+    """, rows)
+
+
+# Adds an amount to a student's balance for the given term; returns the number of rows updated.
+def add_to_balance(cur, student_id, programme_id, year_of_study, semester, amount) -> int:
+    cur.execute("""
+        UPDATE student_balances SET amount_paid = amount_paid + %s, last_updated = NOW()
+        WHERE student_id = %s AND programme_id = %s AND year_of_study = %s AND semester = %s
+    """, (amount, student_id, programme_id, year_of_study, semester))
+    return cur.rowcount
+
+
+# Opens balances with nothing paid; rows are (student_id, programme_id, year_of_study, semester, total_fee).
+def insert_balances(cur, rows) -> None:
+    if rows:
+        cur.executemany("""
+            INSERT INTO student_balances (student_id, programme_id, year_of_study, semester, total_fee, amount_paid)
+            VALUES (%s, %s, %s, %s, %s, 0)
+        """, rows)
+
+
+# Returns the subset of receipt numbers that are already recorded in payments.
+def existing_receipts(cur, receipt_numbers) -> set:
+    if not receipt_numbers:
+        return set()
+    cur.execute(
+        f"SELECT receipt_number FROM payments WHERE receipt_number IN ({', '.join(['%s'] * len(receipt_numbers))})",
+        tuple(receipt_numbers),
+    )
+    return {row["receipt_number"] for row in cur.fetchall()}
+
+
+# Adds each student's total ({student_id: amount}) to their current-term balance in a single UPDATE.
+# The totals are passed as a derived table so the statement works on MariaDB, TiDB and SQLite.
+def apply_balance_totals(cur, totals: dict) -> None:
+    if not totals:
+        return
+    derived = " UNION ALL ".join(["SELECT %s AS student_id, %s AS amount"] * len(totals))
+    params = []
+    for student_id, amount in totals.items():
+        params.extend([student_id, amount])
+
+    if db_dialect() == "sqlite":
+        sql = f"""
+            UPDATE student_balances AS sb
+            SET amount_paid = sb.amount_paid + d.amount, last_updated = NOW()
+            FROM ({derived}) d, students s
+            WHERE d.student_id = sb.student_id
+                AND s.id = sb.student_id
+                AND sb.programme_id = s.programme_id
+                AND sb.year_of_study = s.current_year
+                AND sb.semester = s.current_semester
+        """
+    else:
+        sql = f"""
+            UPDATE student_balances sb
+            JOIN ({derived}) d ON d.student_id = sb.student_id
+            JOIN students s ON s.id = sb.student_id
+                AND sb.programme_id = s.programme_id
+                AND sb.year_of_study = s.current_year
+                AND sb.semester = s.current_semester
+            SET sb.amount_paid = sb.amount_paid + d.amount, sb.last_updated = NOW()
+        """
+    cur.execute(sql, tuple(params))
+
+
+# Helper function turning listing filters into WHERE conditions. Supported keys: programme_id,
+# min_balance, max_balance, and clearance as an (exam_type, "eligible"|"blocked") pair.
+def _balance_filters(filters):
+    conditions, params = [], []
+    if filters.get("programme_id") is not None:
+        conditions.append("s.programme_id = %s")
+        params.append(filters["programme_id"])
+    if filters.get("min_balance") is not None:
+        conditions.append("sb.balance >= %s")
+        params.append(filters["min_balance"])
+    if filters.get("max_balance") is not None:
+        conditions.append("sb.balance <= %s")
+        params.append(filters["max_balance"])
+    if filters.get("clearance"):
+        exam_type, status = filters["clearance"]
+        if exam_type not in ("ca1", "ca2", "exam"):
+            raise ValueError("Invalid exam_type")
+        conditions.append(f"c.{exam_type}_status = %s")
+        params.append(status)
+    return conditions, params
+
+
+# Returns one page of students with their current-term balance, ordered by (last_name, first_name, id).
+# `after` is the sort key of the last row of the previous page; one extra row is returned when there
+# are more pages. The sort key columns are always included in the rows.
+def list_balances(cur, fields, filters: dict, after: Optional[list], limit: int) -> list:
+    select_fields = list(dict.fromkeys(list(fields) + ["last_name", "first_name", "id"]))
+    select_sql = ", ".join(f"{BALANCE_COLUMNS[f]} AS {f}" for f in select_fields)
+    conditions, params = _balance_filters(filters)
+    if after:
+        # Expanded form of (last_name, first_name, id) > cursor so the name index can be used.
+        conditions.append("(s.last_name > %s OR (s.last_name = %s AND (s.first_name > %s OR (s.first_name = %s AND s.id > %s))))")
+        params.extend([after[0], after[0], after[1], after[1], after[2]])
+    where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    cur.execute(
+        f"SELECT {select_sql} {_BALANCES_FROM} {where_sql} ORDER BY s.last_name, s.first_name, s.id LIMIT %s",
+        (*params, limit + 1),
+    )
+    return cur.fetchall()
+
+
+# Counts the students matching the same filters as list_balances.
+def count_balances(cur, filters: dict) -> int:
+    conditions, params = _balance_filters(filters)
+    where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    cur.execute(f"SELECT COUNT(*) AS total {_BALANCES_FROM} {where_sql}", tuple(params))
+    return cur.fetchone()["total"]
@@ -0,0 +1,18 @@
+# Programme and curriculum queries.
+# Functions take an open cursor and run inside the caller's transaction; dictionary cursors are assumed.
+
+
+# Returns every programme with its code and total fee.
+def list_programmes(cur) -> list:
+    cur.execute("SELECT programme_id, programme_name, programme_code, total_fee FROM programmes")
+    return cur.fetchall()
+
+
+# Returns every curriculum entry with the code of its course.
+def list_curriculum(cur) -> list:
+    cur.execute("""
+        SELECT cu.curriculum_id, cu.programme_id, cu.year_of_study, cu.semester, c.course_code
+        FROM curriculum cu
+        JOIN courses c ON cu.course_id = c.course_id
+    """)
+    return cur.fetchall()
@@ -0,0 +1,141 @@
+# Retention queries: moving finished docket records out of the live tables.
+# Functions take an open dictionary cursor and run inside the caller's transaction.
+# A row is archivable when it is older than its table's cutoff and belongs to a past term (the
+# docket's year_of_study/semester is not the student's current one):
+#   verifications  scanned before the cutoff;
+#   docket_tokens  used, expired or reprinted before the cutoff (used_at, else issued_at);
+#   dockets        issued before the cutoff, with no tokens or verifications left in the live tables.
+# Dockets therefore go last, once their tokens and verifications have been moved (ARCHIVE_ORDER).
+# Archived rows keep their ids in the <table>_archive tables (migrations/004_archive_tables.sql).
+
+TABLES = {
+    "verifications": {
+        "key": "verification_id",
+        "columns": ("verification_id", "docket_id", "scanned_by", "scanned_at", "scan_result", "device_id", "remarks"),
+    },
+    "docket_tokens": {
+        "key": "token_id",
+        "columns": ("token_id", "docket_id", "token_hash", "issued_at", "expires_at", "status", "used_at"),
+    },
+    "dockets": {
+        "key": "docket_id",
+        "columns": ("docket_id", "student_id", "programme_id", "exam_type", "course_id", "year_of_study", "semester",
+                    "qr_code", "issued_at", "expires_at", "status", "printed_count", "created_at", "updated_at"),
+    },
+}
+ARCHIVE_ORDER = ("verifications", "docket_tokens", "dockets")
+FINISHED_TOKEN_STATUSES = ("used", "expired", "reprinted")
+
+# True when the docket `ref`.docket_id points to is for its student's current term.
+_CURRENT_TERM = """
+    EXISTS (SELECT 1 FROM dockets cd JOIN students s ON s.id = cd.student_id
+            WHERE cd.docket_id = {ref}.docket_id
+            AND cd.year_of_study = s.current_year AND cd.semester = s.current_semester)
+"""
+
+
+def _verification_condition(alias, cutoffs):
+    sql = f"{alias}.scanned_at < %s AND NOT {_CURRENT_TERM.format(ref=alias)}"
+    return sql, [cutoffs["verifications"]]
+
+
+def _token_condition(alias, cutoffs):
+    marks = ", ".join(["%s"] * len(FINISHED_TOKEN_STATUSES))
+    sql = (f"COALESCE({alias}.status, 'active') IN ({marks}) "
+           f"AND COALESCE({alias}.used_at, {alias}.issued_at) < %s "
+           f"AND NOT {_CURRENT_TERM.format(ref=alias)}")
+    return sql, [*FINISHED_TOKEN_STATUSES, cutoffs["docket_tokens"]]
+
+
+# With pending=True, tokens and verifications that are archivable themselves don't hold a docket
+# back: this is how many dockets a full run would move, for dry runs that don't move the others.
+def _docket_condition(alias, cutoffs, pending=False):
+    sql = f"{alias}.issued_at < %s AND NOT {_CURRENT_TERM.format(ref=alias)}"
+    params = [cutoffs["dockets"]]
+    for table, child, condition in (("docket_tokens", "t", _token_condition),
+                                    ("verifications", "v", _verification_condition)):
+        keep, keep_params = "", []
+        if pending:
+            child_sql, keep_params = condition(child, cutoffs)
+            keep = f" AND NOT ({child_sql})"
+        sql += f" AND NOT EXISTS (SELECT 1 FROM {table} {child} WHERE {child}.docket_id = {alias}.docket_id{keep})"
+        params += keep_params
+    return sql, params
+
+
+def _condition(table, cutoffs, pending=False):
+    if table == "verifications":
+        return _verification_condition("r", cutoffs)
+    if table == "docket_tokens":
+        return _token_condition("r", cutoffs)
+    return _docket_condition("r", cutoffs, pending)
+
+
+# Counts the archivable rows of a table. cutoffs maps each table name to its datetime cutoff.
+def count_archivable(cur, table, cutoffs, pending=False) -> int:
+    condition, params = _condition(table, cutoffs, pending)
+    cur.execute(f"SELECT COUNT(*) AS total FROM {table} r WHERE {condition}", params)
+    return cur.fetchone()["total"]
+
+
+# Returns the ids of the next `limit` archivable rows after after_id, walking the primary key so
+# each batch reads a short index range instead of rescanning the table.
+def next_archivable_ids(cur, table, cutoffs, after_id, limit) -> list:
+    key = TABLES[table]["key"]
+    condition, params = _condition(table, cutoffs)
+    cur.execute(f"""
+        SELECT r.{key} AS id FROM {table} r
+        WHERE r.{key} > %s AND {condition}
+        ORDER BY r.{key}
+        LIMIT %s
+    """, [after_id, *params, limit])
+    return [row["id"] for row in cur.fetchall()]
+
+
+# Re-checks a batch inside the write transaction and locks the rows still archivable, so rows
+# changed since next_archivable_ids are left in place. Returns their ids.
+def lock_archivable(cur, table, cutoffs, ids) -> list:
+    if not ids:
+        return []
+    key = TABLES[table]["key"]
+    condition, params = _condition(table, cutoffs)
+    marks = ", ".join(["%s"] * len(ids))
+    cur.execute(f"""
+        SELECT r.{key} AS id FROM {table} r
+        WHERE r.{key} IN ({marks}) AND {condition}
+        FOR UPDATE
+    """, [*ids, *params])
+    return [row["id"] for row in cur.fetchall()]
+
+
+# Returns the full rows for ids, for export files.
+def fetch_rows(cur, table, ids) -> list:
+    if not ids:
+        return []
+    spec = TABLES[table]
+    marks = ", ".join(["%s"] * len(ids))
+    cur.execute(f"SELECT {', '.join(spec['columns'])} FROM {table} WHERE {spec['key']} IN ({marks})", list(ids))
+    return cur.fetchall()
+
+
+# Copies rows into <table>_archive, stamped with archived_at.
+def copy_to_archive(cur, table, ids) -> int:
+    if not ids:
+        return 0
+    spec = TABLES[table]
+    columns = ", ".join(spec["columns"])
+    marks = ", ".join(["%s"] * len(ids))
+    cur.execute(f"""
+        INSERT INTO {table}_archive ({columns}, archived_at)
+        SELECT {columns}, NOW() FROM {table} WHERE {spec['key']} IN ({marks})
+    """, list(ids))
+    return cur.rowcount
+
+
+def delete_rows(cur, table, ids) -> int:
+    if not ids:
+        return 0
+    marks = ", ".join(["%s"] * len(ids))
+    cur.execute(f"DELETE FROM {table} WHERE {TABLES[table]['key']} IN ({marks})", list(ids))
+    return cur.rowcount
+
@@ -0,0 +1,226 @@
+from typing import Optional
+
+# Student queries.
+# Functions take an open cursor, so they run inside the caller's transaction; dictionary cursors
+# are assumed unless noted. The SQL here is portable between MySQL/TiDB and SQLite.
+
+# Student columns read by the in-process search index (utils/student_search.py).
+_INDEX_COLUMNS = "id, student_number, first_name, last_name"
+
+# Statements shared with the async versions in repositories/aio.py.
+VERIFICATION_DETAILS_SQL = """
+    SELECT s.first_name, s.last_name, s.student_number, p.programme_name
+    FROM students s
+    JOIN programmes p ON s.programme_id = p.programme_id
+    WHERE s.id = %s
+"""
+SYNC_LIST_SQL = """
+    SELECT s.id, s.first_name, s.last_name, s.student_number, p.programme_name
+    FROM students s
+    JOIN programmes p ON s.programme_id = p.programme_id
+    ORDER BY s.student_number
+"""
+
+
+# Returns a student's number, or None when the id is unknown.
+def get_student_number(cur, student_id) -> Optional[str]:
+    cur.execute("SELECT student_number FROM students WHERE id=%s LIMIT 1", (student_id,))
+    row = cur.fetchone()
+    return row["student_number"] if row else None
+
+
+# Returns the student fields printed on a docket, with the programme name.
+def get_docket_details(cur, student_id) -> Optional[dict]:
+    cur.execute('''
+        SELECT s.id, s.first_name, s.last_name, s.student_number, s.programme_id, p.programme_name, s.current_year, s.current_semester
+        FROM students s
+        JOIN programmes p ON s.programme_id = p.programme_id
+        WHERE s.id = %s
+    ''', (student_id,))
+    return cur.fetchone()
+
+
+# Returns the student's enrolled courses (course_code, course_name) ordered by name.
+def get_enrolled_courses(cur, student_id) -> list:
+    cur.execute('''
+        SELECT c.course_code, c.course_name
+        FROM enrollments e
+        JOIN curriculum cu ON e.curriculum_id = cu.curriculum_id
+        JOIN courses c ON cu.course_id = c.course_id
+        WHERE e.student_id = %s
+        ORDER BY c.course_name ASC
+    ''', (student_id,))
+    return cur.fetchall()
+
+
+# Returns the enrolled courses of many students with one query, as {student_id: [course, ...]}.
+def get_enrolled_courses_by_student(cur, student_ids) -> dict:
+    courses = {student_id: [] for student_id in student_ids}
+    if not student_ids:
+        return courses
+    cur.execute(f"""
+        SELECT e.student_id, c.course_code, c.course_name
+        FROM enrollments e
+        JOIN curriculum cu ON e.curriculum_id = cu.curriculum_id
+        JOIN courses c ON cu.course_id = c.course_id
+        WHERE e.student_id IN ({', '.join(['%s'] * len(student_ids))})
+        ORDER BY c.course_name ASC
+    """, tuple(student_ids))
+    for row in cur.fetchall():
+        courses[row["student_id"]].append({"course_code": row["course_code"], "course_name": row["course_name"]})
+    return courses
+
+
+# Returns everything the student dashboard shows about a student in one query: profile,
+# programme, and the current-term balance and clearance (None columns when there is no row). Only
+# the lowest-id balance and clearance row of the term is joined, as in payments._BALANCES_FROM.
+def get_dashboard_row(cur, student_id) -> Optional[dict]:
+    cur.execute('''
+        SELECT s.id, s.student_number, s.first_name, s.last_name, s.email, s.current_year, s.current_semester,
+               s.programme_id, p.programme_name, sb.total_fee, sb.amount_paid, sb.balance,
+               c.ca1_status, c.ca2_status, c.exam_status
+        FROM students s
+        JOIN programmes p ON s.programme_id = p.programme_id
+        LEFT JOIN student_balances sb ON sb.balance_id = (
+            SELECT MIN(b.balance_id) FROM student_balances b
+            WHERE b.student_id = s.id
+                AND b.programme_id = s.programme_id
+                AND b.year_of_study = s.current_year
+                AND b.semester = s.current_semester
+        )
+        LEFT JOIN clearances c ON c.clearance_id = (
+            SELECT MIN(cl.clearance_id) FROM clearances cl
+            WHERE cl.student_id = s.id
+                AND cl.programme_id = s.programme_id
+                AND cl.year_of_study = s.current_year
+                AND cl.semester = s.current_semester
+        )
+        WHERE s.id = %s
+        LIMIT 1
+    ''', (student_id,))
+    return cur.fetchone()
+
+
+# Returns the id and current term of a student, looked up by student number.
+def get_current_term(cur, student_number) -> Optional[dict]:
+    cur.execute(
+        "SELECT id, programme_id, current_year, current_semester FROM students WHERE student_number = %s",
+        (student_number,),
+    )
+    return cur.fetchone()
+
+
+# Resolves many student numbers with one query, keyed by student number.
+# The LEFT JOIN picks up the current-term balance row (balance_id is None when there is none).
+def get_current_terms_with_balance(cur, student_numbers) -> dict:
+    if not student_numbers:
+        return {}
+    cur.execute(f"""
+        SELECT s.id, s.student_number, s.programme_id, s.current_year, s.current_semester, sb.balance_id
+        FROM students s
+        LEFT JOIN student_balances sb ON sb.student_id = s.id
+            AND sb.programme_id = s.programme_id
+            AND sb.year_of_study = s.current_year
+            AND sb.semester = s.current_semester
+        WHERE s.student_number IN ({', '.join(['%s'] * len(student_numbers))})
+    """, tuple(student_numbers))
+    return {row["student_number"]: row for row in cur.fetchall()}
+
+
+# Returns the subset of the given emails that already belong to a student.
+def existing_emails(cur, emails) -> set:
+    if not emails:
+        return set()
+    cur.execute(
+        f"SELECT email FROM students WHERE email IN ({', '.join(['%s'] * len(emails))})",
+        tuple(emails),
+    )
+    return {row["email"] for row in cur.fetchall()}
+
+
+# Creates many students (the onboarding import). rows are (student_number, first_name, last_name,
+# email, programme_id, current_year, current_semester, password_hash, created_by). Returns
+# {student_number: id}, read back by the unique student_number.
+def insert_students(cur, rows) -> dict:
+    if not rows:
+        return {}
+    cur.executemany("""
+        INSERT INTO students (student_number, first_name, last_name, email, programme_id, current_year,
+                              current_semester, password, status, created_by, password_hash)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, '', 'active', %s, %s)
+    """, [(number, first, last, email, programme_id, year, semester, created_by, password_hash)
+          for number, first, last, email, programme_id, year, semester, password_hash, created_by in rows])
+    numbers = [row[0] for row in rows]
+    cur.execute(
+        f"SELECT id, student_number FROM students WHERE student_number IN ({', '.join(['%s'] * len(numbers))})",
+        tuple(numbers),
+    )
+    return {row["student_number"]: row["id"] for row in cur.fetchall()}
+
+
+# Returns which of the given students are enrolled in at least one course of their current term.
+def enrolled_in_current_term(cur, student_ids) -> set:
+    if not student_ids:
+        return set()
+    cur.execute(f"""
+        SELECT DISTINCT e.student_id
+        FROM enrollments e
+        JOIN students s ON s.id = e.student_id
+            AND e.year_of_study = s.current_year
+            AND e.semester = s.current_semester
+        WHERE e.student_id IN ({', '.join(['%s'] * len(student_ids))})
+    """, tuple(student_ids))
+    return {row["student_id"] for row in cur.fetchall()}
+
+
+# Enrolls students in curriculum entries; rows are (student_id, curriculum_id, year_of_study, semester).
+def insert_enrollments(cur, rows) -> None:
+    if rows:
+        cur.executemany("""
+            INSERT INTO enrollments (student_id, curriculum_id, year_of_study, semester, enrollment_status)
+            VALUES (%s, %s, %s, %s, 'active')
+        """, rows)
+
+
+# Returns the student shown on the verification screen after a successful scan.
+def get_verification_details(cur, student_id) -> Optional[dict]:
+    cur.execute(VERIFICATION_DETAILS_SQL, (student_id,))
+    return cur.fetchone()
+
+
+# Returns search results for a page of ids, with their current-term balance, in the given order.
+def get_search_page(cur, student_ids) -> list:
+    if not student_ids:
+        return []
+    cur.execute(f"""
+        SELECT s.id, s.first_name, s.last_name, s.student_number, p.programme_name,
+                sb.total_fee, sb.amount_paid, sb.balance
+        FROM students s
+        JOIN programmes p ON s.programme_id = p.programme_id
+        LEFT JOIN student_balances sb ON s.id = sb.student_id
+            AND s.current_year = sb.year_of_study
+            AND s.current_semester = sb.semester
+        WHERE s.id IN ({', '.join(['%s'] * len(student_ids))})
+    """, tuple(student_ids))
+    by_id = {row["id"]: row for row in cur.fetchall()}
+    return [by_id[i] for i in student_ids if i in by_id]
+
+
+# Returns the rows for the search index, each with a "mark" column for the change watermark:
+# updated_at (rows changed at or after `since`) or, with by_updated_at=False, the id (rows added after it).
+def get_index_rows(cur, since=None, by_updated_at=True) -> list:
+    mark = "updated_at" if by_updated_at else "id"
+    if since is None:
+        cur.execute(f"SELECT {_INDEX_COLUMNS}, {mark} AS mark FROM students")
+    elif by_updated_at:
+        # >= so rows changed within the same second as the watermark are not missed
+        cur.execute(f"SELECT {_INDEX_COLUMNS}, updated_at AS mark FROM students WHERE updated_at >= %s", (since,))
+    else:
+        cur.execute(f"SELECT {_INDEX_COLUMNS}, id AS mark FROM students WHERE id > %s", (since,))
+    return cur.fetchall()
+
+
+# Returns every student with their programme name, for the scanners' offline cache.
+def list_for_sync(cur) -> list:
+    cur.execute(SYNC_LIST_SQL)
+    return cur.fetchall()
@@ -0,0 +1,45 @@
+# Verification log queries.
+# Functions take an open cursor and run inside the caller's transaction.
+
+SCAN_RESULTS = ("valid", "invalid", "expired", "reprinted", "forged")
+
+# Shared with the async version in repositories/aio.py.
+RECORD_VERIFICATION_SQL = """
+    INSERT INTO verifications (docket_id, scanned_by, scan_result, device_id, remarks)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+
+# Logs one scan of a docket and returns the verification id.
+def record_verification(cur, docket_id, scanned_by, scan_result, remarks=None, device_id=None) -> int:
+    cur.execute(RECORD_VERIFICATION_SQL, (docket_id, scanned_by, scan_result, device_id, remarks))
+    return cur.lastrowid
+
+
+# Returns the valid scans logged since `since`, with the exam of the scanned docket, for the live
+# stats reconciliation (utils/verification_stats.py).
+def list_valid_since(cur, since) -> list:
+    cur.execute("""
+        SELECT v.scanned_at, v.scanned_by, v.device_id, d.exam_type
+        FROM verifications v
+        JOIN dockets d ON d.docket_id = v.docket_id
+        WHERE v.scan_result = 'valid' AND v.scanned_at >= %s
+    """, (since,))
+    return cur.fetchall()
+
+
+# Returns {exam_type: students admitted}: the students with a valid scan of a docket issued for
+# their current term.
+def count_admitted(cur) -> dict:
+    cur.execute("""
+        SELECT d.exam_type, COUNT(DISTINCT d.student_id) AS admitted
+        FROM verifications v
+        JOIN dockets d ON d.docket_id = v.docket_id
+        JOIN students s ON s.id = d.student_id
+            AND s.programme_id = d.programme_id
+            AND s.current_year = d.year_of_study
+            AND s.current_semester = d.semester
+        WHERE v.scan_result = 'valid'
+        GROUP BY d.exam_type
+    """)
+    return {row["exam_type"]: row["admitted"] for row in cur.fetchall()}
@@ -1,7 +1,19 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, send_file, Response
+import io
 import json
 import os
+from decimal import Decimal, InvalidOperation
+import mysql.connector
 from utils.auth import jwt_required # Import JWT authentication decorator
+from utils.db import get_db_connection
+from repositories.clearances import EXAM_TYPES, fetch_fee_schedule, update_fee_schedule, recompute_clearances
+from utils import eligibility_cache
+from utils.audit import audit
+from utils.profiling import list_profiles, profile_path, profile_summary
+from utils.token_expiry import parse_exam_calendar, token_sweeper
+from utils.docket_preissue import preissuer
+from utils.events import publish
+from utils.student_import import read_student_csv, read_enrollment_csv, read_fee_csv, upload_path, get_job, student_importer
 
 # Blueprint for admin-specific control routes
 admin_controls_bp = Blueprint("admin_controls", __name__)
@@ -11,6 +23,7 @@ backend_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(os.path.dirname(backend_dir))
 SETTINGS_FILE = os.path.join(project_root, 'Docket-system-backend', 'exam_settings.json')
 BLOCKLIST_FILE = os.path.join(project_root, 'Docket-system-backend', 'blocked_students.json')
+EXAM_SETTINGS_TYPES = ("ca1", "ca2", "exam")
 
 # Helper function to read JSON data from a specified file
 def read_json_file(file_path):
@@ -37,19 +50,41 @@ def get_exam_settings():
     settings = read_json_file(SETTINGS_FILE)
     return jsonify({"ok": True, "settings": settings})
 
-# Route to update active exam settings. Requires admin role.
+# Route to update exam settings: the active exam and/or the exam calendar that sets docket
+# expiry (see utils/token_expiry.py). Switching exams expires the other exams' tokens in the
+# background and, with "preissue": true, pre-issues the new exam's dockets (see
+# utils/docket_preissue.py). Requires admin role.
 @admin_controls_bp.route("/settings", methods=["POST"])
 @jwt_required(role="admin")
 def update_exam_settings():
-    data = request.json
-    active_exam = data.get("active_exam")
+    data = request.json or {}
+    if "active_exam" not in data and "exam_calendar" not in data:
+        return jsonify({"ok": False, "error": "No settings specified."}), 400
 
-    if active_exam not in ["ca1", "ca2", "exam"]:
+    settings = read_json_file(SETTINGS_FILE)
+    active_exam = data.get("active_exam", settings.get("active_exam"))
+    if active_exam not in EXAM_SETTINGS_TYPES:
         return jsonify({"ok": False, "error": "Invalid exam type specified."}), 400
+    if "exam_calendar" in data:
+        try:
+            settings["exam_calendar"] = parse_exam_calendar(data["exam_calendar"], EXAM_SETTINGS_TYPES)
+        except ValueError as e:
+            return jsonify({"ok": False, "error": str(e)}), 400
 
-    settings = {"active_exam": active_exam}
+    settings["active_exam"] = active_exam
+    if "active_exam" in data:
+        # "preissue": true also issues and renders every cleared student's docket in the background.
+        settings["preissue"] = bool(data.get("preissue"))
     write_json_file(SETTINGS_FILE, settings)
-    return jsonify({"ok": True, "message": f"Active exam set to {active_exam}."})
+    eligibility_cache.invalidate_all()
+    publish("settings", **settings)
+    if "active_exam" not in data:
+        return jsonify({"ok": True, "message": "Exam calendar updated.", "settings": settings})
+
+    token_sweeper.start(active_exam, request.user["sub"])
+    if settings["preissue"]:
+        preissuer.start(active_exam, None, read_json_file(BLOCKLIST_FILE), settings, request.user["sub"])
+    return jsonify({"ok": True, "message": f"Active exam set to {active_exam}.", "settings": settings})
 
 # --- Routes for Student Blocklist ---
 # Route to retrieve the list of blocked student numbers. Requires admin role.
@@ -67,6 +102,9 @@ def block_student(student_number):
     if student_number not in blocklist:
         blocklist.append(student_number)
         write_json_file(BLOCKLIST_FILE, blocklist)
+        eligibility_cache.invalidate(student_numbers=[student_number])
+        publish("blocklist", student_number=student_number, blocked=True)
+        audit("admin", request.user["sub"], "block_student", f"Blocked student {student_number}")
     return jsonify({"ok": True, "message": f"Student {student_number} has been blocked."})
 
 # Route to unblock a student by their student number. Requires admin role.
@@ -77,4 +115,141 @@ def unblock_student(student_number):
     if student_number in blocklist:
         blocklist.remove(student_number)
         write_json_file(BLOCKLIST_FILE, blocklist)
+        eligibility_cache.invalidate(student_numbers=[student_number])
+        publish("blocklist", student_number=student_number, blocked=False)
+        audit("admin", request.user["sub"], "unblock_student", f"Unblocked student {student_number}")
     return jsonify({"ok": True, "message": f"Student {student_number} has been unblocked."})
+
+# Route to onboard students from CSV uploads (see utils/student_import.py): "students" (required),
+# "enrollments" and "fees" (optional). The files are checked and saved, and the import runs in the
+# background, since hashing the passwords takes minutes for an intake; the response is a 202 with
+# the job id to poll. Existing students are skipped, so a file can be sent again. Requires admin role.
+@admin_controls_bp.route("/students/import", methods=["POST"])
+@jwt_required(role="admin")
+def import_students_csv():
+    upload = request.files.get("students")
+    if not upload:
+        return jsonify({"ok": False, "error": "Missing students CSV file"}), 400
+
+    invalid = []
+    path = upload_path()
+    upload.save(path)
+    try:
+        extras = {}
+        for field, read in (("enrollments", read_enrollment_csv), ("fees", read_fee_csv)):
+            extra = request.files.get(field)
+            extras[field] = read(io.TextIOWrapper(extra.stream, encoding="utf-8-sig", newline=""), invalid) if extra else {}
+        # Only the header is read here; the rows are read by the import itself.
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            read_student_csv(f, [])
+    except (UnicodeDecodeError, ValueError) as e:
+        os.remove(path)
+        return jsonify({"ok": False, "error": f"Invalid CSV: {e}"}), 400
+
+    job_id = student_importer.start(path, extras["enrollments"], extras["fees"], invalid, request.user["sub"])
+    if job_id is None:
+        os.remove(path)
+        return jsonify({"ok": False, "error": "A student import is already running; try again when it has finished."}), 409
+    return jsonify({"ok": True, "job_id": job_id, "status_url": f"/admin/students/import/{job_id}"}), 202
+
+# Route returning the progress of a student import, and its summary once it has finished
+# ("status": "running", "finished", "partial" when some chunks failed, or "failed"). Requires admin role.
+@admin_controls_bp.route("/students/import/<job_id>", methods=["GET"])
+@jwt_required(role="admin")
+def get_student_import(job_id):
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"ok": False, "error": "Import job not found."}), 404
+    return jsonify({"ok": True, "job": job})
+
+# --- Routes for Fee Schedule and Clearances ---
+# Route to retrieve the fee_schedule percentages. Requires admin role.
+@admin_controls_bp.route("/fee-schedule", methods=["GET"])
+@jwt_required(role="admin")
+def get_fee_schedule():
+    conn = get_db_connection()
+    cur = conn.cursor(dictionary=True)
+    try:
+        rules = fetch_fee_schedule(cur)
+    finally:
+        cur.close()
+        conn.close()
+    return jsonify({"ok": True, "fee_schedule": {k: float(v) for k, v in rules.items()}})
+
+# Route to change the fee_schedule percentages. Every student's clearance is recomputed in the
+# same transaction so no status is left stale against the old thresholds. Requires admin role.
+@admin_controls_bp.route("/fee-schedule", methods=["POST"])
+@jwt_required(role="admin")
+def set_fee_schedule():
+    data = request.json or {}
+    if not isinstance(data, dict):
+        return jsonify({"ok": False, "error": "Request body must be a JSON object."}), 400
+    percentages = {}
+    for exam_type, value in data.items():
+        exam_type = exam_type.upper()
+        if exam_type not in EXAM_TYPES:
+            return jsonify({"ok": False, "error": f"Invalid exam type '{exam_type}'."}), 400
+        try:
+            percentage = Decimal(str(value))
+            # NaN and Infinity parse as Decimals but can't be compared against the range below.
+            if not percentage.is_finite():
+                raise InvalidOperation
+        except InvalidOperation:
+            return jsonify({"ok": False, "error": f"Invalid percentage for {exam_type}."}), 400
+        if not 0 <= percentage <= 100:
+            return jsonify({"ok": False, "error": f"Percentage for {exam_type} must be between 0 and 100."}), 400
+        percentages[exam_type] = percentage
+
+    if not percentages:
+        return jsonify({"ok": False, "error": "No percentages specified."}), 400
+
+    conn = get_db_connection()
+    cur = conn.cursor(dictionary=True, buffered=True)
+    try:
+        changed = update_fee_schedule(cur, percentages)
+        conn.commit()
+        eligibility_cache.invalidate_all()
+    except mysql.connector.Error as err:
+        conn.rollback()
+        return jsonify({"ok": False, "error": f"Database error: {err}"}), 500
+    finally:
+        cur.close()
+        conn.close()
+    return jsonify({"ok": True, "message": "Fee schedule updated.", "clearances_changed": changed})
+
+# Route to recompute every student's clearance against the current fee_schedule. Requires admin role.
+@admin_controls_bp.route("/clearances/recompute", methods=["POST"])
+@jwt_required(role="admin")
+def recompute_all_clearances():
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        changed = recompute_clearances(cur)
+        conn.commit()
+        if changed:
+            eligibility_cache.invalidate_all()
+    except mysql.connector.Error as err:
+        conn.rollback()
+        return jsonify({"ok": False, "error": f"Database error: {err}"}), 500
+    finally:
+        cur.close()
+        conn.close()
+    return jsonify({"ok": True, "clearances_changed": changed})
+
+# --- Routes for Request Profiles ---
+# Route to list stored request profiles (see utils/profiling.py). Requires admin role.
+@admin_controls_bp.route("/profiles", methods=["GET"])
+@jwt_required(role="admin")
+def get_profiles():
+    return jsonify({"ok": True, "profiles": list_profiles()})
+
+# Route to download a stored profile. "?format=text" renders a cProfile dump as a pstats table.
+@admin_controls_bp.route("/profiles/<name>", methods=["GET"])
+@jwt_required(role="admin")
+def get_profile(name):
+    path = profile_path(name)
+    if not path:
+        return jsonify({"ok": False, "error": "Profile not found."}), 404
+    if request.args.get("format") == "text" and name.endswith(".prof"):
+        return Response(profile_summary(path), mimetype="text/plain")
+    return send_file(path, as_attachment=True, download_name=name)
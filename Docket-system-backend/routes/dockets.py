@@ -1,25 +1,23 @@
-from flask import Blueprint, jsonify, request, send_file
+from flask import Blueprint, jsonify, request, send_file, Response, stream_with_context
 import os
-from datetime import datetime
-from io import BytesIO
-import qrcode
 import mysql.connector
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import Paragraph, Table, TableStyle
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-from dotenv import load_dotenv
 import hashlib
 import secrets
 from utils.auth import jwt_required
+from utils.db import get_db_connection
+from utils.metrics import PDF_RENDER_SECONDS
+from utils.payment_import import parse_payment_csv, import_payments
+from repositories import clearances, dockets, payments, students
+from utils.pagination import encode_cursor, decode_cursor, parse_limit, TTLCache
+from utils.student_search import student_index
+from utils.eligibility import build_eligibility, compact_eligibility
+from utils import docket_preissue, eligibility_cache, sync_cache
+from utils.events import publish, publish_batch
+from utils.audit import audit
+from utils.token_expiry import token_expiry
 import json # Import json for reading settings and blocklist files
 
 
-# Load environment variables from .env file
-load_dotenv()
-
 # Blueprint for docket-related routes
 dockets_bp = Blueprint("dockets", __name__)
 
@@ -41,148 +39,6 @@ def read_json_file(file_path):
         else:
             return []
 
-# Helper function to establish a database connection
-def get_db_connection():
-    db_platform = os.getenv("DB_PLATFORM")
-
-    if db_platform == 'XAMPP':
-        # Configuration for local XAMPP (MariaDB) without SSL
-        return mysql.connector.connect(
-            host=os.getenv("DB_HOST", "localhost"),
-            user=os.getenv("DB_USER", "root"),
-            password=os.getenv("DB_PASSWORD", ""),
-            database=os.getenv("DB_NAME", "docket_system2"),
-            autocommit=False,
-            ssl_disabled=True
-        )
-    else:
-        # Default configuration for TiDB with SSL
-        return mysql.connector.connect(
-            host=os.getenv("HOST"),
-            user=os.getenv("USERNAME"),
-            password=os.getenv("PASSWORD"),
-            database=os.getenv("DATABASE"),
-            autocommit=False,
-            ssl_ca=os.getenv("CA"),
-            ssl_verify_cert=True if os.getenv("CA") else False
-        )
-
-# Helper function to generate a PDF exam docket with student information, courses, and a QR code.
-def generate_docket_pdf(student, courses, exam_type, qr_data):
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-
-    # Styles for PDF content
-    styles = getSampleStyleSheet()
-    style_normal = styles['Normal']
-    style_normal.fontName = 'Helvetica'
-    style_normal.fontSize = 10
-    style_bold_header = styles['h6']
-    style_bold_header.fontName = 'Helvetica-Bold'
-
-    # Start drawing from the top of the page
-    y_pos = height - inch
-
-    # Draw header elements including university logo, name, and exam type
-    logo_path = os.path.join(os.getcwd(), "Docket-system-frontend", "frontend", "cavendish-logo.png")
-    if os.path.exists(logo_path):
-        p.drawImage(logo_path, inch - 0.5*inch, y_pos - 0.4*inch, width=1*inch, height=0.5*inch, preserveAspectRatio=True)
-    
-    p.setFont("Helvetica-Bold", 14)
-    p.drawCentredString(width / 2, y_pos - 0.5 * inch, "Cavendish University Zambia Ltd.")
-    y_pos -= 0.8 * inch
-    p.setFont("Helvetica-Bold", 12)
-    p.drawCentredString(width / 2, y_pos, student.get('faculty', 'Faculty of Business and Information Technology'))
-    y_pos -= 0.2 * inch
-    p.drawCentredString(width / 2, y_pos, student.get('programme_name', 'Bachelor of Science in Computing'))
-    y_pos -= 0.4 * inch
-    p.setFont("Helvetica-Bold", 16)
-    p.drawCentredString(width / 2, y_pos, f"{exam_type.upper()} DOCKET")
-    y_pos -= 0.2 * inch
-    p.line(inch, y_pos, width - inch, y_pos)
-    y_pos -= 0.3 * inch # Margin below line
-
-    # Draw student information table
-    info_data = [
-        [Paragraph('<b>Date Issued:</b>', style_normal), Paragraph(datetime.now().strftime('%d/%m/%Y'), style_normal)],
-        [Paragraph('<b>Student Name:</b>', style_normal), Paragraph(f"{student.get('first_name', '')} {student.get('last_name', '')}", style_normal)],
-        [Paragraph('<b>Student Number:</b>', style_normal), Paragraph(student.get('student_number', ''), style_normal)],
-    ]
-    info_table = Table(info_data, colWidths=[1.5 * inch, 4.5 * inch])
-    info_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('LEFTPADDING', (0, 0), (-1, -1), 0),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
-        ('GRID', (0,0), (-1,-1), 1, colors.white) # Invisible grid to force rendering
-    ]))
-    
-    info_table_height = info_table.wrap(width - 2 * inch, 0)[1]
-    info_table.drawOn(p, inch, y_pos - info_table_height)
-    y_pos -= (info_table_height + 0.4 * inch) # Subtract height and add margin
-
-    # Draw main courses table
-    header = [Paragraph(h, style_bold_header) for h in ['Code', 'Module', 'Date', 'Time', 'Venue', "INVIGILATOR'S SIGNATURE"]]
-    table_data = [header]
-    for course in courses:
-        table_data.append([Paragraph(c, style_normal) for c in [course.get('course_code', ''), course.get('course_name', ''), '', '', '', '']])
-
-    main_table = Table(table_data, colWidths=[0.7*inch, 2.4*inch, 0.6*inch, 0.6*inch, 0.6*inch, 1.4*inch])
-    main_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    
-    main_table_height = main_table.wrap(width - 2 * inch, 0)[1]
-    main_table.drawOn(p, inch, y_pos - main_table_height)
-    y_pos -= (main_table_height + 0.4 * inch)
-
-    # Add notes section
-    p.setFont("Helvetica-Bold", 11)
-    p.drawString(inch, y_pos, "Note:")
-    y_pos -= 0.25 * inch
-    exam_type_display = exam_type.upper()
-    notes = [
-        f"1. All Students are expected to sign the {exam_type_display} Attendance Register as evidence that one has sat for the {exam_type_display}.",
-        f"2. The {exam_type_display} docket is not the Exam Attendance Register.",
-        f"3. Students must only sign this document on the last day of their {exam_type_display} and leave the form with the invigilator.",
-        f"4. This document is a proof that the student has registered for the {exam_type_display}.",
-        "5. All students must possess a CUZ ID card and Authorization from Finance."
-    ]
-    for note in notes:
-        p.setFont("Helvetica", 10)
-        p.drawString(inch + 0.2*inch, y_pos, note)
-        y_pos -= 0.2 * inch
-    y_pos -= 0.4 * inch
-
-    # Add signature lines
-    p.drawString(inch, y_pos, "Signed: ............................................")
-    p.drawString(inch + 0.5*inch, y_pos - 0.2*inch, "Finance")
-    p.drawString(width - 4.5*inch, y_pos, "Signed: ............................................")
-    p.drawString(width - 4.0*inch, y_pos - 0.2*inch, "Student")
-    y_pos -= 1.0 * inch
-    p.drawString(inch, y_pos, "Signed: ............................................")
-    p.drawString(inch + 0.5*inch, y_pos - 0.2*inch, "Dean of BIT")
-    p.drawString(width - 4.5*inch, y_pos, "Date: ............................................")
-
-    # Generate and draw QR code for verification
-    qr_img = qrcode.make(qr_data)
-    qr_path = f"temp_qr_{student['student_number']}.png"
-    qr_img.save(qr_path)
-    p.drawImage(qr_path, width - inch - 1.2*inch, 1.5*inch, width=1.2*inch, height=1.2*inch, preserveAspectRatio=True)
-    os.remove(qr_path) # Clean up temporary QR code image
-
-    p.showPage()
-    p.save()
-    buffer.seek(0)
-    return buffer
-
 import json
 
 # Define file paths securely at the top level of the module
@@ -207,72 +63,150 @@ def read_json_file(file_path):
 @dockets_bp.route("/eligibility/<student_id>", methods=["GET"])
 @jwt_required()
 def check_eligibility(student_id):
+    # Serve the shared cached answer when nothing relevant has changed since it was computed.
+    cached, fresh = eligibility_cache.get_cached(student_id)
+    if fresh:
+        return jsonify({"ok": True, "eligibility": cached})
+    version = eligibility_cache.current_version()
+
     # Read settings and blocklist first
     settings = read_json_file(SETTINGS_FILE)
     blocklist = read_json_file(BLOCKLIST_FILE)
     active_exam = settings.get("active_exam", "cat1")
 
-    conn = get_db_connection()
-    cur = conn.cursor(dictionary=True)
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor(dictionary=True)
 
-    # Get student number to check against the blocklist
-    cur.execute("SELECT student_number FROM students WHERE id=%s LIMIT 1", (student_id,))
-    student_info = cur.fetchone()
-    if not student_info:
-        cur.close()
-        conn.close()
-        return jsonify({"ok": False, "error": "Student not found."}), 404
+        # Get student number to check against the blocklist
+        student_number = students.get_student_number(cur, student_id)
+        if not student_number:
+            cur.close()
+            conn.close()
+            return jsonify({"ok": False, "error": "Student not found."}), 404
 
-    student_number = student_info['student_number']
+        # 1. Check if student is blocked
+        if student_number in blocklist:
+            cur.close()
+            conn.close()
+            eligibility_list = build_eligibility(True, None, active_exam)
+            eligibility_cache.store(student_id, student_number, eligibility_list, version)
+            return jsonify({"ok": True, "eligibility": eligibility_list})
 
-    # 1. Check if student is blocked
-    if student_number in blocklist:
-        eligibility_list = [
-            {"exam_type": "ca1", "eligible": False, "reason": "Account blocked. Please visit the Retentions Office."},
-            {"exam_type": "ca2", "eligible": False, "reason": "Account blocked. Please visit the Retentions Office."},
-            {"exam_type": "exam", "eligible": False, "reason": "Account blocked. Please visit the Retentions Office."},
-        ]
+        # 2. Get clearance status from DB
+        row = clearances.get_clearance(cur, student_id)
         cur.close()
         conn.close()
-        return jsonify({"ok": True, "eligibility": eligibility_list})
-
-    # 2. Get clearance status from DB
-    cur.execute(
-        "SELECT ca1_status, ca2_status, exam_status FROM clearances WHERE student_id=%s LIMIT 1",
-        (student_id,),
-    )
-    row = cur.fetchone()
-    cur.close()
-    conn.close()
+    except mysql.connector.Error as err:
+        # The DB is slow or unreachable: an older answer is better than an error on the dashboard.
+        if cached is not None:
+            return jsonify({"ok": True, "eligibility": cached, "stale": True})
+        return jsonify({"ok": False, "error": f"Database error: {err}"}), 503
 
     if not row:
         return jsonify({"ok": False, "error": "No clearance records found."}), 404
 
     # 3. Determine eligibility based on active exam and clearance status
-    db_status = {
-        "ca1": row["ca1_status"] == "eligible",
-        "ca2": row["ca2_status"] == "eligible",
-        "exam": row["exam_status"] == "eligible",
-    }
+    eligibility_list = build_eligibility(False, row, active_exam)
+    eligibility_cache.store(student_id, student_number, eligibility_list, version)
+    return jsonify({"ok": True, "eligibility": eligibility_list})
 
-    eligibility_list = []
-    for exam_type in ["ca1", "ca2", "exam"]:
-        is_active = (exam_type == active_exam)
-        is_clear = db_status[exam_type]
-        reason = ""
-        
-        if not is_active:
-            reason = "Docket not currently active."
-        elif not is_clear:
-            reason = "Not cleared by Finance. Please visit the Retentions Office."
+# ---------------- Route: Batch Eligibility ----------------
+# Resolves blocklist, active exam and clearance for many students with a single query.
+# Body: {"student_ids": [...]} or {"student_numbers": [...]} or {"programme_id": n}, plus an
+# optional "stream": true to receive newline-delimited JSON (one student per line) for large sets.
+BATCH_ELIGIBILITY_MAX_IDS = 5000
+BATCH_ELIGIBILITY_FETCH_SIZE = 1000
 
-        eligibility_list.append({
-            "exam_type": exam_type,
-            "eligible": is_active and is_clear,
-            "reason": reason
-        })
+@dockets_bp.route("/eligibility/batch", methods=["POST"])
+@jwt_required(role="admin")
+def batch_eligibility():
+    data = request.json or {}
+    if not isinstance(data, dict):
+        return jsonify({"ok": False, "error": "Request body must be a JSON object."}), 400
+    student_ids = data.get("student_ids")
+    student_numbers = data.get("student_numbers")
+    programme_id = data.get("programme_id")
+
+    if student_ids:
+        keys, column = student_ids, "id"
+    elif student_numbers:
+        keys, column = student_numbers, "student_number"
+    elif programme_id is not None:
+        keys, column = None, "programme_id"
+    else:
+        return jsonify({"ok": False, "error": "Provide student_ids, student_numbers or programme_id."}), 400
+
+    if keys is not None:
+        # Checked before converting: a string would otherwise pass as a list of its characters.
+        if not isinstance(keys, list) or len(keys) > BATCH_ELIGIBILITY_MAX_IDS:
+            return jsonify({"ok": False, "error": f"Provide a list of at most {BATCH_ELIGIBILITY_MAX_IDS} students."}), 400
+        if column == "student_number":
+            keys = [str(n) for n in keys]
+
+    active_exam = read_json_file(SETTINGS_FILE).get("active_exam", "cat1")
+    blocklist = set(read_json_file(BLOCKLIST_FILE))
+    selection = keys if keys is not None else programme_id
+
+    if data.get("stream"):
+        # The query runs before the response starts, so a failure is still a proper error status.
+        # Rows are then read in batches from the unbuffered cursor and written out as they arrive;
+        # an error after that ends the stream with an {"ok": false} line.
+        try:
+            conn = get_db_connection()
+        except mysql.connector.Error as err:
+            return jsonify({"ok": False, "error": f"Database error: {err}"}), 500
+        cur = conn.cursor(dictionary=True)
+        try:
+            clearances.select_current_clearances(cur, column, selection)
+        except mysql.connector.Error as err:
+            cur.close()
+            conn.close()
+            return jsonify({"ok": False, "error": f"Database error: {err}"}), 500
+
+        closed = []
+
+        # Runs when the stream ends, and on close in case the client left before it started.
+        def close():
+            if not closed:
+                closed.append(True)
+                cur.close()
+                conn.close()
+
+        def generate():
+            try:
+                yield json.dumps({"active_exam": active_exam}) + "\n"
+                while True:
+                    rows = cur.fetchmany(BATCH_ELIGIBILITY_FETCH_SIZE)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield json.dumps(compact_eligibility(row, blocklist, active_exam)) + "\n"
+            except mysql.connector.Error as err:
+                yield json.dumps({"ok": False, "error": f"Database error: {err}"}) + "\n"
+            finally:
+                close()
+
+        response = Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+        response.call_on_close(close)
+        return response
 
-    return jsonify({"ok": True, "eligibility": eligibility_list})
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor(dictionary=True)
+        clearances.select_current_clearances(cur, column, selection)
+        rows = cur.fetchall()
+        cur.close()
+        conn.close()
+    except mysql.connector.Error as err:
+        return jsonify({"ok": False, "error": f"Database error: {err}"}), 500
+
+    results = [compact_eligibility(row, blocklist, active_exam) for row in rows]
+    response = {"ok": True, "active_exam": active_exam, "results": results}
+    if keys is not None:
+        found = {str(r["id"]) for r in rows} if column == "id" else {r["student_number"] for r in rows}
+        response["not_found"] = [k for k in keys if str(k) not in found]
+    return jsonify(response)
 
 # ---------------- Route: Generate Docket ----------------
 # Generates an exam docket PDF for a student, including eligibility checks, course information, and a QR code.
@@ -300,14 +234,13 @@ def generate_docket():
     conn = get_db_connection()
     cur = conn.cursor(dictionary=True)
 
-    cur.execute("SELECT student_number FROM students WHERE id=%s LIMIT 1", (student_id,))
-    student_info = cur.fetchone()
-    if not student_info:
+    student_number = students.get_student_number(cur, student_id)
+    if not student_number:
         cur.close()
         conn.close()
         return jsonify({"ok": False, "error": "Student not found."}), 404
 
-    if student_info['student_number'] in blocklist:
+    if student_number in blocklist:
         cur.close()
         conn.close()
         return jsonify({"ok": False, "error": "Account blocked. Please visit the Retentions Office."}), 403
@@ -318,11 +251,7 @@ def generate_docket():
         return jsonify({"ok": False, "error": f"Docket for {exam_type.upper()} is not currently active."}), 403
 
     # Check clearance from DB
-    cur.execute(
-        "SELECT ca1_status, ca2_status, exam_status FROM clearances WHERE student_id=%s LIMIT 1",
-        (student_id,),
-    )
-    clearance = cur.fetchone()
+    clearance = clearances.get_clearance(cur, student_id)
     if not clearance:
         cur.close()
         conn.close()
@@ -341,24 +270,21 @@ def generate_docket():
             "error": f"Not eligible for {exam_type.upper()} docket. Please visit the Retentions Office."
         }), 403
 
+    # A docket pre-issued at activation (or rendered earlier) is sent as it is while its token is unused.
+    artifact = docket_preissue.find_artifact(cur, student_id, exam_type)
+    if artifact:
+        cur.close()
+        conn.close()
+        return send_file(
+            artifact,
+            as_attachment=not is_preview,
+            download_name=f"{student_number}{exam_type} docket.pdf",
+            mimetype="application/pdf"
+        )
+
     # Fetch student and course information from the database.
-    cur.execute('''
-        SELECT s.id, s.first_name, s.last_name, s.student_number, s.programme_id, p.programme_name, s.current_year, s.current_semester
-        FROM students s
-        JOIN programmes p ON s.programme_id = p.programme_id
-        WHERE s.id = %s
-    ''', (student_id,))
-    student = cur.fetchone()
-
-    cur.execute('''
-        SELECT c.course_code, c.course_name
-        FROM enrollments e
-        JOIN curriculum cu ON e.curriculum_id = cu.curriculum_id
-        JOIN courses c ON cu.course_id = c.course_id
-        WHERE e.student_id = %s
-        ORDER BY c.course_name ASC
-    ''', (student_id,))
-    courses = cur.fetchall()
+    student = students.get_docket_details(cur, student_id)
+    courses = students.get_enrolled_courses(cur, student_id)
 
     if not student:
         cur.close()
@@ -376,46 +302,12 @@ def generate_docket():
 
     try:
         # Ensure an active token key exists for verification, creating one if necessary.
-        cur.execute("SELECT key_id, secret_key FROM token_keys WHERE status='active' LIMIT 1")
-        key_row = cur.fetchone()
-        if not key_row:
-            new_secret_key = secrets.token_urlsafe(32)
-            cur.execute('''
-                INSERT INTO token_keys (key_name, secret_key, created_at, status)
-                VALUES (%s, %s, NOW(), %s)
-            ''', ("default_verification_key", new_secret_key, "active"))
-            token_key_id = cur.lastrowid
-            secret_key_for_docket = new_secret_key
-        else:
-            token_key_id = key_row["key_id"]
-            secret_key_for_docket = key_row["secret_key"]
-
-        # Save docket and token information to the database.
-        cur.execute('''
-            INSERT INTO dockets (student_id, programme_id, exam_type, year_of_study, semester, qr_code, issued_at, status, printed_count, created_at, updated_at)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW())
-        ''', (
-            student['id'],
-            student['programme_id'],
-            exam_type,
-            student['current_year'],
-            student['current_semester'],
-            qr_data,
-            datetime.now(),
-            "issued",
-            1
-        ))
-        docket_id = cur.lastrowid
-
-        cur.execute('''
-            INSERT INTO docket_tokens (docket_id, token_hash, issued_at, status)
-            VALUES (%s, %s, %s, %s)
-        ''', (
-            docket_id,
-            token_hash,
-            datetime.now(),
-            "active"
-        ))
+        dockets.ensure_token_key(cur)
+
+        # Save docket and token information to the database, expiring with the exam.
+        expires_at = token_expiry(settings, exam_type)
+        docket_id = dockets.insert_docket(cur, student, exam_type, qr_data, expires_at)
+        dockets.insert_token(cur, docket_id, token_hash, expires_at)
 
         conn.commit()
     except Exception as e:
@@ -423,12 +315,18 @@ def generate_docket():
         cur.close()
         conn.close()
         return jsonify({"ok": False, "error": f"Failed to save docket/token: {e}"}), 500
+    sync_cache.tokens.bump()
+    eligibility_cache.invalidate(student_ids=[student_id])  # the dashboard shows the new docket
+    publish_batch("tokens", "token_hashes", [token_hash], change="issued")
 
     cur.close()
     conn.close()
 
-    # Generate and return the docket PDF.
-    pdf_buffer = generate_docket_pdf(student, courses, exam_type, qr_data)
+    # Generate and return the docket PDF. The PDF stack is imported on the first render only.
+    from utils.docket_pdf import generate_docket_pdf
+    with PDF_RENDER_SECONDS.time():
+        pdf_buffer = generate_docket_pdf(student, courses, exam_type, qr_data)
+    docket_preissue.store_artifact(student, exam_type, docket_id, pdf_buffer.getvalue())
     return send_file(
         pdf_buffer,
         as_attachment=not is_preview,
@@ -436,27 +334,79 @@ def generate_docket():
         mimetype="application/pdf"
     )
 
+# Fields returned by /payments when the client doesn't pick any (see payments.BALANCE_COLUMNS).
+DEFAULT_PAYMENT_FIELDS = ["id", "first_name", "last_name", "student_number", "programme_name", "total_fee", "amount_paid", "balance"]
+PAYMENTS_PAGE_SIZE = 100
+PAYMENTS_MAX_PAGE_SIZE = 500
+
+# Filtered totals only change when students or payments do, so a short-lived count is good enough.
+payments_count_cache = TTLCache(ttl_seconds=60)
+
 @dockets_bp.route("/payments", methods=["GET"])
 @jwt_required(role="admin")
 def get_payments():
-    # Retrieves a list of all students with their payment balance information.
+    # Retrieves one page of students with their current-term balance, ordered by name.
+    # Query arguments:
+    #   limit, cursor          - page size and the next_cursor returned by the previous page
+    #   programme_id           - only students of this programme
+    #   min_balance, max_balance
+    #   clearance, exam_type   - only students whose clearance for exam_type (default: the active exam)
+    #                            is "eligible" or "blocked"
+    #   fields                 - comma-separated subset of payments.BALANCE_COLUMNS
+    #   include_total          - "false" to skip the (cached) total count
+    args = request.args
+    try:
+        limit = parse_limit(args.get("limit"), PAYMENTS_PAGE_SIZE, PAYMENTS_MAX_PAGE_SIZE)
+        after = decode_cursor(args["cursor"], 3) if args.get("cursor") else None
+
+        fields = [f.strip() for f in args.get("fields", "").split(",") if f.strip()] or DEFAULT_PAYMENT_FIELDS
+        unknown = [f for f in fields if f not in payments.BALANCE_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+
+        filters = {}
+        if args.get("programme_id"):
+            filters["programme_id"] = int(args["programme_id"])
+        if args.get("min_balance"):
+            filters["min_balance"] = float(args["min_balance"])
+        if args.get("max_balance"):
+            filters["max_balance"] = float(args["max_balance"])
+        if args.get("clearance"):
+            if args["clearance"] not in ("eligible", "blocked"):
+                raise ValueError("clearance must be 'eligible' or 'blocked'")
+            exam_type = args.get("exam_type") or read_json_file(SETTINGS_FILE).get("active_exam", "ca1")
+            if exam_type not in ("ca1", "ca2", "exam"):
+                raise ValueError("Invalid exam_type")
+            filters["clearance"] = (exam_type, args["clearance"])
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+
     try:
         conn = get_db_connection()
         cur = conn.cursor(dictionary=True)
 
-        cur.execute("""
-            SELECT DISTINCT s.id, s.first_name, s.last_name, s.student_number, p.programme_name, sb.total_fee, sb.amount_paid, sb.balance
-            FROM students s
-            JOIN programmes p ON s.programme_id = p.programme_id
-            LEFT JOIN student_balances sb ON s.id = sb.student_id
-            ORDER BY s.last_name, s.first_name
-        """)
-        students = cur.fetchall()
+        # The sort key is always selected so the next cursor can be built; it is dropped afterwards if not asked for.
+        rows = payments.list_balances(cur, fields, filters, after, limit)
+
+        total = None
+        if args.get("include_total", "true").lower() != "false":
+            count_key = tuple(sorted(filters.items()))
+            total = payments_count_cache.get(count_key)
+            if total is None:
+                total = payments.count_balances(cur, filters)
+                payments_count_cache.set(count_key, total)
 
         cur.close()
         conn.close()
 
-        return jsonify({"ok": True, "students": students})
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor([last["last_name"], last["first_name"], last["id"]])
+
+        rows = [{f: row[f] for f in fields} for row in rows]
+        return jsonify({"ok": True, "students": rows, "next_cursor": next_cursor, "total": total})
     except Exception as e:
         if 'cur' in locals():
             cur.close()
@@ -465,56 +415,43 @@ def get_payments():
         return jsonify({"ok": False, "error": f"Failed to retrieve payments: {str(e)}"}), 500
 
 
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+
 @dockets_bp.route("/students/search", methods=["GET"])
 @jwt_required(role="admin")
 def search_students():
-    # Searches for students by name or student number.
+    # Searches for students by name or student number using the in-process search index.
+    # Results are ranked (exact student number, then exact name, prefix and substring matches)
+    # and paged with "limit" and the "next_cursor" of the previous page.
     query = request.args.get("q", "").strip()
     if not query:
-        return jsonify({"ok": True, "students": []})
+        return jsonify({"ok": True, "students": [], "next_cursor": None})
+
+    try:
+        limit = parse_limit(request.args.get("limit"), SEARCH_PAGE_SIZE, SEARCH_MAX_PAGE_SIZE)
+        offset = decode_cursor(request.args["cursor"], 1)[0] if request.args.get("cursor") else 0
+        if not isinstance(offset, int) or offset < 0:
+            raise ValueError("Invalid cursor")
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
 
     try:
         conn = get_db_connection()
         cur = conn.cursor(dictionary=True)
 
-        # Heuristic: If the query consists only of digits, it's a student number search.
-        if query.isdigit():
-            sql = """
-                SELECT DISTINCT s.id, s.first_name, s.last_name, s.student_number, p.programme_name, 
-                        sb.total_fee, sb.amount_paid, sb.balance
-                FROM students s
-                JOIN programmes p ON s.programme_id = p.programme_id
-                LEFT JOIN student_balances sb ON s.id = sb.student_id 
-                    AND s.current_year = sb.year_of_study 
-                    AND s.current_semester = sb.semester
-                WHERE s.student_number = %s
-                ORDER BY s.last_name, s.first_name
-                LIMIT 1
-            """
-            params = (query,)
-        else:
-            # Perform a LIKE search for names or partial student numbers
-            search_query = f"%{query}%"
-            sql = """
-                SELECT DISTINCT s.id, s.first_name, s.last_name, s.student_number, p.programme_name, 
-                        sb.total_fee, sb.amount_paid, sb.balance
-                FROM students s
-                JOIN programmes p ON s.programme_id = p.programme_id
-                LEFT JOIN student_balances sb ON s.id = sb.student_id 
-                    AND s.current_year = sb.year_of_study 
-                    AND s.current_semester = sb.semester
-                WHERE s.first_name LIKE %s OR s.last_name LIKE %s OR s.student_number LIKE %s
-                ORDER BY s.last_name, s.first_name
-            """
-            params = (search_query, search_query, search_query)
-
-        cur.execute(sql, params)
-        students = cur.fetchall()
+        student_index.refresh(cur)
+        ranked = student_index.search(query, limit=offset + limit + 1)
+        page_ids = ranked[offset:offset + limit]
+        next_cursor = encode_cursor([offset + limit]) if len(ranked) > offset + limit else None
+
+        # Primary-key lookups for the page only, in the index's rank order.
+        results = students.get_search_page(cur, page_ids)
 
         cur.close()
         conn.close()
 
-        return jsonify({"ok": True, "students": students})
+        return jsonify({"ok": True, "students": results, "next_cursor": next_cursor})
     except Exception as e:
         if 'cur' in locals():
             cur.close()
@@ -522,6 +459,13 @@ def search_students():
             conn.close()
         return jsonify({"ok": False, "error": f"Search failed: {str(e)}"}), 500
 
+# Helper function pre-issuing dockets for students whose payments may have just cleared them,
+# when the active exam was activated with pre-issuance (see utils/docket_preissue.py).
+def preissue_for(student_ids):
+    settings = read_json_file(SETTINGS_FILE)
+    if settings.get("preissue") and student_ids:
+        docket_preissue.preissuer.start(settings["active_exam"], student_ids, read_json_file(BLOCKLIST_FILE), settings)
+
 @dockets_bp.route("/payments/update", methods=["POST"])
 @jwt_required(role="admin")
 def update_payment():
@@ -545,62 +489,30 @@ def update_payment():
     try:
         conn.start_transaction()
 
-        cur.execute("SELECT id, programme_id, current_year, current_semester FROM students WHERE student_number = %s", (student_number,))
-        student = cur.fetchone()
+        student = students.get_current_term(cur, student_number)
         if not student:
             raise Exception("Student not found.")
 
         student_id = student["id"]
         programme_id = student["programme_id"]
 
-        cur.execute("""
-            INSERT INTO payments (student_id, programme_id, amount, payment_type, payment_date, payment_status)
-            VALUES (%s, %s, %s, %s, NOW(), %s)
-        """, (student_id, programme_id, amount, "General", "completed"))
+        payments.insert_payment(cur, student_id, programme_id, amount)
 
-        # If not on XAMPP, perform manual updates. Otherwise, triggers will handle it.
+        # If not on XAMPP, update the balance manually. Otherwise, the payment trigger handles it.
         if db_platform != 'XAMPP':
-            current_year = student["current_year"]
-            current_semester = student["current_semester"]
-
-            cur.execute("""
-                UPDATE student_balances SET amount_paid = amount_paid + %s, last_updated = NOW()
-                WHERE student_id = %s AND programme_id = %s AND year_of_study = %s AND semester = %s
-            """, (amount, student_id, programme_id, current_year, current_semester))
-
-            if cur.rowcount == 0:
+            updated = payments.add_to_balance(cur, student_id, programme_id, student["current_year"], student["current_semester"], amount)
+            if updated == 0:
                 raise Exception("No matching student balance record found to update.")
 
-            cur.execute("""
-                SELECT amount_paid, total_fee FROM student_balances
-                WHERE student_id = %s AND programme_id = %s AND year_of_study = %s AND semester = %s
-            """, (student_id, programme_id, current_year, current_semester))
-            balance_data = cur.fetchone()
-            if not balance_data:
-                raise Exception("Student balance record not found after update.")
-
-            amount_paid = balance_data["amount_paid"]
-            total_fee = balance_data["total_fee"]
-
-            cur.execute("SELECT exam_type, required_percentage FROM fee_schedule")
-            rules = cur.fetchall()
-            
-            ca1_req = next((r['required_percentage'] for r in rules if r['exam_type'] == 'CA1'), 0)
-            ca2_req = next((r['required_percentage'] for r in rules if r['exam_type'] == 'CA2'), 0)
-            exam_req = next((r['required_percentage'] for r in rules if r['exam_type'] == 'EXAM'), 0)
-
-            percent_paid = (amount_paid / total_fee) * 100 if total_fee > 0 else 0
-
-            ca1_status = 'eligible' if percent_paid >= ca1_req else 'blocked'
-            ca2_status = 'eligible' if percent_paid >= ca2_req else 'blocked'
-            exam_status = 'eligible' if percent_paid >= exam_req else 'blocked'
-
-            cur.execute("""
-                UPDATE clearances SET ca1_status = %s, ca2_status = %s, exam_status = %s, last_checked = NOW()
-                WHERE student_id = %s AND programme_id = %s AND year_of_study = %s AND semester = %s
-            """, (ca1_status, ca2_status, exam_status, student_id, programme_id, current_year, current_semester))
+        # Clearance is recomputed by the shared engine on every platform.
+        clearances.recompute_clearances(cur, [student_id])
 
         conn.commit()
+        payments_count_cache.clear()
+        eligibility_cache.invalidate(student_ids=[student_id])
+        preissue_for([student_id])
+        publish("payments", count=1, student_ids=[student_id])
+        audit("admin", request.user["sub"], "payment", f"Recorded payment of {amount} for student {student_number}")
         
         return jsonify({"ok": True, "message": "Payment recorded successfully."}), 200
 
@@ -614,31 +526,70 @@ def update_payment():
         cur.close()
         conn.close()
 
-@dockets_bp.route("/sync/students", methods=["GET"])
+@dockets_bp.route("/payments/import", methods=["POST"])
 @jwt_required(role="admin")
-def sync_students():
-    # Endpoint to get all student details for offline caching.
+def import_payments_csv():
+    # Records a batch of payments from a bank-statement CSV (student_number, amount, receipt_number).
+    # The file can be sent as a multipart upload named "file" or as the raw request body.
+    upload = request.files.get("file")
+    raw = upload.read() if upload else request.get_data()
+    if not raw:
+        return jsonify({"ok": False, "error": "Missing CSV file"}), 400
+
+    try:
+        rows, invalid = parse_payment_csv(raw.decode("utf-8-sig"))
+    except (UnicodeDecodeError, ValueError) as e:
+        return jsonify({"ok": False, "error": f"Invalid CSV: {e}"}), 400
+
+    try:
+        conn = get_db_connection()
+    except mysql.connector.Error as err:
+        return jsonify({"ok": False, "error": f"Database error: {err}"}), 500
+
+    try:
+        summary = import_payments(conn, rows)
+    except mysql.connector.Error as err:
+        return jsonify({"ok": False, "error": f"Database error: {err}"}), 500
+    finally:
+        conn.close()
+
+    payments_count_cache.clear()
+    touched = summary.pop("student_ids")
+    eligibility_cache.invalidate(student_ids=touched)
+    preissue_for(touched)
+    publish_batch("payments", "student_ids", touched)
+    audit("admin", request.user["sub"], "payment_import",
+          f"Imported {summary['inserted']} payments, skipped {summary['duplicates']} duplicate receipts")
+    summary["invalid_rows"] = invalid
+    return jsonify({"ok": not summary["failed_chunks"], **summary}), 200
+
+# Helper function running one read for the sync endpoints on its own connection.
+def _sync_read(read):
     conn = get_db_connection()
     cur = conn.cursor(dictionary=True)
-    cur.execute("""
-        SELECT s.id, s.first_name, s.last_name, s.student_number, p.programme_name
-        FROM students s
-        JOIN programmes p ON s.programme_id = p.programme_id
-        ORDER BY s.student_number
-    """)
-    students = cur.fetchall()
-    cur.close()
-    conn.close()
-    return jsonify({"ok": True, "students": students})
+    try:
+        return read(cur)
+    finally:
+        cur.close()
+        conn.close()
+
+@dockets_bp.route("/sync/students", methods=["GET"])
+@jwt_required(role="admin")
+def sync_students():
+    # Endpoint to get all student details for offline caching. Scanners opening a session at
+    # the same time share one query and one serialized, compressed copy (utils/sync_cache.py).
+    try:
+        payload = sync_cache.students.get(lambda: {"ok": True, "students": _sync_read(students.list_for_sync)})
+    except mysql.connector.Error as err:
+        return jsonify({"ok": False, "error": f"Database error: {err}"}), 500
+    return sync_cache.flask_response(payload)
 
 @dockets_bp.route("/sync/tokens", methods=["GET"])
 @jwt_required(role="admin")
 def sync_tokens():
-    # Endpoint to get all active docket tokens for offline verification.
-    conn = get_db_connection()
-    cur = conn.cursor(dictionary=True)
-    cur.execute("SELECT token_hash FROM docket_tokens WHERE status = 'active'")
-    tokens = [row['token_hash'] for row in cur.fetchall()]
-    cur.close()
-    conn.close()
-    return jsonify({"ok": True, "tokens": tokens})
+    # Endpoint to get all active docket tokens for offline verification (shared like sync_students).
+    try:
+        payload = sync_cache.tokens.get(lambda: {"ok": True, "tokens": _sync_read(dockets.list_active_token_hashes)})
+    except mysql.connector.Error as err:
+        return jsonify({"ok": False, "error": f"Database error: {err}"}), 500
+    return sync_cache.flask_response(payload)
@@ -0,0 +1,65 @@
+from flask import Blueprint, jsonify, request, current_app
+import mysql.connector
+from utils.auth import jwt_required
+from utils.db import get_db_connection
+from utils.eligibility import build_eligibility
+from utils import eligibility_cache
+from utils.sync_cache import Payload, flask_response
+from repositories import dockets, students
+from routes.dockets import read_json_file, BLOCKLIST_FILE, SETTINGS_FILE # Reusing helper functions from dockets blueprint
+
+# Blueprint for the student portal's own routes
+students_bp = Blueprint("students", __name__)
+
+# Route returning everything the student portal shows after login in one response: profile,
+# programme, current-term balance, enrolled courses, per-exam eligibility and the docket already
+# issued for the active exam. It replaces the /me, /dockets/eligibility and preview calls. The
+# body carries an ETag, so an unchanged dashboard is a 304, and it is cached per student with the
+# eligibility answers (utils/eligibility_cache.py), so a refresh usually skips the DB as well.
+# Requires student role.
+@students_bp.route("/me/dashboard", methods=["GET"])
+@jwt_required(role="student")
+def get_dashboard():
+    student_id = request.user["sub"]
+    body = eligibility_cache.get_dashboard(student_id)
+    if body is None:
+        version = eligibility_cache.current_version()
+        settings = read_json_file(SETTINGS_FILE)
+        active_exam = settings.get("active_exam", "ca1")
+
+        conn = get_db_connection()
+        cur = conn.cursor(dictionary=True)
+        try:
+            row = students.get_dashboard_row(cur, student_id)
+            if not row:
+                return jsonify({"ok": False, "error": "Student not found."}), 404
+            courses = students.get_enrolled_courses(cur, student_id)
+            docket = dockets.find_usable_docket(cur, student_id, active_exam)
+        except mysql.connector.Error as err:
+            current_app.logger.error(f"Database error while building dashboard: {err}")
+            return jsonify({"ok": False, "error": "A database error occurred."}), 500
+        finally:
+            cur.close()
+            conn.close()
+
+        is_blocked = row["student_number"] in read_json_file(BLOCKLIST_FILE)
+        dashboard = {
+            "ok": True,
+            "student": {key: row[key] for key in (
+                "id", "student_number", "first_name", "last_name", "email", "current_year", "current_semester",
+            )},
+            "programme": {"programme_id": row["programme_id"], "programme_name": row["programme_name"]},
+            "balance": None if row["balance"] is None else {
+                "total_fee": row["total_fee"], "amount_paid": row["amount_paid"], "balance": row["balance"],
+            },
+            "courses": courses,
+            "active_exam": active_exam,
+            "eligibility": build_eligibility(is_blocked, row, active_exam),
+            "docket": None if docket is None else {
+                **docket,
+                "download_url": f"/dockets/generate?student_id={student_id}&exam_type={active_exam}",
+            },
+        }
+        body = current_app.json.dumps(dashboard)
+        eligibility_cache.store_dashboard(student_id, row["student_number"], body, version)
+    return flask_response(Payload(None, body.encode()))
@@ -1,31 +1,53 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app
 import mysql.connector
-import os
 import hashlib
-from dotenv import load_dotenv
+from collections import Counter
+from datetime import datetime
 from utils.auth import jwt_required
-from routes.dockets import read_json_file, BLOCKLIST_FILE # Reusing helper functions from dockets blueprint
-
-# Load environment variables from .env file
-load_dotenv()
+from utils.db import get_db_connection
+from utils.audit import audit
+from utils import eligibility_cache
+from utils.events import publish_batch
+from utils.verification_stats import dashboard, device_key, parse_device_id, record_scans
+from repositories import dockets, students, verifications
+from routes.dockets import read_json_file, BLOCKLIST_FILE, SETTINGS_FILE # Reusing helper functions from dockets blueprint
 
 # Blueprint for verification routes
 verification_bp = Blueprint("verification", __name__)
 
-# Helper function to establish a database connection.
-# This function is duplicated from app.py/dockets.py for modularity within the blueprint.
-def get_db_connection():
-    # This function should ideally be centralized to avoid duplication.
-    # For now, it connects to TiDB with SSL.
-    return mysql.connector.connect(
-        host=os.getenv("HOST", "localhost"),
-        user=os.getenv("USERNAME", "root"),
-        password=os.getenv("PASSWORD", ""),
-        database=os.getenv("DATABASE", "docket_system"),
-        autocommit=False,
-        ssl_ca=os.getenv("CA"),
-        ssl_verify_cert=True
-    )
+# Messages shared with the async versions of these routes in asgi.py.
+BLOCKED_ERROR = "Student is blocked. Please refer to the Retentions Office."
+INVALID_DOCKET_ERROR = "Docket is invalid, has expired, has already been used, or does not exist."
+EXPIRED_DOCKET_ERROR = "Docket has expired: it is not for the active exam."
+
+# Helper function splitting scanned QR data into student number, exam type and the hash of the
+# token value (only hashes are stored). Raises ValueError for malformed data.
+def parse_qr_data(qr_data):
+    parts = qr_data.split('|')
+    if len(parts) != 3:
+        raise ValueError("Invalid QR data format")
+    student_number, exam_type, token_value = parts
+    return student_number, exam_type, hashlib.sha256(token_value.encode()).hexdigest()
+
+# Helper function returning when an offline scan was made, from the ISO timestamp the scanner
+# stores with it, as local time (what the timestamp columns hold). Tokens are checked against
+# this time, so scans made before an exam switch still sync afterwards. None when the timestamp
+# is missing or invalid; times in the future count as now.
+def parse_scan_time(timestamp):
+    try:
+        scanned_at = datetime.fromisoformat(str(timestamp).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if scanned_at.tzinfo is not None:
+        scanned_at = scanned_at.astimezone().replace(tzinfo=None)
+    return min(scanned_at, datetime.now())
+
+# Helper function counting a synced batch in the live stats: the scans that went through per exam
+# type, and the rest (already used, expired or malformed) as rejected.
+def record_synced_scans(device, synced, pending_count):
+    for exam_type, count in synced.items():
+        record_scans(device, valid=count, exam_type=exam_type)
+    record_scans(device, rejected=pending_count - sum(synced.values()))
 
 @verification_bp.route("/verify", methods=["POST"])
 @jwt_required(role="admin")
@@ -34,77 +56,65 @@ def verify_docket():
     # It checks for validity, blocklist status, and logs the verification.
     data = request.json
     qr_data = data.get("qr_data")
-    print(f"Received QR data: {qr_data}") # For debugging purposes
+    current_app.logger.debug(f"Received QR data: {qr_data}")
     admin_id = request.user['sub'] # Get admin ID from JWT payload
+    device_id = parse_device_id(data.get("device_id"))
+    device = device_key(device_id, admin_id)
 
     if not qr_data:
         return jsonify({"ok": False, "error": "Missing QR code data."}), 400
 
     conn = None
     try:
-        # Parse QR Code Data into student number, exam type, and token value.
-        parts = qr_data.split('|')
-        if len(parts) != 3:
-            raise ValueError("Invalid QR data format")
-        student_number, exam_type, token_value = parts
+        # Parse QR Code Data into student number, exam type, and the hash of the token value.
+        student_number, exam_type, token_hash = parse_qr_data(qr_data)
 
         # Check if the student is on the blocklist.
         blocklist = read_json_file(BLOCKLIST_FILE)
         if student_number in blocklist:
-            raise ValueError("Student is blocked. Please refer to the Retentions Office.")
+            raise ValueError(BLOCKED_ERROR)
 
-        # Connect to DB and hash the token for secure comparison.
+        # Dockets for any exam but the active one have expired (their tokens are swept in the background).
+        if exam_type != read_json_file(SETTINGS_FILE).get("active_exam"):
+            raise ValueError(EXPIRED_DOCKET_ERROR)
+
+        # Connect to DB.
         conn = get_db_connection()
         cur = conn.cursor(dictionary=True)
-        token_hash = hashlib.sha256(token_value.encode()).hexdigest()
 
         # Find an active token in the database and lock the row to prevent race conditions.
         conn.start_transaction()
-        cur.execute("""
-            SELECT dt.token_id, dt.docket_id, d.student_id
-            FROM docket_tokens dt
-            JOIN dockets d ON dt.docket_id = d.docket_id
-            JOIN students s ON d.student_id = s.id
-            WHERE dt.token_hash = %s
-            AND s.student_number = %s
-            AND d.exam_type = %s
-            AND dt.status = 'active'
-            LIMIT 1 FOR UPDATE
-        """, (token_hash, student_number, exam_type))
-        token_row = cur.fetchone()
+        token_row = dockets.find_active_token(cur, token_hash, student_number, exam_type)
 
         # Handle verification logic: if no active token, it's invalid or already used.
         if not token_row:
             conn.rollback() # End the transaction
             cur.close()
             conn.close()
-            return jsonify({"ok": False, "error": "Docket is invalid, has already been used, or does not exist."}), 404
+            record_scans(device, rejected=1)
+            audit("admin", admin_id, "verify_docket", f"Rejected {exam_type} docket for student {student_number}")
+            return jsonify({"ok": False, "error": INVALID_DOCKET_ERROR}), 404
 
         # If valid: Update token status, log verification, and fetch student details.
         docket_id = token_row["docket_id"]
 
         # Mark the token as 'used'.
-        cur.execute("UPDATE docket_tokens SET status = 'used', used_at = NOW() WHERE token_id = %s", (token_row["token_id"],))
+        dockets.mark_token_used(cur, token_row["token_id"])
 
         # Log the successful verification event.
-        cur.execute("""
-            INSERT INTO verifications (docket_id, scanned_by, scan_result, remarks)
-            VALUES (%s, %s, %s, %s)
-        """, (docket_id, admin_id, 'valid', 'Docket successfully verified'))
+        verifications.record_verification(cur, docket_id, admin_id, 'valid', 'Docket successfully verified', device_id)
 
         # Fetch student details for display on the verification screen.
-        cur.execute("""
-            SELECT s.first_name, s.last_name, s.student_number, p.programme_name
-            FROM students s
-            JOIN programmes p ON s.programme_id = p.programme_id
-            WHERE s.id = %s
-        """, (token_row["student_id"],))
-        student_details = cur.fetchone()
+        student_details = students.get_verification_details(cur, token_row["student_id"])
 
         # Commit the transaction and respond with success.
         conn.commit()
         cur.close()
         conn.close()
+        record_scans(device, valid=1, exam_type=exam_type)
+        eligibility_cache.invalidate(student_ids=[token_row["student_id"]])  # their dashboard docket is used
+        publish_batch("tokens", "token_hashes", [token_hash], change="used")
+        audit("admin", admin_id, "verify_docket", f"Verified {exam_type} docket for student {student_number}")
 
         return jsonify({
             "ok": True,
@@ -115,11 +125,13 @@ def verify_docket():
     except mysql.connector.Error as err:
         if conn:
             conn.rollback()
-        print(f"Database error: {err}") # Added for debugging
+        current_app.logger.error(f"Database error during verification: {err}")
         return jsonify({"ok": False, "error": "A database error occurred."}), 500
     except ValueError as e:
         if conn:
             conn.rollback()
+        record_scans(device, rejected=1)
+        audit("admin", admin_id, "verify_docket", f"Rejected docket: {e}")
         return jsonify({"ok": False, "error": str(e)}), 400
     except Exception as e:
         if conn:
@@ -138,6 +150,7 @@ def sync_verifications():
     data = request.json
     pending = data.get("pending_verifications", [])
     admin_id = request.user['sub']
+    device_id = parse_device_id(data.get("device_id"))
 
     if not pending:
         return jsonify({"ok": True, "message": "No items to sync."})
@@ -146,41 +159,39 @@ def sync_verifications():
     cur = conn.cursor(dictionary=True)
     try:
         conn.start_transaction()
+        synced = Counter()  # valid scans per exam type
+        used, scanned = [], []
         for item in pending:
             qr_data = item.get("qr_data")
             if not qr_data:
                 continue
 
-            parts = qr_data.split('|')
-            if len(parts) != 3:
+            try:
+                student_number, exam_type, token_hash = parse_qr_data(qr_data)
+            except ValueError:
                 continue
-            student_number, exam_type, token_value = parts
-
-            token_hash = hashlib.sha256(token_value.encode()).hexdigest()
-
-            cur.execute("""
-                SELECT dt.token_id, dt.docket_id
-                FROM docket_tokens dt
-                JOIN dockets d ON dt.docket_id = d.docket_id
-                JOIN students s ON d.student_id = s.id
-                WHERE dt.token_hash = %s AND s.student_number = %s AND d.exam_type = %s AND dt.status = 'active'
-                LIMIT 1 FOR UPDATE
-            """, (token_hash, student_number, exam_type))
-            token_row = cur.fetchone()
 
+            scanned_at = parse_scan_time(item.get("timestamp"))
+            token_row = dockets.find_active_token(cur, token_hash, student_number, exam_type, at=scanned_at)
             if token_row:
-                cur.execute("UPDATE docket_tokens SET status = 'used', used_at = NOW() WHERE token_id = %s", (token_row["token_id"],))
-                cur.execute("""
-                    INSERT INTO verifications (docket_id, scanned_by, scan_result, remarks)
-                    VALUES (%s, %s, %s, %s)
-                """, (token_row["docket_id"], admin_id, 'valid', 'Synced from offline verification'))
+                dockets.mark_token_used(cur, token_row["token_id"])
+                verifications.record_verification(cur, token_row["docket_id"], admin_id, 'valid', 'Synced from offline verification', device_id)
+                synced[exam_type] += 1
+                used.append(token_hash)
+                scanned.append(token_row["student_id"])
 
         conn.commit()
+        eligibility_cache.invalidate(student_ids=scanned)
+        record_synced_scans(device_key(device_id, admin_id), synced, len(pending))
+        if used:
+            publish_batch("tokens", "token_hashes", used, change="used")
+        audit("admin", admin_id, "sync_verifications", f"Synced {sum(synced.values())} of {len(pending)} offline verifications")
         return jsonify({"ok": True, "message": "Sync successful"})
 
     except mysql.connector.Error as err:
         if conn:
             conn.rollback()
+        current_app.logger.error(f"Database error during sync: {err}")
         return jsonify({"ok": False, "error": "Database error during sync."}), 500
     except Exception as e:
         if conn:
@@ -189,4 +200,13 @@ def sync_verifications():
     finally:
         if conn and conn.is_connected():
             cur.close()
-            conn.close()
\ No newline at end of file
+            conn.close()
+
+# Live verification dashboard: scans per minute, valid and rejected counts per scanner, and
+# admissions against eligible students per exam. Read from counters only (see
+# utils/verification_stats.py), so it can be polled during scanning. Requires admin role.
+@verification_bp.route("/stats", methods=["GET"])
+@jwt_required(role="admin")
+def verification_stats():
+    active_exam = read_json_file(SETTINGS_FILE).get("active_exam")
+    return jsonify({"ok": True, **dashboard(active_exam)})
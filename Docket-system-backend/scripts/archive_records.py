@@ -0,0 +1,141 @@
+# scripts/archive_records.py
+# This script moves finished docket records out of the live tables: used, expired and reprinted
+# docket_tokens, old verifications, and then the dockets left with neither, all from past terms
+# (the rules are in repositories/retention.py). Rows go to the <table>_archive tables
+# (migrations/004_archive_tables.sql) or, with --export-dir, to gzipped JSON-lines files.
+#
+# Each batch is its own short transaction that locks only the rows it moves, with a pause between
+# batches, so it can run while scanners and students are using the system. It can be stopped and
+# re-run at any time. --dry-run only counts what would be moved.
+#
+# Retention windows (days) default to RETENTION_TOKEN_DAYS, RETENTION_VERIFICATION_DAYS and
+# RETENTION_DOCKET_DAYS.
+#
+# Usage: python scripts/archive_records.py [--dry-run] [--tokens-days 30] [--verifications-days 180]
+#        [--dockets-days 180] [--batch-size 500] [--pause 0.05] [--export-dir archives/]
+
+import os
+import sys
+import json
+import gzip
+import time
+import argparse
+from datetime import datetime, timedelta
+
+# Add the backend directory to the python path for module imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mysql.connector  # noqa: E402
+from utils.db import get_db_connection  # noqa: E402
+from repositories import retention  # noqa: E402
+
+RETENTION_TOKEN_DAYS = int(os.getenv("RETENTION_TOKEN_DAYS", 30))
+RETENTION_VERIFICATION_DAYS = int(os.getenv("RETENTION_VERIFICATION_DAYS", 180))
+RETENTION_DOCKET_DAYS = int(os.getenv("RETENTION_DOCKET_DAYS", 180))
+
+
+# Helper function printing a progress line that overwrites itself, with the rate so far.
+def progress(label, done, total, started):
+    rate = done / max(time.perf_counter() - started, 1e-6)
+    sys.stdout.write(f"\r  {label}: {done}/{total} ({rate:.0f} rows/s)")
+    sys.stdout.flush()
+
+
+# Appends one batch to the table's export file, flushed before the rows are deleted so a crash
+# can repeat a batch in the file but never lose one.
+def export_batch(export_file, rows):
+    for row in rows:
+        export_file.write(json.dumps(row, default=str) + "\n")
+    export_file.flush()
+
+
+# Moves every archivable row of one table, batch by batch. Returns the number of rows moved.
+def archive_table(conn, cur, table, cutoffs, args, export_file=None):
+    total = retention.count_archivable(cur, table, cutoffs)
+    moved, after_id, started = 0, 0, time.perf_counter()
+    progress(table, moved, total, started)
+    while True:
+        ids = retention.next_archivable_ids(cur, table, cutoffs, after_id, args.batch_size)
+        conn.commit()  # end the read's snapshot, so the write transaction starts fresh
+        if not ids:
+            break
+        after_id = ids[-1]
+        try:
+            conn.start_transaction()
+            ids = retention.lock_archivable(cur, table, cutoffs, ids)
+            if export_file is not None:
+                export_batch(export_file, retention.fetch_rows(cur, table, ids))
+            else:
+                retention.copy_to_archive(cur, table, ids)
+            retention.delete_rows(cur, table, ids)
+            conn.commit()
+        except mysql.connector.Error:
+            conn.rollback()
+            raise
+        moved += len(ids)
+        progress(table, moved, total, started)
+        if args.pause:
+            time.sleep(args.pause)
+    sys.stdout.write("\n")
+    return moved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive finished dockets, tokens and verifications from past terms.")
+    parser.add_argument("--tokens-days", type=int, default=RETENTION_TOKEN_DAYS,
+                        help="Keep used/expired/reprinted tokens for this many days")
+    parser.add_argument("--verifications-days", type=int, default=RETENTION_VERIFICATION_DAYS,
+                        help="Keep verifications for this many days")
+    parser.add_argument("--dockets-days", type=int, default=RETENTION_DOCKET_DAYS,
+                        help="Keep dockets for this many days (and while they have live tokens or verifications)")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per transaction")
+    parser.add_argument("--pause", type=float, default=0.05, help="Seconds to wait between batches")
+    parser.add_argument("--export-dir", help="Write archived rows to gzipped JSON-lines files here instead of the archive tables")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the rows that would be archived")
+    args = parser.parse_args()
+
+    now = datetime.now()
+    cutoffs = {
+        "docket_tokens": now - timedelta(days=args.tokens_days),
+        "verifications": now - timedelta(days=args.verifications_days),
+        "dockets": now - timedelta(days=args.dockets_days),
+    }
+    for table in retention.ARCHIVE_ORDER:
+        print(f"{table}: archiving rows older than {cutoffs[table]:%Y-%m-%d %H:%M}")
+
+    conn = get_db_connection()
+    cur = conn.cursor(dictionary=True)
+    started = time.time()
+    try:
+        if args.dry_run:
+            for table in retention.ARCHIVE_ORDER:
+                count = retention.count_archivable(cur, table, cutoffs, pending=True)
+                print(f"  {table}: {count} rows would be archived")
+            return
+
+        if args.export_dir:
+            os.makedirs(args.export_dir, exist_ok=True)
+        totals = {}
+        for table in retention.ARCHIVE_ORDER:
+            if args.export_dir:
+                path = os.path.join(args.export_dir, f"{table}-{now:%Y%m%d-%H%M%S}.jsonl.gz")
+                with gzip.open(path, "at", encoding="utf-8") as export_file:
+                    totals[table] = archive_table(conn, cur, table, cutoffs, args, export_file)
+                if not totals[table]:
+                    os.remove(path)
+            else:
+                totals[table] = archive_table(conn, cur, table, cutoffs, args)
+        print("Archived " + ", ".join(f"{count} {table}" for table, count in totals.items())
+              + (f" to {args.export_dir}" if args.export_dir else ""))
+    except mysql.connector.Error as err:
+        print(f"\nA database error occurred: {err}")
+        sys.exit(1)
+    finally:
+        cur.close()
+        conn.close()
+        print(f"Done in {time.time() - started:.1f}s.")
+
+
+# Entry point for the script.
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# scripts/boot_report.py
+# This script measures how long a fresh worker takes to become useful: the time to import the app
+# (what gunicorn pays per worker without --preload, and once in the master with it), which
+# packages that time goes to (python -X importtime), the cost of the first use of the PDF stack,
+# and the latency of the first and second request to a few endpoints in a fresh process.
+# Every measurement runs in a new interpreter, --runs times, and the median is reported.
+#
+# Usage: python scripts/boot_report.py [--runs 5] [--top 12] [--json boot_report.json]
+# The database settings come from the environment / .env as for the app (DB_PLATFORM=SQLITE
+# works for local runs); endpoints that need the database report its error status if it is down.
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from collections import defaultdict
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+project_root = os.path.dirname(backend_dir)
+
+# (method, path, payload, admin) requested in order by the child process; admin requests carry a
+# token. /health/ready is left out because it warms the PDF stack, which is measured separately.
+REQUESTS = [
+    ("GET", "/health", None, False),
+    ("GET", "/admin-login.html", None, False),
+    ("GET", "/admin/settings", None, True),
+    ("POST", "/verification/verify", {"qr_data": "0|ca1|boot-report"}, True),
+    ("GET", "/dockets/sync/students", None, True),
+]
+
+# Runs in a fresh interpreter: times the app import, each request twice, then the PDF stack.
+CHILD = r"""
+import json, sys, time
+requests = json.loads(sys.argv[1])
+started = time.perf_counter()
+import app as backend
+result = {"app_import_ms": (time.perf_counter() - started) * 1000, "pdf_stack_loaded_by_import": "reportlab" in sys.modules}
+
+import datetime, jwt
+from utils.auth import JWT_SECRET, JWT_ALGO
+now = datetime.datetime.utcnow()
+token = jwt.encode({"sub": "0", "role": "admin", "iat": now, "exp": now + datetime.timedelta(minutes=5)}, JWT_SECRET, algorithm=JWT_ALGO)
+
+client = backend.app.test_client()
+result["requests"] = {}
+for method, path, payload, admin in requests:
+    headers = {"Authorization": f"Bearer {token}"} if admin else {}
+    timings = []
+    for _ in range(2):
+        started = time.perf_counter()
+        resp = client.open(path, method=method, json=payload, headers=headers)
+        resp.get_data()
+        timings.append((time.perf_counter() - started) * 1000)
+    result["requests"][f"{method} {path}"] = {"first_ms": timings[0], "second_ms": timings[1], "status": resp.status_code}
+
+started = time.perf_counter()
+from utils.docket_pdf import warm_pdf_templates
+warm_pdf_templates()
+result["pdf_first_use_ms"] = (time.perf_counter() - started) * 1000
+print(json.dumps(result))
+"""
+
+
+def run_child(args):
+    env = dict(os.environ, PYTHONPATH=backend_dir)
+    return subprocess.run([sys.executable, *args], cwd=project_root, env=env, capture_output=True, text=True, check=True)
+
+
+# Parses "python -X importtime" output and sums the self time of each top-level package.
+def import_breakdown(top):
+    proc = run_child(["-X", "importtime", "-c", "import app"])
+    by_package = defaultdict(int)
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        by_package[name.strip().split(".")[0]] += int(self_us)
+    ranked = sorted(by_package.items(), key=lambda item: item[1], reverse=True)
+    return [{"package": name, "self_ms": round(us / 1000, 1)} for name, us in ranked[:top]]
+
+
+def measure(runs):
+    samples = []
+    for _ in range(runs):
+        proc = run_child(["-c", CHILD, json.dumps(REQUESTS)])
+        samples.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    def median(values):
+        return round(statistics.median(values), 1)
+
+    report = {
+        "runs": runs,
+        "app_import_ms": median([s["app_import_ms"] for s in samples]),
+        "pdf_stack_loaded_by_import": samples[-1]["pdf_stack_loaded_by_import"],
+        "pdf_first_use_ms": median([s["pdf_first_use_ms"] for s in samples]),
+        "requests": {},
+    }
+    for key in samples[0]["requests"]:
+        report["requests"][key] = {
+            "first_ms": median([s["requests"][key]["first_ms"] for s in samples]),
+            "second_ms": median([s["requests"][key]["second_ms"] for s in samples]),
+            "status": samples[-1]["requests"][key]["status"],
+        }
+    return report
+
+
+def print_report(report):
+    print(f"Boot report (median of {report['runs']} fresh processes)")
+    print(f"  import app:            {report['app_import_ms']:>8.1f} ms"
+          f"  (PDF stack loaded: {'yes' if report['pdf_stack_loaded_by_import'] else 'no'})")
+    print(f"  first PDF stack use:   {report['pdf_first_use_ms']:>8.1f} ms")
+    print()
+    print(f"  {'request':<34} {'status':>6} {'first ms':>9} {'second ms':>10}")
+    for key, r in report["requests"].items():
+        print(f"  {key:<34} {r['status']:>6} {r['first_ms']:>9.1f} {r['second_ms']:>10.1f}")
+    print()
+    print("  heaviest packages imported by 'import app' (self time):")
+    for entry in report["imports"]:
+        print(f"    {entry['package']:<24} {entry['self_ms']:>8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure app import time and first-request latency.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes to measure (default 5)")
+    parser.add_argument("--top", type=int, default=12, help="Packages to list in the import breakdown")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    try:
+        report = measure(args.runs)
+        report["imports"] = import_breakdown(args.top)
+    except subprocess.CalledProcessError as e:
+        sys.exit(f"Measurement process failed:\n{e.stderr}")
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+# Entry point for the script.
+if __name__ == "__main__":
+    main()
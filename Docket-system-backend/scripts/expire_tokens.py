@@ -0,0 +1,45 @@
+# scripts/expire_tokens.py
+# This script expires every active docket token that is past its expires_at or belongs to an exam
+# other than the active one, in small batches (the same sweep the settings route starts in the
+# background when the active exam switches). Run it from cron to catch tokens whose exam calendar
+# date passed, or after a worker died mid-sweep.
+#
+# Usage: python scripts/expire_tokens.py [--exam ca2] [--batch-size 500]
+
+import os
+import sys
+import json
+import argparse
+
+# Add the backend directory to the python path for module imports
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_dir)
+
+import mysql.connector  # noqa: E402
+from utils.token_expiry import sweep_expired_tokens, TOKEN_SWEEP_BATCH_SIZE  # noqa: E402
+
+SETTINGS_FILE = os.path.join(backend_dir, "exam_settings.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Expire docket tokens of inactive exams and past their expiry.")
+    parser.add_argument("--exam", help="Active exam (default: active_exam from exam_settings.json)")
+    parser.add_argument("--batch-size", type=int, default=TOKEN_SWEEP_BATCH_SIZE, help="Tokens per transaction")
+    args = parser.parse_args()
+
+    active_exam = args.exam
+    if not active_exam:
+        with open(SETTINGS_FILE) as f:
+            active_exam = json.load(f).get("active_exam", "ca1")
+
+    try:
+        expired = sweep_expired_tokens(active_exam, batch_size=args.batch_size)
+    except mysql.connector.Error as err:
+        print(f"A database error occurred: {err}")
+        sys.exit(1)
+    print(f"{expired} tokens expired (active exam: {active_exam}).")
+
+
+# Entry point for the script.
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+# scripts/generate_dataset.py
+# This script fills a local database with a synthetic student body for load testing: students,
+# enrollments through curriculum, current-term balances with payments, clearances, dockets with
+# their tokens, and verification history. All generated students are marked created_by='loadtest'
+# so they can be removed again with --purge.
+#
+# Every generated student shares one password (hashed once). The qr_data of every active token is
+# written to --tokens-out, since only the token hashes are stored in the database, and a manifest
+# for scripts/load_test.py is written to --manifest.
+#
+# Usage: python scripts/generate_dataset.py [--students 50000] [--dockets 200000] [--verifications 300000]
+#        python scripts/generate_dataset.py --purge
+
+import os
+import sys
+import json
+import time
+import base64
+import random
+import hashlib
+import argparse
+from decimal import Decimal
+from passlib.hash import bcrypt
+
+# Add the backend directory to the python path for module imports
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_dir)
+
+from utils.db import get_db_connection, uses_db_triggers
+from repositories.clearances import recompute_clearances
+from utils import sync_cache
+
+CREATED_BY = "loadtest"
+SETTINGS_FILE = os.path.join(backend_dir, "exam_settings.json")
+
+FIRST_NAMES = [
+    "Chanda", "Mwila", "Bwalya", "Mutale", "Natasha", "Joseph", "Mary", "Peter", "Agness", "James",
+    "Ruth", "John", "Grace", "Moses", "Esther", "Daniel", "Precious", "Brian", "Memory", "Kelvin",
+    "Chileshe", "Musonda", "Lombe", "Thandiwe", "Emmanuel", "Faith", "Joshua", "Mercy", "Patrick", "Alice",
+]
+LAST_NAMES = [
+    "Banda", "Phiri", "Mwale", "Zulu", "Tembo", "Lungu", "Mulenga", "Daka", "Sakala", "Ngoma",
+    "Chirwa", "Mumba", "Kunda", "Nkhata", "Mbewe", "Chisenga", "Kabwe", "Musonda", "Simukonda", "Hamoonga",
+    "Kapembwa", "Mwanza", "Siame", "Chola", "Nyirenda", "Bukuru", "Seti", "Kalaba", "Mutati", "Njovu",
+]
+SCAN_RESULTS = ["valid"] * 85 + ["invalid"] * 6 + ["expired"] * 4 + ["reprinted"] * 3 + ["forged"] * 2
+
+
+# Helper function printing a progress line that overwrites itself.
+def progress(label, done, total):
+    sys.stdout.write(f"\r  {label}: {done}/{total}")
+    sys.stdout.flush()
+    if done >= total:
+        sys.stdout.write("\n")
+
+
+# Helper function inserting rows in batches, committing after each one.
+def insert_batches(conn, cur, sql, rows, label, batch_size):
+    total = len(rows)
+    for start in range(0, total, batch_size):
+        cur.executemany(sql, rows[start:start + batch_size])
+        conn.commit()
+        progress(label, min(start + batch_size, total), total)
+    if not total:
+        progress(label, 0, 0)
+
+
+def next_id(cur, table, column):
+    cur.execute(f"SELECT COALESCE(MAX({column}), 0) FROM {table}")
+    return cur.fetchone()[0] + 1
+
+
+# Removes everything generated by a previous run.
+def purge(conn, cur):
+    cur.execute("SELECT id FROM students WHERE created_by = %s", (CREATED_BY,))
+    ids = [row[0] for row in cur.fetchall()]
+    print(f"Removing {len(ids)} generated students and their records...")
+    for start in range(0, len(ids), 1000):
+        chunk = ids[start:start + 1000]
+        marks = ", ".join(["%s"] * len(chunk))
+        docket_ids = f"SELECT docket_id FROM dockets WHERE student_id IN ({marks})"
+        cur.execute(f"DELETE FROM verifications WHERE docket_id IN ({docket_ids})", chunk)
+        cur.execute(f"DELETE FROM docket_tokens WHERE docket_id IN ({docket_ids})", chunk)
+        for table in ("dockets", "payments", "clearances", "student_balances", "enrollments"):
+            cur.execute(f"DELETE FROM {table} WHERE student_id IN ({marks})", chunk)
+        cur.execute(f"DELETE FROM students WHERE id IN ({marks})", chunk)
+        conn.commit()
+        progress("students removed", start + len(chunk), len(ids))
+
+
+def generate(conn, cur, args):
+    rng = random.Random(args.seed)
+    now = time.strftime("%Y-%m-%d %H:%M:%S")
+    with open(SETTINGS_FILE) as f:
+        active_exam = json.load(f).get("active_exam", "ca1")
+
+    cur.execute("SELECT COUNT(*) FROM students WHERE student_number BETWEEN %s AND %s",
+                (str(args.first_number), str(args.first_number + args.students - 1)))
+    if cur.fetchone()[0]:
+        sys.exit("Student numbers in that range already exist; run with --purge first or change --first-number.")
+
+    cur.execute("SELECT programme_id, total_fee FROM programmes")
+    programmes = cur.fetchall()
+    cur.execute("SELECT curriculum_id, programme_id, year_of_study, semester FROM curriculum")
+    curriculum = {}
+    for curriculum_id, programme_id, year, semester in cur.fetchall():
+        curriculum.setdefault((programme_id, year, semester), []).append(curriculum_id)
+    terms = sorted(curriculum)
+    if not terms:
+        sys.exit("The curriculum table is empty; load the schema dump first.")
+    fees = {programme_id: Decimal(total_fee) for programme_id, total_fee in programmes}
+    cur.execute("SELECT admin_id FROM admins ORDER BY admin_id LIMIT 1")
+    admin = cur.fetchone()
+    admin_id = admin[0] if admin else 1
+
+    print(f"Hashing the shared password (bcrypt, {args.bcrypt_rounds} rounds)...")
+    password_hash = bcrypt.using(rounds=args.bcrypt_rounds).hash(args.password)
+
+    # Students, each placed in a programme/year/semester that has courses in the curriculum
+    first_id = next_id(cur, "students", "id")
+    students, enrollments, balances, payments, clearances = [], [], [], [], []
+    triggers = uses_db_triggers()
+    for i in range(args.students):
+        student_id = first_id + i
+        number = str(args.first_number + i)
+        programme_id, year, semester = rng.choice(terms)
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        email = f"{first[0]}{last[0]}{number}@students.cavendish.co.zm".lower()
+        students.append((student_id, number, first, last, email, programme_id, year, semester,
+                         "", "active", now, CREATED_BY, password_hash))
+        for curriculum_id in curriculum[(programme_id, year, semester)]:
+            enrollments.append((student_id, curriculum_id, year, semester, "active", now, now))
+
+        # Roughly a quarter haven't paid, a quarter have paid in full, the rest are part-way
+        fee = fees.get(programme_id, Decimal("10000.00"))
+        roll = rng.random()
+        paid = Decimal(0) if roll < 0.25 else fee if roll > 0.75 else (fee * Decimal(rng.randint(5, 95)) / 100).quantize(Decimal("0.01"))
+        # On XAMPP the payments trigger adds each payment to the balance itself
+        balances.append((student_id, programme_id, year, semester, fee, Decimal(0) if triggers else paid))
+        if paid:
+            payments.append((student_id, programme_id, paid, "General", now, "completed", f"LT{number}", now))
+        clearances.append((student_id, programme_id, year, semester))
+
+    print(f"Generating {args.students} students in {len(terms)} programme terms...")
+    insert_batches(conn, cur, """
+        INSERT INTO students (id, student_number, first_name, last_name, email, programme_id, current_year,
+                              current_semester, password, status, created_at, created_by, password_hash)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """, students, "students", args.batch_size)
+    insert_batches(conn, cur, """
+        INSERT INTO enrollments (student_id, curriculum_id, year_of_study, semester, enrollment_status, created_at, updated_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """, enrollments, "enrollments", args.batch_size)
+    insert_batches(conn, cur, """
+        INSERT INTO student_balances (student_id, programme_id, year_of_study, semester, total_fee, amount_paid)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """, balances, "balances", args.batch_size)
+    insert_batches(conn, cur, """
+        INSERT INTO payments (student_id, programme_id, amount, payment_type, payment_date, payment_status, receipt_number, created_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    """, payments, "payments", args.batch_size)
+    insert_batches(conn, cur, """
+        INSERT INTO clearances (student_id, programme_id, year_of_study, semester)
+        VALUES (%s, %s, %s, %s)
+    """, clearances, "clearances", args.batch_size)
+
+    print("Computing clearances...")
+    recompute_clearances(cur)
+    conn.commit()
+
+    status_column = {"ca1": "ca1_status", "ca2": "ca2_status", "exam": "exam_status"}.get(active_exam, "ca1_status")
+    cur.execute(f"""
+        SELECT s.id FROM students s
+        JOIN clearances c ON c.student_id = s.id AND c.programme_id = s.programme_id
+            AND c.year_of_study = s.current_year AND c.semester = s.current_semester
+        WHERE s.created_by = %s AND c.{status_column} = 'eligible'
+    """, (CREATED_BY,))
+    eligible_ids = [row[0] for row in cur.fetchall()]
+    print(f"{len(eligible_ids)} students are cleared for {active_exam.upper()}.")
+
+    # Dockets and tokens for cleared students, most still active, some already scanned or reprinted
+    dockets, tokens, active_qr = [], [], []
+    docket_ids = []
+    if eligible_ids and args.dockets:
+        first_docket_id = next_id(cur, "dockets", "docket_id")
+        by_id = {row[0]: row for row in students}
+        for i in range(args.dockets):
+            docket_id = first_docket_id + i
+            student = by_id[rng.choice(eligible_ids)]
+            token_value = base64.urlsafe_b64encode(rng.getrandbits(128).to_bytes(16, "big")).rstrip(b"=").decode()
+            qr_data = f"{student[1]}|{active_exam}|{token_value}"
+            roll = rng.random()
+            status = "used" if roll < 0.3 else "reprinted" if roll < 0.35 else "active"
+            dockets.append((docket_id, student[0], student[5], active_exam, student[6], student[7], qr_data,
+                            now, "active", 1, now, now))
+            tokens.append((docket_id, hashlib.sha256(token_value.encode()).hexdigest(), now, status,
+                           now if status == "used" else None))
+            docket_ids.append(docket_id)
+            if status == "active":
+                active_qr.append(qr_data)
+
+    print(f"Generating {len(dockets)} dockets and tokens...")
+    insert_batches(conn, cur, """
+        INSERT INTO dockets (docket_id, student_id, programme_id, exam_type, year_of_study, semester, qr_code,
+                             issued_at, status, printed_count, created_at, updated_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """, dockets, "dockets", args.batch_size)
+    insert_batches(conn, cur, """
+        INSERT INTO docket_tokens (docket_id, token_hash, issued_at, status, used_at)
+        VALUES (%s, %s, %s, %s, %s)
+    """, tokens, "tokens", args.batch_size)
+
+    verifications = []
+    if docket_ids:
+        for _ in range(args.verifications):
+            scanned_at = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(time.time() - rng.randint(0, 30 * 86400)))
+            verifications.append((rng.choice(docket_ids), admin_id, scanned_at, rng.choice(SCAN_RESULTS), None))
+    print(f"Generating {len(verifications)} verifications...")
+    insert_batches(conn, cur, """
+        INSERT INTO verifications (docket_id, scanned_by, scanned_at, scan_result, remarks)
+        VALUES (%s, %s, %s, %s, %s)
+    """, verifications, "verifications", args.batch_size)
+
+    with open(args.tokens_out, "w") as f:
+        f.write("\n".join(active_qr) + ("\n" if active_qr else ""))
+
+    manifest = {
+        "password": args.password,
+        "first_student_number": args.first_number,
+        "students": args.students,
+        "active_exam": active_exam,
+        "eligible_student_ids": rng.sample(eligible_ids, min(len(eligible_ids), 5000)),
+        "tokens_file": os.path.abspath(args.tokens_out),
+        "active_tokens": len(active_qr),
+    }
+    with open(args.manifest, "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Wrote {len(active_qr)} active tokens to {args.tokens_out} and the manifest to {args.manifest}.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill the database with synthetic load-test data.")
+    parser.add_argument("--students", type=int, default=50000)
+    parser.add_argument("--dockets", type=int, default=200000, help="Dockets (one token each) to issue")
+    parser.add_argument("--verifications", type=int, default=300000)
+    parser.add_argument("--first-number", type=int, default=200000,
+                        help="First student number; generated numbers must fit the 6-character column")
+    parser.add_argument("--password", default="LoadTest2025", help="Password shared by every generated student")
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per INSERT batch")
+    parser.add_argument("--seed", type=int, default=2025)
+    parser.add_argument("--tokens-out", default="loadtest_tokens.txt", help="Where to write active token QR data")
+    parser.add_argument("--manifest", default="loadtest_manifest.json")
+    parser.add_argument("--purge", action="store_true", help="Remove previously generated data and exit")
+    args = parser.parse_args()
+
+    if args.first_number + args.students - 1 > 999999:
+        sys.exit("Student numbers would not fit in 6 characters; lower --first-number or --students.")
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    started = time.time()
+    try:
+        if args.purge:
+            purge(conn, cur)
+        else:
+            generate(conn, cur, args)
+    finally:
+        cur.close()
+        conn.close()
+    # Scanners pick up the new (or removed) students and tokens on their next sync.
+    sync_cache.students.bump()
+    sync_cache.tokens.bump()
+    print(f"Done in {time.time() - started:.1f}s.")
+
+
+# Entry point for the script.
+if __name__ == "__main__":
+    main()
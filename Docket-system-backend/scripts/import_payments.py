@@ -0,0 +1,52 @@
+# scripts/import_payments.py
+# This script records a batch of payments from a bank-statement CSV with the columns
+# student_number, amount, receipt_number. Receipts that are already in the database are
+# skipped, so the same file can be re-run safely after a partial failure.
+#
+# Usage: python scripts/import_payments.py statement.csv [--chunk-size 500]
+
+import os
+import sys
+import argparse
+
+# Add the backend directory to the python path for module imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.db import get_db_connection
+from utils.payment_import import parse_payment_csv, import_payments, DEFAULT_CHUNK_SIZE
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import payments from a CSV file.")
+    parser.add_argument("csv_path", help="CSV file with student_number, amount, receipt_number columns")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"Rows written per transaction (default {DEFAULT_CHUNK_SIZE})")
+    args = parser.parse_args()
+
+    with open(args.csv_path, "r", encoding="utf-8-sig", newline="") as f:
+        rows, invalid = parse_payment_csv(f.read())
+
+    for item in invalid:
+        print(f"Line {item['line']}: {item['error']}")
+
+    conn = get_db_connection()
+    try:
+        summary = import_payments(conn, rows, chunk_size=args.chunk_size)
+    finally:
+        conn.close()
+
+    print(f"{summary['inserted']} payments recorded, {summary['duplicates']} duplicate receipts skipped.")
+    if summary["unknown_students"]:
+        print(f"Unknown student numbers: {', '.join(sorted(set(summary['unknown_students'])))}")
+    if summary["no_balance_record"]:
+        print(f"No current balance record: {', '.join(sorted(set(summary['no_balance_record'])))}")
+    for chunk in summary["failed_chunks"]:
+        print(f"Lines {chunk['first_line']}-{chunk['last_line']} failed: {chunk['error']}")
+
+    # Non-zero exit so a scheduled job notices a partial import
+    sys.exit(1 if summary["failed_chunks"] else 0)
+
+
+# Entry point for the script.
+if __name__ == "__main__":
+    main()
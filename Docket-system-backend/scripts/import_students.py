@@ -0,0 +1,91 @@
+# scripts/import_students.py
+# This script onboards a new intake from a students CSV with the columns student_number,
+# first_name, last_name, email, programme_code (or programme_id), current_year,
+# current_semester, password. Optional CSVs give each student's courses (student_number,
+# course_code) and fee total (student_number, total_fee); without them students are enrolled in
+# their programme's curriculum for the term and billed the programme's total_fee. Students that
+# already exist are skipped, so the same files can be re-run safely after a partial failure.
+#
+# Usage: python scripts/import_students.py students.csv [--enrollments courses.csv] [--fees fees.csv]
+#                                          [--chunk-size 500] [--workers N] [--bcrypt-rounds 12]
+
+import os
+import sys
+import argparse
+import time
+
+# Add the backend directory to the python path for module imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.db import get_db_connection
+from utils.student_import import (
+    read_student_csv, read_enrollment_csv, read_fee_csv, import_students,
+    DEFAULT_CHUNK_SIZE, STUDENT_IMPORT_HASH_WORKERS, STUDENT_IMPORT_BCRYPT_ROUNDS,
+)
+from utils import sync_cache
+
+
+def read_optional(path, read, invalid):
+    if not path:
+        return {}
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        return read(f, invalid)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import students, enrollments and fee totals from CSV files.")
+    parser.add_argument("csv_path", help="Students CSV file")
+    parser.add_argument("--enrollments", help="CSV file with student_number, course_code columns")
+    parser.add_argument("--fees", help="CSV file with student_number, total_fee columns")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"Students written per transaction (default {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument("--workers", type=int, default=STUDENT_IMPORT_HASH_WORKERS,
+                        help=f"Password hashing processes (default {STUDENT_IMPORT_HASH_WORKERS})")
+    parser.add_argument("--bcrypt-rounds", type=int, default=STUDENT_IMPORT_BCRYPT_ROUNDS,
+                        help=f"bcrypt cost factor (default {STUDENT_IMPORT_BCRYPT_ROUNDS})")
+    args = parser.parse_args()
+
+    invalid = []
+    try:
+        enrollments = read_optional(args.enrollments, read_enrollment_csv, invalid)
+        fees = read_optional(args.fees, read_fee_csv, invalid)
+        f = open(args.csv_path, "r", encoding="utf-8-sig", newline="")
+        rows = read_student_csv(f, invalid)
+    except ValueError as e:
+        sys.exit(str(e))
+
+    started = time.perf_counter()
+    conn = get_db_connection()
+    try:
+        summary = import_students(conn, rows, enrollments, fees, chunk_size=args.chunk_size,
+                                  workers=args.workers, bcrypt_rounds=args.bcrypt_rounds)
+    finally:
+        conn.close()
+        f.close()
+
+    # Scanners refetch the student list on their next sync
+    if summary["inserted"]:
+        sync_cache.students.bump()
+
+    for item in invalid:
+        print(f"{item['file'].capitalize()} line {item['line']}: {item['error']}")
+    for item in summary["unknown_programmes"]:
+        print(f"Line {item['line']}: unknown programme '{item['programme']}'")
+    for item in summary["email_conflicts"]:
+        print(f"Line {item['line']}: email {item['email']} belongs to another student")
+    if summary["unknown_courses"]:
+        print(f"Unknown course codes: {', '.join(sorted(set(summary['unknown_courses'])))}")
+    print(f"{summary['inserted']} students created, {summary['existing']} already existed, "
+          f"{summary['duplicates']} repeated in the file ({time.perf_counter() - started:.1f}s).")
+    print(f"{summary['balances']} balances, {summary['clearances']} clearances and "
+          f"{summary['enrollments']} enrollments created.")
+    for chunk in summary["failed_chunks"]:
+        print(f"Lines {chunk['first_line']}-{chunk['last_line']} failed: {chunk['error']}")
+
+    # Non-zero exit so a scheduled job notices a partial import
+    sys.exit(1 if summary["failed_chunks"] else 0)
+
+
+# Entry point for the script.
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# scripts/init_sqlite.py
+# This script creates the SQLite database used with DB_PLATFORM=SQLITE and loads the reference
+# and sample data (programmes, courses, curriculum, fee_schedule, admins, the sample students...)
+# from the INSERT statements of docket_system2_xampp.sql.
+#
+# Usage: DB_PLATFORM=SQLITE python scripts/init_sqlite.py [--path docket_system2.sqlite3] [--force]
+
+import os
+import sys
+import sqlite3
+import argparse
+
+# Add the backend directory to the python path for module imports
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_dir)
+
+from utils.sqlite_db import SQLITE_PATH, create_schema
+
+DUMP_FILE = os.path.join(backend_dir, "docket_system2_xampp.sql")
+
+
+# Yields the INSERT statements of a phpMyAdmin dump. They are plain multi-row INSERTs with
+# backtick-quoted identifiers, which SQLite accepts as they are.
+def dump_inserts(path):
+    statement = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not statement and not line.startswith("INSERT INTO"):
+                continue
+            statement.append(line)
+            if line.rstrip().endswith(");"):
+                yield "".join(statement)
+                statement = []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create and seed the local SQLite database.")
+    parser.add_argument("--path", default=SQLITE_PATH, help=f"Database file (default {SQLITE_PATH})")
+    parser.add_argument("--dump", default=DUMP_FILE, help="MariaDB dump to take the data from")
+    parser.add_argument("--force", action="store_true", help="Replace an existing database file")
+    args = parser.parse_args()
+
+    if os.path.exists(args.path):
+        if not args.force:
+            sys.exit(f"{args.path} already exists; use --force to replace it.")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.path + suffix):
+                os.remove(args.path + suffix)
+
+    create_schema(args.path)
+    conn = sqlite3.connect(args.path)
+    loaded = 0
+    try:
+        for statement in dump_inserts(args.dump):
+            conn.execute(statement)
+            loaded += 1
+        conn.commit()
+        counts = {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("programmes", "courses", "curriculum", "students", "student_balances", "clearances", "admins")
+        }
+    finally:
+        conn.close()
+
+    print(f"Created {args.path} from {loaded} INSERT statements.")
+    print(", ".join(f"{table}: {count}" for table, count in counts.items()))
+    print("Run the app with DB_PLATFORM=SQLITE" + (f" SQLITE_PATH={args.path}" if args.path != SQLITE_PATH else "") + ".")
+
+
+# Entry point for the script.
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+# scripts/load_test.py
+# This script replays exam-day traffic against a running backend and reports throughput and
+# latency percentiles per scenario. It reads the manifest written by scripts/generate_dataset.py.
+#
+# Scenarios:
+#   login    - login storm: students logging in at once (bcrypt-bound)
+#   dockets  - docket-download rush: cleared students generating their PDF docket
+#   scan     - exam-hall scan burst: invigilators verifying distinct QR codes
+#   sync     - offline sync flood: scanners coming back online, pulling the student and token lists
+#              and pushing their queued verifications
+#
+# Usage: python scripts/load_test.py --admin-user ADMIN --admin-password PASS [--scenario all]
+#        [--base-url http://127.0.0.1:5000] [--concurrency 50] [--requests 1000] [--json results.json]
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import urllib.error
+import urllib.request
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+SCENARIOS = ("login", "dockets", "scan", "sync")
+
+
+class Client:
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    # Sends one request and returns (status, body bytes, seconds). Network errors come back as status 0.
+    def request(self, method, path, payload=None, token=None):
+        data = json.dumps(payload).encode() if payload is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method)
+        if data is not None:
+            req.add_header("Content-Type", "application/json")
+        if token:
+            req.add_header("Authorization", f"Bearer {token}")
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                body = resp.read()
+                status = resp.status
+        except urllib.error.HTTPError as e:
+            body, status = e.read(), e.code
+        except (urllib.error.URLError, OSError):
+            body, status = b"", 0
+        return status, body, time.perf_counter() - started
+
+    def login(self, username, password, role):
+        status, body, _ = self.request("POST", "/login", {"student_number": username, "password": password, "role": role})
+        if status != 200:
+            raise SystemExit(f"Login as {role} {username} failed with HTTP {status}: {body[:200]!r}")
+        return json.loads(body)["token"]
+
+
+# Collects (label, status, seconds) samples from the worker threads.
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+
+    def add(self, label, status, seconds):
+        with self._lock:
+            self.samples[label].append(seconds)
+            self.statuses[label][status] += 1
+
+
+# Nearest-rank percentile of an already sorted list.
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(scenario, recorder, wall_seconds):
+    results = []
+    for label, samples in sorted(recorder.samples.items()):
+        samples.sort()
+        statuses = recorder.statuses[label]
+        results.append({
+            "scenario": scenario,
+            "endpoint": label,
+            "requests": len(samples),
+            "errors": sum(n for status, n in statuses.items() if status == 0 or status >= 500),
+            "statuses": {str(k): v for k, v in sorted(statuses.items())},
+            "throughput_rps": round(len(samples) / wall_seconds, 1) if wall_seconds else 0,
+            "p50_ms": round(percentile(samples, 50) * 1000, 1),
+            "p95_ms": round(percentile(samples, 95) * 1000, 1),
+            "p99_ms": round(percentile(samples, 99) * 1000, 1),
+            "max_ms": round(samples[-1] * 1000, 1),
+        })
+    return results
+
+
+# Runs `task(i)` for i in range(total) on `concurrency` threads and returns the wall time.
+def run_tasks(task, total, concurrency):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in pool.map(task, range(total)):
+            pass
+    return time.perf_counter() - started
+
+
+def load_tokens(manifest):
+    with open(manifest["tokens_file"]) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+# --- Scenarios ---
+
+def scenario_login(client, manifest, args, admin_token, recorder, rng):
+    first = manifest["first_student_number"]
+    numbers = [str(first + rng.randrange(manifest["students"])) for _ in range(args.requests)]
+
+    def task(i):
+        status, _, seconds = client.request("POST", "/login", {
+            "student_number": numbers[i], "password": manifest["password"], "role": "student",
+        })
+        recorder.add("POST /login", status, seconds)
+    return run_tasks(task, args.requests, args.concurrency)
+
+
+def scenario_dockets(client, manifest, args, admin_token, recorder, rng):
+    student_ids = manifest["eligible_student_ids"]
+    if not student_ids:
+        raise SystemExit("The manifest has no cleared students; nothing to download.")
+    exam = manifest["active_exam"]
+    picks = [rng.choice(student_ids) for _ in range(args.requests)]
+
+    def task(i):
+        status, _, seconds = client.request(
+            "GET", f"/dockets/generate?student_id={picks[i]}&exam_type={exam}", token=admin_token)
+        recorder.add("GET /dockets/generate", status, seconds)
+    return run_tasks(task, args.requests, args.concurrency)
+
+
+def scenario_scan(client, manifest, args, admin_token, recorder, rng):
+    tokens = load_tokens(manifest)
+    rng.shuffle(tokens)
+    # Each QR code is scanned once, as at the exam-hall door; repeat scans are "already used"
+    qr_codes = [tokens[i % len(tokens)] for i in range(args.requests)] if tokens else []
+    if not qr_codes:
+        raise SystemExit("No active tokens in the tokens file; regenerate the dataset.")
+
+    def task(i):
+        status, _, seconds = client.request("POST", "/verification/verify", {"qr_data": qr_codes[i]}, token=admin_token)
+        recorder.add("POST /verification/verify", status, seconds)
+    return run_tasks(task, args.requests, args.concurrency)
+
+
+def scenario_sync(client, manifest, args, admin_token, recorder, rng):
+    tokens = load_tokens(manifest)
+    rng.shuffle(tokens)
+
+    # Each unit of work is one scanner reconnecting: pull both lists, then push its queue.
+    def task(i):
+        for path in ("/dockets/sync/students", "/dockets/sync/tokens"):
+            status, _, seconds = client.request("GET", path, token=admin_token)
+            recorder.add(f"GET {path}", status, seconds)
+        start = (i * args.sync_batch) % max(len(tokens), 1)
+        pending = [{"qr_data": qr} for qr in tokens[start:start + args.sync_batch]]
+        status, _, seconds = client.request("POST", "/verification/sync", {"pending_verifications": pending}, token=admin_token)
+        recorder.add("POST /verification/sync", status, seconds)
+    return run_tasks(task, args.requests, args.concurrency)
+
+
+RUNNERS = {
+    "login": scenario_login,
+    "dockets": scenario_dockets,
+    "scan": scenario_scan,
+    "sync": scenario_sync,
+}
+
+
+def print_results(results):
+    header = f"{'scenario':<9} {'endpoint':<28} {'reqs':>6} {'err':>5} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['scenario']:<9} {r['endpoint']:<28} {r['requests']:>6} {r['errors']:>5} {r['throughput_rps']:>8} "
+              f"{r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} {r['max_ms']:>8}")
+        other = {k: v for k, v in r["statuses"].items() if k != "200"}
+        if other:
+            print(f"{'':<9} {'':<28} statuses: {other}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run exam-day load scenarios against the backend.")
+    parser.add_argument("--base-url", default=os.getenv("LOADTEST_BASE_URL", "http://127.0.0.1:5000"))
+    parser.add_argument("--scenario", choices=SCENARIOS + ("all",), default="all")
+    parser.add_argument("--manifest", default="loadtest_manifest.json")
+    parser.add_argument("--admin-user", default=os.getenv("LOADTEST_ADMIN_USER"))
+    parser.add_argument("--admin-password", default=os.getenv("LOADTEST_ADMIN_PASSWORD"))
+    parser.add_argument("--concurrency", type=int, default=50, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=1000, help="Requests (or scanner reconnects) per scenario")
+    parser.add_argument("--sync-batch", type=int, default=50, help="Queued verifications pushed per sync")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=2025)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    with open(args.manifest) as f:
+        manifest = json.load(f)
+    client = Client(args.base_url, args.timeout)
+    scenarios = SCENARIOS if args.scenario == "all" else (args.scenario,)
+
+    admin_token = None
+    if any(s != "login" for s in scenarios):
+        if not args.admin_user or not args.admin_password:
+            raise SystemExit("--admin-user and --admin-password are needed for the dockets, scan and sync scenarios.")
+        admin_token = client.login(args.admin_user, args.admin_password, "admin")
+
+    results = []
+    for scenario in scenarios:
+        print(f"Running {scenario} ({args.requests} x {args.concurrency} concurrent)...")
+        recorder = Recorder()
+        wall = RUNNERS[scenario](client, manifest, args, admin_token, recorder, random.Random(args.seed))
+        results.extend(summarize(scenario, recorder, wall))
+
+    print()
+    print_results(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    # Non-zero exit when any request failed outright, so CI runs notice
+    sys.exit(1 if any(r["errors"] for r in results) else 0)
+
+
+# Entry point for the script.
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# scripts/preissue_dockets.py
+# This script issues and pre-renders dockets for every student cleared for the active exam who
+# doesn't have a usable one stored yet (the pass /admin/settings starts with "preissue": true).
+# Run it on the web server's machine: the PDFs go to DOCKET_ARTIFACT_DIR and are indexed in the
+# local store the workers read (see utils/docket_preissue.py).
+#
+# Usage: python scripts/preissue_dockets.py [--exam ca2] [--workers 4] [--batch-size 500]
+
+import os
+import sys
+import json
+import time
+import argparse
+
+# Add the backend directory to the python path for module imports
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_dir)
+
+import mysql.connector  # noqa: E402
+from utils import sync_cache  # noqa: E402
+from utils.events import publish  # noqa: E402
+from utils.docket_preissue import preissue, PREISSUE_WORKERS, PREISSUE_BATCH_SIZE  # noqa: E402
+
+SETTINGS_FILE = os.path.join(backend_dir, "exam_settings.json")
+BLOCKLIST_FILE = os.path.join(backend_dir, "blocked_students.json")
+
+
+def read_json(path, default):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return default
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-issue and render dockets for cleared students.")
+    parser.add_argument("--exam", help="Exam to issue for (default: active_exam from exam_settings.json)")
+    parser.add_argument("--workers", type=int, default=PREISSUE_WORKERS, help="Render processes")
+    parser.add_argument("--batch-size", type=int, default=PREISSUE_BATCH_SIZE, help="Dockets per transaction")
+    args = parser.parse_args()
+
+    settings = read_json(SETTINGS_FILE, {"active_exam": "ca1"})
+    exam_type = args.exam or settings.get("active_exam", "ca1")
+
+    started = time.time()
+    try:
+        issued = preissue(exam_type, blocklist=read_json(BLOCKLIST_FILE, []), settings=settings,
+                          workers=args.workers, batch_size=args.batch_size)
+    except mysql.connector.Error as err:
+        print(f"A database error occurred: {err}")
+        sys.exit(1)
+    if issued:
+        sync_cache.tokens.bump()
+        publish("tokens", change="issued", count=issued, resync=True, exam_type=exam_type)
+    print(f"Pre-issued {issued} {exam_type} dockets in {time.time() - started:.1f}s.")
+
+
+# Entry point for the script.
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+# scripts/recompute_clearances.py
+# This script recomputes every student's current-term clearance against the fee_schedule
+# in a single set-based pass. Run it after editing fee_schedule directly in the database.
+#
+# Usage: python scripts/recompute_clearances.py
+
+import os
+import sys
+
+# Add the backend directory to the python path for module imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.db import get_db_connection
+from repositories.clearances import recompute_clearances
+from utils import eligibility_cache
+
+
+# Entry point for the script.
+if __name__ == "__main__":
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        changed = recompute_clearances(cur)
+        conn.commit()
+        if changed:
+            eligibility_cache.invalidate_all()
+        print(f"{changed} clearance rows changed.")
+    except Exception as e:
+        conn.rollback()
+        print(f"An error occurred: {e}")
+        sys.exit(1)
+    finally:
+        cur.close()
+        conn.close()
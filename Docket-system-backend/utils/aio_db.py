@@ -0,0 +1,128 @@
+import os
+import ssl
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+import aiomysql
+from utils.db import connection_config
+from utils.metrics import DB_QUERY_SECONDS, DB_QUERY_ROWS, fingerprint
+
+# Async MySQL/TiDB access for the async serving path (asgi.py).
+# Uses the same connection settings as utils/db.py, translated for aiomysql. Each process keeps
+# one pool of up to ASYNC_DB_POOL_SIZE connections; a request waiting for a connection only parks
+# its coroutine, so hundreds of scanners can be in flight while a few connections do the work.
+# Statements are timed into the same /metrics histograms as the sync cursors.
+
+ASYNC_DB_POOL_SIZE = int(os.getenv("ASYNC_DB_POOL_SIZE", 20))
+ASYNC_DB_POOL_MIN = int(os.getenv("ASYNC_DB_POOL_MIN", 2))
+
+logger = logging.getLogger(__name__)
+
+
+# Helper function turning the mysql.connector settings into aiomysql keyword arguments.
+def aiomysql_config():
+    config = connection_config()
+    kwargs = dict(
+        host=config["host"],
+        port=config.get("port", 3306),
+        user=config["user"],
+        password=config["password"],
+        db=config["database"],
+        autocommit=False,
+    )
+    if not config.get("ssl_disabled"):
+        # TiDB: verify against the CA when one is configured, as the sync connections do.
+        context = ssl.create_default_context(cafile=config.get("ssl_ca"))
+        if not config.get("ssl_verify_cert"):
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        kwargs["ssl"] = context
+    return kwargs
+
+
+# Async cursor proxy that records statement latency and affected rows, like InstrumentedCursor.
+class AsyncCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    async def execute(self, operation, params=()):
+        started = time.perf_counter()
+        try:
+            return await self._cursor.execute(operation, params)
+        finally:
+            query = fingerprint(operation)
+            DB_QUERY_SECONDS.labels(query).observe(time.perf_counter() - started)
+            if self._cursor.description is None and self._cursor.rowcount and self._cursor.rowcount > 0:
+                DB_QUERY_ROWS.labels(query).inc(self._cursor.rowcount)
+
+    async def fetchone(self):
+        return await self._cursor.fetchone()
+
+    async def fetchall(self):
+        return await self._cursor.fetchall()
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+
+class AsyncPool:
+    def __init__(self, size=ASYNC_DB_POOL_SIZE):
+        self.size = size
+        self._pool = None
+        self._lock = None
+
+    # Creates the pool on first use (or at startup, see asgi.py). aiomysql pools belong to the
+    # event loop that created them, so this must run inside the serving loop.
+    async def open(self):
+        if self._pool is None:
+            if self._lock is None:
+                self._lock = asyncio.Lock()
+            async with self._lock:
+                if self._pool is None:
+                    self._pool = await aiomysql.create_pool(
+                        minsize=min(ASYNC_DB_POOL_MIN, self.size), maxsize=self.size, **aiomysql_config()
+                    )
+        return self._pool
+
+    async def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = None
+
+    # Runs the block in one transaction on a dictionary cursor: committed when the block
+    # finishes, rolled back when it raises.
+    @asynccontextmanager
+    async def transaction(self):
+        pool = await self.open()
+        async with pool.acquire() as conn:
+            await conn.begin()
+            try:
+                async with conn.cursor(aiomysql.DictCursor) as cur:
+                    yield AsyncCursor(cur)
+                await conn.commit()
+            except BaseException:
+                await conn.rollback()
+                raise
+
+    # Snapshot of pool usage, in the same shape as ConnectionPool.stats().
+    def stats(self):
+        if self._pool is None:
+            return {"size": self.size, "in_use": 0, "initialized": False}
+        in_use = self._pool.size - self._pool.freesize
+        return {
+            "size": self.size,
+            "open": self._pool.size,
+            "in_use": in_use,
+            "saturation": round(in_use / self.size, 2) if self.size else None,
+            "initialized": True,
+        }
+
+
+aio_pool = AsyncPool()
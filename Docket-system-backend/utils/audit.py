@@ -0,0 +1,194 @@
+import atexit
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import deque
+from datetime import datetime
+from flask import request, has_request_context
+from mysql.connector import errors
+from utils.db import get_db_connection
+
+# Audit trail written to the audit_logs table.
+# Writing each event synchronously would add another round trip to TiDB on the request path, so
+# events are queued in-process and a background thread writes them in multi-row INSERTs whenever
+# AUDIT_BATCH_SIZE events are waiting or AUDIT_FLUSH_SECONDS have passed. The queue is bounded:
+# when it is full, or the DB can't be reached, events are appended to a JSON-lines spill file that
+# is replayed on the next successful flush. gunicorn's worker_exit hook and atexit flush what's left.
+# A batch the database refuses for its content (not because it is unreachable) is retried one event
+# at a time, and the events that still fail are logged and dropped, so one bad event can't block the
+# trail or grow the spill file for good.
+
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", 200))
+AUDIT_FLUSH_SECONDS = float(os.getenv("AUDIT_FLUSH_SECONDS", 2))
+AUDIT_QUEUE_MAX = int(os.getenv("AUDIT_QUEUE_MAX", 10000))
+AUDIT_SPILL_FILE = os.getenv("AUDIT_SPILL_FILE", os.path.join(tempfile.gettempdir(), "docket_audit_spill.jsonl"))
+USER_TYPES = ("student", "admin")  # audit_logs.user_type enum
+
+# Errors meaning the database couldn't be reached or the connection dropped: the events are spilled
+# and replayed later. Any other error is blamed on the events themselves.
+_UNAVAILABLE_ERRORS = (errors.InterfaceError, errors.OperationalError, errors.PoolError)
+
+INSERT_SQL = """
+    INSERT INTO audit_logs (user_type, user_id, action_type, action_description, action_time, ip_address)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+logger = logging.getLogger(__name__)
+
+
+# Helper function returning the caller's IP, honouring the proxy header Render sets.
+def client_ip():
+    if not has_request_context():
+        return None
+    forwarded = request.headers.get("X-Forwarded-For", "")
+    ip = forwarded.split(",")[0].strip() if forwarded else request.remote_addr
+    return ip[:50] if ip else None
+
+
+class AuditLog:
+    def __init__(self):
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._spill_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stopping = False
+
+    # Queues one event. Never blocks the request and never raises.
+    def record(self, user_type, user_id, action_type, description=None, ip_address=None):
+        event = (
+            user_type if user_type in USER_TYPES else "student",
+            int(user_id or 0),
+            action_type[:100],
+            description,
+            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            ip_address if ip_address is not None else client_ip(),
+        )
+        with self._cond:
+            self._ensure_thread()
+            if len(self._queue) >= AUDIT_QUEUE_MAX:
+                self._spill([event])
+                return
+            self._queue.append(event)
+            if len(self._queue) >= AUDIT_BATCH_SIZE:
+                self._cond.notify()
+
+    # Starts the flusher thread in this process (again after a fork, since threads don't survive it).
+    def _ensure_thread(self):
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="audit-flusher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if len(self._queue) < AUDIT_BATCH_SIZE and not self._stopping:
+                    self._cond.wait(AUDIT_FLUSH_SECONDS)
+                if self._stopping:
+                    return
+            self.flush()
+
+    def _take_batch(self):
+        with self._cond:
+            batch = []
+            while self._queue and len(batch) < AUDIT_BATCH_SIZE:
+                batch.append(self._queue.popleft())
+            return batch
+
+    def _spill(self, events):
+        with self._spill_lock:
+            try:
+                with open(AUDIT_SPILL_FILE, "a") as f:
+                    for event in events:
+                        f.write(json.dumps(event) + "\n")
+            except OSError as e:
+                logger.error(f"Dropped {len(events)} audit events, spill file unavailable: {e}")
+
+    # Moves the spill file aside and returns its events, to be written with the next batch.
+    def _take_spilled(self):
+        with self._spill_lock:
+            if not os.path.exists(AUDIT_SPILL_FILE):
+                return []
+            replay_path = f"{AUDIT_SPILL_FILE}.{os.getpid()}.replay"
+            try:
+                os.replace(AUDIT_SPILL_FILE, replay_path)
+                with open(replay_path) as f:
+                    events = [tuple(json.loads(line)) for line in f if line.strip()]
+                os.remove(replay_path)
+                return events
+            except FileNotFoundError:
+                return []  # Another worker picked it up first
+            except (OSError, ValueError) as e:
+                logger.error(f"Could not replay audit spill file: {e}")
+                return []
+
+    # Writes everything queued so far (and anything spilled earlier) to audit_logs.
+    def flush(self):
+        batch = self._take_batch()
+        if not batch:
+            return
+        pending = self._take_spilled() + batch
+        conn = None
+        written = 0
+        try:
+            conn = get_db_connection()
+            cur = conn.cursor()
+            for start in range(0, len(pending), AUDIT_BATCH_SIZE):
+                chunk = pending[start:start + AUDIT_BATCH_SIZE]
+                try:
+                    cur.executemany(INSERT_SQL, chunk)
+                    conn.commit()
+                except _UNAVAILABLE_ERRORS:
+                    raise
+                except Exception as e:
+                    conn.rollback()
+                    logger.warning(f"Audit batch refused ({e}), writing its {len(chunk)} events one by one")
+                    self._write_each(conn, cur, chunk)
+                written = start + len(chunk)
+            cur.close()
+        except Exception as e:
+            logger.warning(f"Audit flush failed, spilling {len(pending) - written} events to disk: {e}")
+            self._spill(pending[written:])
+        finally:
+            if conn:
+                conn.close()
+        # Keep going if more than one batch had piled up.
+        if len(self._queue) >= AUDIT_BATCH_SIZE:
+            self.flush()
+
+    # Writes events one at a time, dropping the ones the database refuses. Connection errors are
+    # raised, so flush() spills the chunk.
+    def _write_each(self, conn, cur, events):
+        for event in events:
+            try:
+                cur.execute(INSERT_SQL, event)
+                conn.commit()
+            except _UNAVAILABLE_ERRORS:
+                raise
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"Dropped audit event {event!r}: {e}")
+
+    # Stops the flusher thread and writes out whatever is still queued.
+    def shutdown(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread and self._pid == os.getpid():
+            self._thread.join(timeout=AUDIT_FLUSH_SECONDS + 5)
+        while self._queue:
+            self.flush()
+
+
+# One audit log per process.
+audit_log = AuditLog()
+atexit.register(audit_log.shutdown)
+
+
+# Shorthand for recording an event from a route.
+def audit(user_type, user_id, action_type, description=None):
+    audit_log.record(user_type, user_id, action_type, description)
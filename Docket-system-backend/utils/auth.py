@@ -2,47 +2,67 @@ from functools import wraps
 from flask import request, jsonify
 import jwt
 import os
-from dotenv import load_dotenv
-
-# Load environment variables from .env file for configuration
-load_dotenv()
+from utils import env  # noqa: F401  (loads .env before JWT_SECRET is read)
 
 # JWT (JSON Web Token) configuration for authentication
 JWT_SECRET = os.getenv("JWT_SECRET", "change-me-please-and-use-long-random") # Secret key for signing JWTs
 JWT_ALGO = "HS256" # Algorithm used for signing JWTs
 
+# Helper function to get the token from an Authorization header (Bearer token) or the access_token cookie.
+# Takes plain values so the async app (asgi.py) can use it as well.
+def extract_token(authorization, cookies):
+    if authorization.startswith("Bearer "):
+        return authorization.split(" ", 1)[1] # Extract token from "Bearer <token>"
+    return cookies.get("access_token") # Get token from HTTP-only cookie
+
+# Helper function to get the token of the current Flask request.
+def get_request_token():
+    return extract_token(request.headers.get("Authorization", ""), request.cookies)
+
+# Helper function returning the decoded JWT payload of the current request, or None if the
+# token is missing or invalid. For hooks that run outside a @jwt_required route.
+def get_request_user():
+    token = get_request_token()
+    if not token:
+        return None
+    try:
+        return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGO])
+    except Exception:
+        return None
+
+# Helper function validating a token and the required role. Returns (payload, None) when the token
+# is accepted, or (None, (error message, HTTP status)) when it is not. Shared by jwt_required and
+# the async app, so both answer with the same errors.
+def check_token(token, role=None):
+    # If no token is found, return an unauthorized error
+    if not token:
+        return None, ("Missing token", 401)
+
+    try:
+        # Decode the JWT using the secret key and algorithm
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGO])
+    except jwt.ExpiredSignatureError:
+        # Handle expired tokens gracefully
+        return None, ("Token expired", 401)
+    except Exception as e:
+        # Handle any other token validation errors (e.g., invalid signature)
+        return None, (f"Invalid token: {e}", 401)
+
+    # If a specific role is required for the route, check if the user's role matches
+    if role and payload.get("role") != role:
+        return None, ("Forbidden", 403)
+    return payload, None
+
 # Decorator to protect routes, ensuring only authenticated and authorized users can access them.
 # It extracts a JWT from the request, validates it, and checks for required roles.
 def jwt_required(role=None):
     def decorator(f):
         @wraps(f) # Preserves the original function's metadata
         def wrapper(*args, **kwargs):
-            # Attempt to get the token from the Authorization header (Bearer token) or from cookies
-            auth = request.headers.get("Authorization", "")
-            token = None
-
-            if auth.startswith("Bearer "):
-                token = auth.split(" ", 1)[1] # Extract token from "Bearer <token>"
-            else:
-                token = request.cookies.get("access_token") # Get token from HTTP-only cookie
-
-            # If no token is found, return an unauthorized error
-            if not token:
-                return jsonify({"ok": False, "error": "Missing token"}), 401
-
-            try:
-                # Decode the JWT using the secret key and algorithm
-                payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGO])
-            except jwt.ExpiredSignatureError:
-                # Handle expired tokens gracefully
-                return jsonify({"ok": False, "error": "Token expired"}), 401
-            except Exception as e:
-                # Handle any other token validation errors (e.g., invalid signature)
-                return jsonify({"ok": False, "error": f"Invalid token: {e}"}), 401
-
-            # If a specific role is required for the route, check if the user's role matches
-            if role and payload.get("role") != role:
-                return jsonify({"ok": False, "error": "Forbidden"}), 403
+            payload, error = check_token(get_request_token(), role)
+            if error:
+                message, status = error
+                return jsonify({"ok": False, "error": message}), status
 
             # Store the decoded JWT payload in the request object for easy access in the route function
             request.user = payload
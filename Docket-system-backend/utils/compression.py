@@ -0,0 +1,84 @@
+import gzip
+import os
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional: without it responses are only gzip-compressed
+    brotli = None
+
+# Negotiated response compression for API payloads.
+# JSON, CSV and text responses of at least COMPRESS_MIN_BYTES are compressed with brotli (when the
+# client accepts it and the package is installed) or gzip. Smaller bodies go out as they are: the
+# CPU and the extra headers cost more than they save. Responses that already carry a
+# Content-Encoding (precompressed static files), streamed responses and files (PDFs, which are
+# compressed already) are left alone. Levels favour speed, since this runs on every request.
+
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", 1024))
+COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", 6))
+COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", 4))
+COMPRESSIBLE_MIMETYPES = {"application/json", "application/x-ndjson", "text/csv", "text/plain", "text/html"}
+
+
+# Helper function picking the encoding for a body from an Accept-Encoding header value:
+# "br", "gzip" or None. Quality values of 0 ("gzip;q=0") count as refused.
+def negotiate(accept_encoding):
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    wildcard = accepted.get("*", 0.0)
+    for encoding in ("br", "gzip"):
+        if encoding == "br" and brotli is None:
+            continue
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+def compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=COMPRESS_BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=COMPRESS_GZIP_LEVEL, mtime=0)
+
+
+def _after_request(response):
+    response.vary.add("Accept-Encoding")
+    if (
+        response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        or not 200 <= response.status_code < 300
+        or request.method == "HEAD"
+    ):
+        return response
+
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return response
+    encoding = negotiate(request.headers.get("Accept-Encoding"))
+    if encoding is None:
+        return response
+
+    response.set_data(compress(data, encoding))
+    response.headers["Content-Encoding"] = encoding
+    # A strong ETag names exact bytes, so the compressed body gets its own.
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f"{etag}-{encoding}")
+    return response
+
+
+# Registers the compression hook. Flask runs after_request functions in reverse order of
+# registration: register it after metrics.init_app, so compression counts in request latency,
+# and before any hook that needs the uncompressed body.
+def init_app(app):
+    app.after_request(_after_request)
@@ -0,0 +1,152 @@
+import os
+import logging
+import threading
+import mysql.connector
+from mysql.connector import pooling
+from mysql.connector.errors import PoolError
+from utils import env  # noqa: F401  (loads .env before the settings below are read)
+from utils.metrics import InstrumentedConnection
+from utils import sqlite_db
+
+logger = logging.getLogger(__name__)
+
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+
+
+# Helper function building the mysql.connector settings for the configured platform:
+# local XAMPP (MariaDB) without SSL, or TiDB with SSL.
+def connection_config():
+    db_platform = os.getenv("DB_PLATFORM")
+    if db_platform == 'XAMPP':
+        # Configuration for local XAMPP (MariaDB) without SSL
+        return dict(
+            host=os.getenv("DB_HOST", "localhost"),
+            user=os.getenv("DB_USER", "root"),
+            password=os.getenv("DB_PASSWORD", ""),
+            database=os.getenv("DB_NAME", "docket_system2"),
+            autocommit=False,
+            ssl_disabled=True
+        )
+
+    # Configuration for TiDB with SSL
+    ca_path = os.getenv("CA_PATH")
+    if ca_path and not os.path.exists(ca_path):
+        # If CA_PATH is provided but file doesn't exist, it might be the cert content
+        ca_path = "/tmp/tidb_ca.pem"
+        with open(ca_path, "w") as f:
+            f.write(os.getenv("CA_PATH"))
+    return dict(
+        host=os.getenv("HOST"),
+        port=int(os.getenv("PORT", 4000)),
+        user=os.getenv("USERNAME"),
+        password=os.getenv("PASSWORD"),
+        database=os.getenv("DATABASE"),
+        autocommit=False,
+        ssl_ca=ca_path,
+        ssl_verify_cert=True if ca_path else False
+    )
+
+
+# Per-process connection pool. Opening a TLS connection to TiDB costs several WAN round trips,
+# so each worker keeps DB_POOL_SIZE connections open and hands them out; conn.close() returns
+# a connection to the pool. When every pooled connection is busy, a one-off connection is opened
+# instead of failing the request, and counted as overflow.
+class ConnectionPool:
+    def __init__(self, size=DB_POOL_SIZE):
+        self.size = size
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.overflow = 0
+
+    def _get_pool(self):
+        # Pools can't be shared across a fork, so each worker builds its own on first use.
+        if self._pool is None or self._pid != os.getpid():
+            with self._lock:
+                if self._pool is None or self._pid != os.getpid():
+                    self._pool = pooling.MySQLConnectionPool(
+                        pool_name=f"docket_{os.getpid()}",
+                        pool_size=self.size,
+                        **connection_config()
+                    )
+                    self._pid = os.getpid()
+                    self.in_use = self.overflow = 0
+        return self._pool
+
+    # Opens this worker's pooled connections now instead of on the first request.
+    def warm(self):
+        self._get_pool()
+
+    def _release(self, pooled):
+        with self._lock:
+            if pooled:
+                self.in_use -= 1
+            else:
+                self.overflow -= 1
+
+    def connect(self):
+        pool = self._get_pool()
+        try:
+            conn, pooled = pool.get_connection(), True
+        except PoolError:
+            conn, pooled = mysql.connector.connect(**connection_config()), False
+        with self._lock:
+            if pooled:
+                self.in_use += 1
+            else:
+                self.overflow += 1
+        return _PoolConnection(conn, lambda: self._release(pooled))
+
+    # Snapshot of pool usage for the readiness probe.
+    def stats(self):
+        return {
+            "size": self.size,
+            "in_use": self.in_use,
+            "overflow": self.overflow,
+            "saturation": round(self.in_use / self.size, 2) if self.size else None,
+            "initialized": self._pool is not None and self._pid == os.getpid(),
+        }
+
+
+# Connection handed out by the pool: instrumented, and reports back to the pool when closed.
+class _PoolConnection(InstrumentedConnection):
+    def __init__(self, conn, on_close):
+        super().__init__(conn)
+        self._on_close = on_close
+
+    def close(self):
+        if self._on_close:
+            on_close, self._on_close = self._on_close, None
+            try:
+                self._conn.close()
+            finally:
+                on_close()
+
+
+db_pool = ConnectionPool()
+
+
+# Returns a database connection from this worker's pool.
+# Shared by the blueprints, helper modules and scripts so they don't each carry their own copy.
+# Connections are wrapped so every statement is timed for /metrics.
+def get_db_connection():
+    if db_dialect() == "sqlite":
+        return InstrumentedConnection(sqlite_db.connect())
+    try:
+        return db_pool.connect()
+    except mysql.connector.Error as err:
+        logger.error(f"Database connection error ({os.getenv('DB_PLATFORM')}): {err}")
+        raise
+
+
+# Returns "sqlite" for the local SQLite backend (DB_PLATFORM=SQLITE) and "mysql" for MariaDB and TiDB.
+# Repositories use it to pick the statements that differ between the two dialects.
+def db_dialect():
+    return "sqlite" if os.getenv("DB_PLATFORM", "").upper() == "SQLITE" else "mysql"
+
+
+# Returns True when the XAMPP/MariaDB triggers maintain balances and clearances for us.
+def uses_db_triggers():
+    return os.getenv("DB_PLATFORM") == 'XAMPP'
@@ -0,0 +1,143 @@
+import os
+from datetime import datetime
+from io import BytesIO
+import qrcode
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Paragraph, Table, TableStyle
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+
+# Docket PDF rendering.
+# reportlab, qrcode and PIL take longer to import than the rest of the app together, and scanners
+# and verification traffic never render a PDF, so routes import this module on first use. Set
+# PDF_PRELOAD=1 to import and warm it in the gunicorn master instead (see gunicorn.conf.py).
+
+
+# Helper function loading what the first docket render would otherwise pay for (reportlab style sheet,
+# fonts, the logo image and the QR encoder), so a PDF_PRELOAD master can do it before forking workers.
+def warm_pdf_templates():
+    getSampleStyleSheet()
+    canvas.Canvas(BytesIO(), pagesize=A4).setFont("Helvetica-Bold", 14)
+    logo_path = os.path.join(os.getcwd(), "Docket-system-frontend", "frontend", "cavendish-logo.png")
+    if os.path.exists(logo_path):
+        ImageReader(logo_path).getSize()
+    qrcode.make("warmup")
+
+# Helper function to generate a PDF exam docket with student information, courses, and a QR code.
+def generate_docket_pdf(student, courses, exam_type, qr_data):
+    buffer = BytesIO()
+    p = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+
+    # Styles for PDF content
+    styles = getSampleStyleSheet()
+    style_normal = styles['Normal']
+    style_normal.fontName = 'Helvetica'
+    style_normal.fontSize = 10
+    style_bold_header = styles['h6']
+    style_bold_header.fontName = 'Helvetica-Bold'
+
+    # Start drawing from the top of the page
+    y_pos = height - inch
+
+    # Draw header elements including university logo, name, and exam type
+    logo_path = os.path.join(os.getcwd(), "Docket-system-frontend", "frontend", "cavendish-logo.png")
+    if os.path.exists(logo_path):
+        p.drawImage(logo_path, inch - 0.5*inch, y_pos - 0.4*inch, width=1*inch, height=0.5*inch, preserveAspectRatio=True)
+    
+    p.setFont("Helvetica-Bold", 14)
+    p.drawCentredString(width / 2, y_pos - 0.5 * inch, "Cavendish University Zambia Ltd.")
+    y_pos -= 0.8 * inch
+    p.setFont("Helvetica-Bold", 12)
+    p.drawCentredString(width / 2, y_pos, student.get('faculty', 'Faculty of Business and Information Technology'))
+    y_pos -= 0.2 * inch
+    p.drawCentredString(width / 2, y_pos, student.get('programme_name', 'Bachelor of Science in Computing'))
+    y_pos -= 0.4 * inch
+    p.setFont("Helvetica-Bold", 16)
+    p.drawCentredString(width / 2, y_pos, f"{exam_type.upper()} DOCKET")
+    y_pos -= 0.2 * inch
+    p.line(inch, y_pos, width - inch, y_pos)
+    y_pos -= 0.3 * inch # Margin below line
+
+    # Draw student information table
+    info_data = [
+        [Paragraph('<b>Date Issued:</b>', style_normal), Paragraph(datetime.now().strftime('%d/%m/%Y'), style_normal)],
+        [Paragraph('<b>Student Name:</b>', style_normal), Paragraph(f"{student.get('first_name', '')} {student.get('last_name', '')}", style_normal)],
+        [Paragraph('<b>Student Number:</b>', style_normal), Paragraph(student.get('student_number', ''), style_normal)],
+    ]
+    info_table = Table(info_data, colWidths=[1.5 * inch, 4.5 * inch])
+    info_table.setStyle(TableStyle([
+        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+        ('ALIGN', (1, 0), (1, -1), 'LEFT'),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('LEFTPADDING', (0, 0), (-1, -1), 0),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+        ('GRID', (0,0), (-1,-1), 1, colors.white) # Invisible grid to force rendering
+    ]))
+    
+    info_table_height = info_table.wrap(width - 2 * inch, 0)[1]
+    info_table.drawOn(p, inch, y_pos - info_table_height)
+    y_pos -= (info_table_height + 0.4 * inch) # Subtract height and add margin
+
+    # Draw main courses table
+    header = [Paragraph(h, style_bold_header) for h in ['Code', 'Module', 'Date', 'Time', 'Venue', "INVIGILATOR'S SIGNATURE"]]
+    table_data = [header]
+    for course in courses:
+        table_data.append([Paragraph(c, style_normal) for c in [course.get('course_code', ''), course.get('course_name', ''), '', '', '', '']])
+
+    main_table = Table(table_data, colWidths=[0.7*inch, 2.4*inch, 0.6*inch, 0.6*inch, 0.6*inch, 1.4*inch])
+    main_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    
+    main_table_height = main_table.wrap(width - 2 * inch, 0)[1]
+    main_table.drawOn(p, inch, y_pos - main_table_height)
+    y_pos -= (main_table_height + 0.4 * inch)
+
+    # Add notes section
+    p.setFont("Helvetica-Bold", 11)
+    p.drawString(inch, y_pos, "Note:")
+    y_pos -= 0.25 * inch
+    exam_type_display = exam_type.upper()
+    notes = [
+        f"1. All Students are expected to sign the {exam_type_display} Attendance Register as evidence that one has sat for the {exam_type_display}.",
+        f"2. The {exam_type_display} docket is not the Exam Attendance Register.",
+        f"3. Students must only sign this document on the last day of their {exam_type_display} and leave the form with the invigilator.",
+        f"4. This document is a proof that the student has registered for the {exam_type_display}.",
+        "5. All students must possess a CUZ ID card and Authorization from Finance."
+    ]
+    for note in notes:
+        p.setFont("Helvetica", 10)
+        p.drawString(inch + 0.2*inch, y_pos, note)
+        y_pos -= 0.2 * inch
+    y_pos -= 0.4 * inch
+
+    # Add signature lines
+    p.drawString(inch, y_pos, "Signed: ............................................")
+    p.drawString(inch + 0.5*inch, y_pos - 0.2*inch, "Finance")
+    p.drawString(width - 4.5*inch, y_pos, "Signed: ............................................")
+    p.drawString(width - 4.0*inch, y_pos - 0.2*inch, "Student")
+    y_pos -= 1.0 * inch
+    p.drawString(inch, y_pos, "Signed: ............................................")
+    p.drawString(inch + 0.5*inch, y_pos - 0.2*inch, "Dean of BIT")
+    p.drawString(width - 4.5*inch, y_pos, "Date: ............................................")
+
+    # Generate and draw QR code for verification
+    # Drawn from memory: no temporary file, so concurrent renders (pre-issuance) can't collide.
+    qr_png = BytesIO()
+    qrcode.make(qr_data).save(qr_png)
+    qr_png.seek(0)
+    p.drawImage(ImageReader(qr_png), width - inch - 1.2*inch, 1.5*inch, width=1.2*inch, height=1.2*inch, preserveAspectRatio=True)
+
+    p.showPage()
+    p.save()
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,247 @@
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import secrets
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import mysql.connector
+from utils.db import get_db_connection
+from utils.audit import audit
+from utils.local_store import local_store
+from utils.token_expiry import token_expiry
+from utils import eligibility_cache, sync_cache
+from utils.events import publish
+from repositories import clearances, dockets, students
+
+# Docket pre-issuance and the local docket artifact store.
+# Right after the active exam switches, every student asks for a docket at once, and each request
+# costs several queries, two inserts and a PDF render. When the switch is made with
+# "preissue": true, a background pass issues dockets for every cleared, unblocked student in bulk
+# (one query for the students, one for their courses, multi-row inserts per batch) and renders
+# the PDFs in a process pool into DOCKET_ARTIFACT_DIR. /dockets/generate then sends the stored
+# file as long as its token is still usable, and dockets rendered on demand are stored the same
+# way, so repeated downloads reuse one docket instead of issuing a new token each time.
+# Students cleared later (payments) are pre-issued incrementally by the payment routes, and a
+# second pass only issues what is missing. The store index lives in local_store, so it is shared
+# by the workers on one machine, like the files. scripts/preissue_dockets.py runs a pass by hand.
+
+DOCKET_ARTIFACT_DIR = os.getenv("DOCKET_ARTIFACT_DIR", os.path.join(tempfile.gettempdir(), "docket_artifacts"))
+PREISSUE_WORKERS = int(os.getenv("PREISSUE_WORKERS", os.cpu_count() or 2))
+PREISSUE_BATCH_SIZE = int(os.getenv("PREISSUE_BATCH_SIZE", 500))
+
+NAMESPACE = "docket_artifacts"
+
+logger = logging.getLogger(__name__)
+
+
+# --- Artifact store ---
+
+def artifact_path(exam_type, student_number, docket_id):
+    return os.path.join(DOCKET_ARTIFACT_DIR, exam_type, f"{student_number}-{docket_id}.pdf")
+
+
+# Helper function writing a file atomically, so a reader never sees a partial PDF.
+def _write_file(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _remember(student_id, exam_type, docket_id, path):
+    try:
+        local_store.set(NAMESPACE, student_id, json.dumps({"docket_id": docket_id, "path": path}), 0, tag=exam_type)
+    except sqlite3.Error as e:
+        logger.warning(f"Docket artifact index unavailable: {e}")
+
+
+# Returns {student_id: docket_id} for the students that already have a stored docket for exam_type.
+def _stored(exam_type, student_ids):
+    stored = {}
+    for student_id in student_ids:
+        entry = _lookup(student_id, exam_type)
+        if entry:
+            stored[student_id] = entry["docket_id"]
+    return stored
+
+
+def _lookup(student_id, exam_type):
+    try:
+        row = local_store.get(NAMESPACE, student_id)
+    except sqlite3.Error as e:
+        logger.warning(f"Docket artifact index unavailable: {e}")
+        return None
+    if not row:
+        return None
+    entry = json.loads(row[0])
+    return entry if entry["path"].startswith(os.path.join(DOCKET_ARTIFACT_DIR, exam_type, "")) else None
+
+
+# Returns the path of a student's stored docket for exam_type while its token can still be
+# scanned, or None. A docket whose token was used, expired or archived is dropped from the index.
+def find_artifact(cur, student_id, exam_type):
+    entry = _lookup(student_id, exam_type)
+    if entry is None:
+        return None
+    if os.path.exists(entry["path"]) and dockets.dockets_with_usable_tokens(cur, [entry["docket_id"]]):
+        return entry["path"]
+    try:
+        local_store.delete(NAMESPACE, [student_id])
+    except sqlite3.Error as e:
+        logger.warning(f"Docket artifact index unavailable: {e}")
+    return None
+
+
+# Stores a docket rendered on demand, so the student's next download reuses it.
+def store_artifact(student, exam_type, docket_id, pdf_bytes):
+    path = artifact_path(exam_type, student["student_number"], docket_id)
+    try:
+        _write_file(path, pdf_bytes)
+    except OSError as e:
+        logger.warning(f"Could not store docket {docket_id}: {e}")
+        return
+    _remember(student["id"], exam_type, docket_id, path)
+
+
+# Removes the stored dockets of every exam except exam_type (their tokens are being expired).
+def _prune_other_exams(exam_type):
+    if not os.path.isdir(DOCKET_ARTIFACT_DIR):
+        return
+    for name in os.listdir(DOCKET_ARTIFACT_DIR):
+        if name != exam_type:
+            shutil.rmtree(os.path.join(DOCKET_ARTIFACT_DIR, name), ignore_errors=True)
+
+
+# --- Pre-issuance ---
+
+# Runs in the pool's worker processes: renders one docket straight to its file.
+def _render(job):
+    from utils.docket_pdf import generate_docket_pdf
+    student, courses, exam_type, qr_data, path = job
+    _write_file(path, generate_docket_pdf(student, courses, exam_type, qr_data).getvalue())
+    return path
+
+
+# Issues and renders dockets for the students cleared for exam_type that don't have a usable one
+# stored yet (all of them, or only student_ids). Returns the number of dockets issued.
+def preissue(exam_type, student_ids=None, blocklist=(), settings=None, workers=PREISSUE_WORKERS, batch_size=PREISSUE_BATCH_SIZE):
+    settings = settings or {}
+    blocked = set(blocklist)
+    conn = get_db_connection()
+    cur = conn.cursor(dictionary=True)
+    try:
+        # One row per student, even if the query ever returns a student twice.
+        cleared = list({row["id"]: row for row in clearances.list_cleared_students(cur, exam_type, student_ids)}.values())
+        stored = _stored(exam_type, [row["id"] for row in cleared])
+        usable = dockets.dockets_with_usable_tokens(cur, list(stored.values()))
+        pending = [row for row in cleared
+                   if row["student_number"] not in blocked and stored.get(row["id"]) not in usable]
+        conn.commit()
+        if not pending:
+            return 0
+
+        issued = 0
+        # spawn: the pool starts from a clean interpreter instead of forking a threaded worker.
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=max(1, workers), mp_context=context) as pool:
+            renders = []
+            for start in range(0, len(pending), batch_size):
+                batch = pending[start:start + batch_size]
+                jobs = _issue_batch(conn, cur, batch, exam_type, settings)
+                renders.append((pool.map(_render, [job for job, _ in jobs], chunksize=16), jobs))
+                issued += len(jobs)
+            for results, jobs in renders:
+                for path, (_, (student_id, docket_id)) in zip(results, jobs):
+                    _remember(student_id, exam_type, docket_id, path)
+        return issued
+    finally:
+        cur.close()
+        conn.close()
+
+
+# Inserts one batch of dockets and tokens in a single transaction and returns the render jobs
+# as [(job, (student_id, docket_id))]. Students without enrolled courses are skipped, as
+# /dockets/generate refuses them.
+def _issue_batch(conn, cur, batch, exam_type, settings):
+    expires_at = token_expiry(settings, exam_type)
+    courses = students.get_enrolled_courses_by_student(cur, [student["id"] for student in batch])
+    tokens = {}
+    rows = []
+    for student in batch:
+        if not courses[student["id"]]:
+            continue
+        token_value = secrets.token_urlsafe(16)
+        qr_data = f"{student['student_number']}|{exam_type}|{token_value}"
+        tokens[qr_data] = hashlib.sha256(token_value.encode()).hexdigest()
+        rows.append((student, exam_type, qr_data, expires_at))
+    conn.commit()  # end the read's snapshot before the write transaction
+    if not rows:
+        return []
+    try:
+        conn.start_transaction()
+        dockets.ensure_token_key(cur)
+        docket_ids = dockets.insert_dockets(cur, rows)
+        dockets.insert_tokens(cur, [(docket_ids[qr_data], tokens[qr_data], expires_at) for _, _, qr_data, _ in rows])
+        conn.commit()
+    except mysql.connector.Error:
+        conn.rollback()
+        raise
+    eligibility_cache.invalidate(student_ids=[student["id"] for student, _, _, _ in rows])
+    return [
+        ((dict(student), courses[student["id"]], exam_type, qr_data,
+          artifact_path(exam_type, student["student_number"], docket_ids[qr_data])),
+         (student["id"], docket_ids[qr_data]))
+        for student, _, qr_data, _ in rows
+    ]
+
+
+# Runs pre-issuance passes in a background thread of this process. Requests made while a pass
+# runs are merged into the next one: a full pass, or the union of the students asked for.
+class Preissuer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._next = None  # (exam_type, student_ids or None for everyone, blocklist, settings, admin_id)
+
+    def start(self, exam_type, student_ids=None, blocklist=(), settings=None, admin_id=None):
+        with self._lock:
+            queued = self._next
+            if queued is not None and queued[0] == exam_type and student_ids is not None:
+                student_ids = None if queued[1] is None else sorted(set(queued[1]) | set(student_ids))
+            self._next = (exam_type, student_ids, list(blocklist), settings, admin_id)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="docket-preissuer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if self._next is None:
+                    self._thread = None
+                    return
+                exam_type, student_ids, blocklist, settings, admin_id = self._next
+                self._next = None
+            started = time.perf_counter()
+            try:
+                if student_ids is None:
+                    _prune_other_exams(exam_type)
+                issued = preissue(exam_type, student_ids, blocklist, settings)
+            except Exception as err:
+                logger.error(f"Docket pre-issuance for {exam_type} failed: {err}")
+                continue
+            if issued:
+                sync_cache.tokens.bump()
+                publish("tokens", change="issued", count=issued, resync=True, exam_type=exam_type)
+            logger.info(f"Pre-issued {issued} {exam_type} dockets in {time.perf_counter() - started:.1f}s")
+            if student_ids is None:
+                audit("admin", admin_id, "preissue_dockets", f"Pre-issued {issued} {exam_type} dockets")
+
+
+preissuer = Preissuer()
@@ -0,0 +1,58 @@
+# Docket eligibility rules shared by the single-student and batch eligibility routes.
+# A student may download a docket for an exam when they are not on the blocklist, the exam is
+# the active one, and Finance has cleared them for it.
+
+EXAM_TYPES = ("ca1", "ca2", "exam")
+
+BLOCKED_REASON = "Account blocked. Please visit the Retentions Office."
+NOT_ACTIVE_REASON = "Docket not currently active."
+NOT_CLEARED_REASON = "Not cleared by Finance. Please visit the Retentions Office."
+
+
+# Maps a clearances row to {"ca1": bool, "ca2": bool, "exam": bool}.
+def cleared_exams(clearance):
+    return {exam_type: clearance.get(f"{exam_type}_status") == "eligible" for exam_type in EXAM_TYPES}
+
+
+# Builds the per-exam eligibility list returned to the student portal.
+def build_eligibility(is_blocked, clearance, active_exam):
+    if is_blocked:
+        return [{"exam_type": exam_type, "eligible": False, "reason": BLOCKED_REASON} for exam_type in EXAM_TYPES]
+
+    cleared = cleared_exams(clearance)
+    eligibility_list = []
+    for exam_type in EXAM_TYPES:
+        is_active = (exam_type == active_exam)
+        is_clear = cleared[exam_type]
+        reason = ""
+
+        if not is_active:
+            reason = NOT_ACTIVE_REASON
+        elif not is_clear:
+            reason = NOT_CLEARED_REASON
+
+        eligibility_list.append({
+            "exam_type": exam_type,
+            "eligible": is_active and is_clear,
+            "reason": reason
+        })
+    return eligibility_list
+
+
+# Compact eligibility of one student for the batch endpoint.
+# status is one of "eligible", "blocked" (on the blocklist), "not_cleared" or "no_clearance".
+def compact_eligibility(row, blocklist, active_exam):
+    if row["student_number"] in blocklist:
+        status, cleared = "blocked", []
+    elif row.get("ca1_status") is None:
+        status, cleared = "no_clearance", []
+    else:
+        cleared = [exam_type for exam_type, ok in cleared_exams(row).items() if ok]
+        status = "eligible" if active_exam in cleared else "not_cleared"
+    return {
+        "id": row["id"],
+        "student_number": row["student_number"],
+        "eligible": status == "eligible",
+        "status": status,
+        "cleared": cleared,
+    }
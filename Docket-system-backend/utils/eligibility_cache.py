@@ -0,0 +1,92 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+from utils.local_store import local_store
+
+# Per-student cache of the eligibility list returned by /dockets/eligibility/<student_id>, and of
+# the serialized dashboards of /students/me/dashboard, which show that list.
+# The answer only changes when a payment lands, the blocklist changes or the active exam switches,
+# so entries are dropped explicitly by those write paths (and, for dashboards, when a docket is
+# issued or scanned). Settings and fee_schedule changes affect
+# everyone, so they bump a global version instead, which makes every older entry stale at once.
+# A stale entry is still returned (flagged) so the route can fall back to it when the DB is down.
+
+NAMESPACE = "eligibility"
+DASHBOARD_NAMESPACE = "student_dashboard"
+VERSION_NAME = "eligibility"
+ELIGIBILITY_CACHE_TTL = int(os.getenv("ELIGIBILITY_CACHE_TTL", 15 * 60))
+
+logger = logging.getLogger(__name__)
+
+
+# Returns the global eligibility version, read before computing an answer so that a bump
+# made while the DB query runs leaves the stored entry stale.
+def current_version():
+    try:
+        return local_store.get_version(VERSION_NAME)
+    except sqlite3.Error as e:
+        logger.warning(f"Eligibility cache unavailable: {e}")
+        return None
+
+
+# Returns (eligibility_list, is_fresh) for a student, or (None, False) on a miss.
+def get_cached(student_id):
+    value, fresh = _get(NAMESPACE, student_id)
+    return (json.loads(value) if value is not None else None), fresh
+
+
+def store(student_id, student_number, eligibility_list, version):
+    _set(NAMESPACE, student_id, student_number, json.dumps(eligibility_list), version)
+
+
+# Returns a student's cached dashboard body (JSON text) while it is fresh, or None.
+def get_dashboard(student_id):
+    value, fresh = _get(DASHBOARD_NAMESPACE, student_id)
+    return value if fresh else None
+
+
+def store_dashboard(student_id, student_number, body, version):
+    _set(DASHBOARD_NAMESPACE, student_id, student_number, body, version)
+
+
+def _get(namespace, student_id):
+    try:
+        row = local_store.get(namespace, student_id)
+        if not row:
+            return None, False
+        value, version, stored_at = row
+        fresh = version == local_store.get_version(VERSION_NAME) and time.time() - stored_at < ELIGIBILITY_CACHE_TTL
+        return value, fresh
+    except sqlite3.Error as e:
+        logger.warning(f"Eligibility cache unavailable: {e}")
+        return None, False
+
+
+def _set(namespace, student_id, student_number, value, version):
+    if version is None:
+        return
+    try:
+        local_store.set(namespace, student_id, value, version, tag=student_number)
+    except sqlite3.Error as e:
+        logger.warning(f"Eligibility cache unavailable: {e}")
+
+
+# Drops the cached answers of specific students, by id and/or student number.
+def invalidate(student_ids=(), student_numbers=()):
+    try:
+        for namespace in (NAMESPACE, DASHBOARD_NAMESPACE):
+            local_store.delete(namespace, student_ids)
+            for student_number in student_numbers:
+                local_store.delete_by_tag(namespace, student_number)
+    except sqlite3.Error as e:
+        logger.warning(f"Eligibility cache invalidation failed: {e}")
+
+
+# Makes every cached answer stale, e.g. after the active exam or the fee_schedule changes.
+def invalidate_all():
+    try:
+        local_store.bump_version(VERSION_NAME)
+    except sqlite3.Error as e:
+        logger.warning(f"Eligibility cache invalidation failed: {e}")
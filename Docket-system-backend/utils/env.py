@@ -0,0 +1,7 @@
+from dotenv import load_dotenv
+
+# Loads the .env file into the environment, once per process.
+# Modules that read settings with os.getenv at import time import this module first; Python
+# only runs it on the first import, so the file is read and parsed a single time. As before,
+# the .env file is looked up from this directory upwards (Docket-system-backend/.env).
+load_dotenv()
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from utils.local_store import local_store
+
+# Change events pushed to admin dashboards and scanners (GET /events and /events/poll in asgi.py).
+# Write paths call publish() after they commit: blocklist and settings changes, payments, and
+# docket tokens issued, used or expired. Events are appended to a log in local_store, so a change
+# made by any worker on the machine reaches every worker, and an event's id is its position in the
+# log. Each ASGI worker runs one poller task that reads new events every EVENTS_POLL_SECONDS and
+# fans them out to the queues of its connected clients: a thousand open streams cost one indexed
+# read per interval, and each stream is a coroutine rather than a gunicorn worker.
+# Clients resume with Last-Event-ID (or ?after=) and get the events they missed, or a "reset"
+# event when those are gone (older than EVENTS_RETENTION_SECONDS, or more than RESUME_LIMIT of
+# them), after which they refetch what they show (/dockets/sync/*, /admin/settings, ...).
+
+EVENTS_POLL_SECONDS = float(os.getenv("EVENTS_POLL_SECONDS", 0.5))
+EVENTS_RETENTION_SECONDS = int(os.getenv("EVENTS_RETENTION_SECONDS", 3600))
+EVENTS_HEARTBEAT_SECONDS = 15
+TOPICS = ("blocklist", "settings", "payments", "tokens")
+RESUME_LIMIT = 500
+MAX_EVENT_ITEMS = 100  # larger batch changes are published as a count and "resync": true
+QUEUE_SIZE = 1000
+PRUNE_SECONDS = 60
+
+logger = logging.getLogger(__name__)
+
+
+# --- Publishing ---
+
+def publish(topic, **data):
+    try:
+        event_id = local_store.append_event(topic, json.dumps(data, default=str))
+        if event_id % 1000 == 0:
+            local_store.prune_events(time.time() - EVENTS_RETENTION_SECONDS)
+    except sqlite3.Error as e:
+        logger.warning(f"Event log unavailable, {topic} event not published: {e}")
+
+
+# Publishes a change to many rows: the changed keys (under `field`) when there are at most
+# MAX_EVENT_ITEMS of them, otherwise only their count, with "resync": true.
+def publish_batch(topic, field, items, **data):
+    items = list(items)
+    if len(items) <= MAX_EVENT_ITEMS:
+        publish(topic, count=len(items), **{field: items}, **data)
+    else:
+        publish(topic, count=len(items), resync=True, **data)
+
+
+# --- Reading ---
+
+def _event(row):
+    event_id, topic, data = row
+    return {"id": event_id, "topic": topic, "data": json.loads(data)}
+
+
+def _reset(event_id):
+    return {"id": event_id, "topic": "reset", "data": {}}
+
+
+def read_events(after_id, limit=RESUME_LIMIT):
+    return [_event(row) for row in local_store.events_after(after_id, limit)]
+
+
+# Returns (events, position) for a client resuming after after_id: the events it missed, or a
+# reset when they can't all be replayed. A new client (after_id None) starts at the newest event.
+def resume(after_id):
+    oldest, newest = local_store.event_range()
+    newest = newest or 0
+    if after_id is None:
+        return [], newest
+    if after_id > newest or (oldest is not None and after_id < oldest - 1):
+        return [_reset(newest)], newest
+    events = read_events(after_id, RESUME_LIMIT + 1)
+    if len(events) > RESUME_LIMIT:
+        return [_reset(newest)], newest
+    return events, events[-1]["id"] if events else after_id
+
+
+# Helper function reading the event id a client resumes after (Last-Event-ID header or ?after=).
+def parse_event_id(value):
+    try:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+# Helper function reading the ?topics= filter; None means every topic.
+def parse_topics(value):
+    if not value:
+        return None
+    return {topic for topic in value.split(",") if topic in TOPICS} or None
+
+
+# --- Fan-out (async, one hub per worker) ---
+
+class Subscriber:
+    def __init__(self, topics):
+        self.topics = topics
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+        self.backlog = []
+        self.position = 0
+        self.overflowed = False
+
+    def wants(self, event):
+        return event["topic"] == "reset" or self.topics is None or event["topic"] in self.topics
+
+    # Returns the next events (the backlog first), waiting up to timeout; [] on timeout.
+    async def next_events(self, timeout):
+        if self.backlog:
+            events, self.backlog = self.backlog, []
+            return events
+        if self.overflowed:
+            # The client fell too far behind: skip to the newest event it was sent and reset.
+            self.overflowed = False
+            while not self.queue.empty():
+                self.position = max(self.position, self.queue.get_nowait()["id"])
+            return [_reset(self.position)]
+        try:
+            events = [await asyncio.wait_for(self.queue.get(), timeout)]
+        except asyncio.TimeoutError:
+            return []
+        while not self.queue.empty():
+            events.append(self.queue.get_nowait())
+        # Events already replayed from the backlog can arrive again through the queue.
+        events = [event for event in events if event["id"] > self.position]
+        if events:
+            self.position = events[-1]["id"]
+        return [event for event in events if self.wants(event)]
+
+
+class EventHub:
+    def __init__(self):
+        self._subscribers = set()
+        self._task = None
+        self._start_lock = None
+        self._position = 0
+        self._pruned_at = 0
+
+    # Registers a client resuming after after_id; run_in_thread runs the local_store reads.
+    async def subscribe(self, after_id, topics, run_in_thread):
+        subscriber = Subscriber(topics)
+        self._subscribers.add(subscriber)
+        try:
+            # The poller starts from the newest event before the client's resume point is read,
+            # so nothing published in between is missed (duplicates are dropped by id).
+            self._start_lock = self._start_lock or asyncio.Lock()
+            async with self._start_lock:
+                if self._task is None or self._task.done():
+                    self._position = (await run_in_thread(local_store.event_range))[1] or 0
+                    self._task = asyncio.create_task(self._poll(run_in_thread))
+            backlog, subscriber.position = await run_in_thread(resume, after_id)
+        except sqlite3.Error:
+            self._subscribers.discard(subscriber)
+            raise
+        subscriber.backlog = [event for event in backlog if subscriber.wants(event)]
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self._subscribers.discard(subscriber)
+
+    # Reads new events from the log and hands them to every subscriber, until none are left.
+    async def _poll(self, run_in_thread):
+        while self._subscribers:
+            await asyncio.sleep(EVENTS_POLL_SECONDS)
+            try:
+                events = await run_in_thread(read_events, self._position)
+                if time.time() - self._pruned_at >= PRUNE_SECONDS:
+                    self._pruned_at = time.time()
+                    await run_in_thread(local_store.prune_events, time.time() - EVENTS_RETENTION_SECONDS)
+            except sqlite3.Error as e:
+                logger.warning(f"Event log unavailable: {e}")
+                continue
+            for event in events:
+                self._position = event["id"]
+                for subscriber in self._subscribers:
+                    try:
+                        subscriber.queue.put_nowait(event)
+                    except asyncio.QueueFull:
+                        subscriber.overflowed = True
+
+
+event_hub = EventHub()
+
+
+# Formats an event for a text/event-stream response.
+def sse_message(event):
+    return f"id: {event['id']}\nevent: {event['topic']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
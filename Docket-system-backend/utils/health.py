@@ -0,0 +1,121 @@
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+from flask import jsonify
+from utils.db import get_db_connection, db_pool
+
+# Liveness and readiness probes.
+# /health and /health/live only say the process is serving requests and never touch a dependency,
+# so a slow database can't get a healthy worker restarted. /health/ready checks what a request
+# needs: a pooled DB connection, loadable settings and blocklist files and a loadable PDF stack.
+# The readiness result is cached for READINESS_CACHE_SECONDS per worker, so frequent probes from
+# the load balancer cost at most one "SELECT 1" per interval.
+
+READINESS_CACHE_SECONDS = float(os.getenv("READINESS_CACHE_SECONDS", 10))
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SETTINGS_FILE = os.path.join(backend_dir, 'exam_settings.json')
+BLOCKLIST_FILE = os.path.join(backend_dir, 'blocked_students.json')
+PDF_PACKAGES = ("reportlab", "qrcode", "PIL")
+# Resolved like the logo in utils/docket_pdf.py.
+LOGO_PATH = os.path.join(os.getcwd(), "Docket-system-frontend", "frontend", "cavendish-logo.png")
+
+_lock = threading.Lock()
+_cached = None  # (checked_at, body, ready)
+
+
+# Runs one check and reports whether it passed and how long it took.
+def _timed(check):
+    started = time.perf_counter()
+    try:
+        detail = check() or {}
+        result = {"ok": True, **detail}
+    except Exception as e:
+        result = {"ok": False, "error": str(e)}
+    result["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+def _check_database():
+    conn = get_db_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT 1")
+        cur.fetchall()
+        cur.close()
+    finally:
+        conn.close()
+
+
+# read_json_file() falls back to defaults on a missing or corrupt file, so parse them directly here.
+def _check_files():
+    for path in (SETTINGS_FILE, BLOCKLIST_FILE):
+        if os.path.exists(path):
+            with open(path) as f:
+                json.load(f)
+
+
+# Confirms the PDF packages are installed and the logo is readable without importing the stack,
+# which would load reportlab, qrcode and PIL into every worker on its first probe. "loaded" says
+# whether this worker has it yet (after a first docket, or inherited with PDF_PRELOAD=1).
+def _check_pdf():
+    missing = [name for name in PDF_PACKAGES if importlib.util.find_spec(name) is None]
+    if missing:
+        raise RuntimeError(f"PDF package(s) not installed: {', '.join(missing)}")
+    if os.path.exists(LOGO_PATH):
+        with open(LOGO_PATH, "rb") as f:
+            f.read(1)
+    return {"loaded": "utils.docket_pdf" in sys.modules}
+
+
+def _run_checks():
+    checks = {
+        "database": _timed(_check_database),
+        "settings": _timed(_check_files),
+        "pdf": _timed(_check_pdf),
+    }
+    ready = all(c["ok"] for c in checks.values())
+    body = {
+        "ok": ready,
+        "checks": checks,
+        "pool": db_pool.stats(),
+        "pid": os.getpid(),
+    }
+    return body, ready
+
+
+# Returns the readiness report, re-running the checks at most once per READINESS_CACHE_SECONDS.
+# Only one thread runs them; concurrent probes get the previous report meanwhile.
+def readiness():
+    global _cached
+    now = time.time()
+    if _cached and now - _cached[0] < READINESS_CACHE_SECONDS:
+        return _cached
+    if not _lock.acquire(blocking=_cached is None):
+        return _cached
+    try:
+        if not _cached or time.time() - _cached[0] >= READINESS_CACHE_SECONDS:
+            body, ready = _run_checks()
+            _cached = (time.time(), body, ready)
+        return _cached
+    finally:
+        _lock.release()
+
+
+def live_view():
+    return "OK", 200
+
+
+def ready_view():
+    checked_at, body, ready = readiness()
+    # Pool usage is cheap to read, so report it live rather than from the cached snapshot.
+    body = {**body, "pool": db_pool.stats(), "checked_seconds_ago": round(time.time() - checked_at, 1)}
+    return jsonify(body), 200 if ready else 503
+
+
+# Registers /health/live and /health/ready; /health stays as the liveness check.
+def init_app(app):
+    app.add_url_rule("/health/live", "health_live", live_view)
+    app.add_url_rule("/health/ready", "health_ready", ready_view)
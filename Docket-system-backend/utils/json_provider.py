@@ -0,0 +1,76 @@
+import json
+import dataclasses
+import decimal
+import uuid
+from datetime import date
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:  # optional: without it the app keeps Flask's json-based provider
+    orjson = None
+
+# Fast JSON for API responses.
+# The sync lists (every student, every token), payments pages and search results are large, and
+# the stdlib encoder is most of the time spent returning them. OrjsonProvider plugs orjson into
+# Flask (app.json) with the same output as Flask's default provider: Decimal (DECIMAL columns
+# such as student_balances.balance) as a string, date/datetime as an HTTP date, keys sorted.
+# dumps_bytes() is the same encoder for code outside a Flask response (the async app, caches).
+
+
+# Same conversions as Flask's default provider, for the types orjson doesn't handle itself.
+def _default(o):
+    if isinstance(o, date):
+        return http_date(o)
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o):
+        return dataclasses.asdict(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    # Datetimes go through _default so they match Flask's format instead of orjson's ISO 8601.
+    _OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS
+
+
+# Serializes obj to compact JSON bytes with the app's conventions.
+def dumps_bytes(obj):
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=_OPTIONS)
+    return json.dumps(obj, default=_default, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        # Options orjson has no equivalent for (cls=..., ensure_ascii=...) fall back to json.
+        if kwargs.keys() - {"indent", "separators", "sort_keys", "default"}:
+            return super().dumps(obj, **kwargs)
+        option = _OPTIONS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=kwargs.get("default", _default), option=option).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    # Builds the response from bytes directly; pretty-printed in debug mode, as Flask does.
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        option = _OPTIONS
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            option |= orjson.OPT_INDENT_2
+        return self._app.response_class(
+            orjson.dumps(obj, default=_default, option=option) + b"\n", mimetype=self.mimetype
+        )
+
+
+# Installs the orjson provider on the app when orjson is available.
+def init_app(app):
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
@@ -0,0 +1,186 @@
+import os
+import sqlite3
+import threading
+import time
+
+# Small key/value store shared by all gunicorn workers on the same machine.
+# It is a SQLite file (WAL mode) on local disk, so every worker sees the same cached entries,
+# version stamps and counters without needing an external cache server. Nothing in here is
+# authoritative: losing the file only costs a few cache misses.
+
+LOCAL_STORE_PATH = os.getenv("LOCAL_STORE_PATH", os.path.join("/tmp", "docket_local_store.sqlite3"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    tag TEXT,
+    value TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS cache_tag ON cache (namespace, tag);
+CREATE TABLE IF NOT EXISTS versions (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    value INTEGER NOT NULL,
+    PRIMARY KEY (name, bucket)
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    topic TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+class LocalStore:
+    def __init__(self, path=LOCAL_STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._pid = None
+
+    # One SQLite connection per thread, reopened after a fork so workers never share a handle.
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    # --- Cached values ---
+
+    # Returns (value, version, stored_at) for a key, or None when nothing is stored.
+    def get(self, namespace, key):
+        row = self._conn().execute(
+            "SELECT value, version, stored_at FROM cache WHERE namespace = ? AND key = ?",
+            (namespace, str(key)),
+        ).fetchone()
+        return row
+
+    def set(self, namespace, key, value, version, tag=None):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO cache (namespace, key, tag, value, version, stored_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (namespace, str(key), tag, value, version, time.time()),
+        )
+
+    def delete(self, namespace, keys):
+        keys = [str(k) for k in keys]
+        if keys:
+            self._conn().execute(
+                f"DELETE FROM cache WHERE namespace = ? AND key IN ({', '.join(['?'] * len(keys))})",
+                (namespace, *keys),
+            )
+
+    def delete_by_tag(self, namespace, tag):
+        self._conn().execute("DELETE FROM cache WHERE namespace = ? AND tag = ?", (namespace, tag))
+
+    # --- Version stamps ---
+
+    def get_version(self, name):
+        row = self._conn().execute("SELECT value FROM versions WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    # Increments a version stamp and returns the new value.
+    def bump_version(self, name):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO versions (name, value) VALUES (?, 1) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+                (name,),
+            )
+            value = conn.execute("SELECT value FROM versions WHERE name = ?", (name,)).fetchone()[0]
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return value
+
+    # --- Counters ---
+    # Integer counters split into buckets (e.g. one per minute), so callers can keep rolling windows.
+
+    # Adds [(name, bucket, amount)] to the counters in one transaction.
+    def add_counts(self, rows):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO counters (name, bucket, value) VALUES (?, ?, ?) "
+                "ON CONFLICT(name, bucket) DO UPDATE SET value = value + excluded.value",
+                rows,
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    # Returns [(name, bucket, value)] for the counters whose name starts with prefix, from bucket `since` on.
+    def get_counts(self, prefix, since=0):
+        return self._conn().execute(
+            "SELECT name, bucket, value FROM counters WHERE name >= ? AND name < ? AND bucket >= ?",
+            (prefix, prefix + "\uffff", since),
+        ).fetchall()
+
+    # Replaces the counters starting with prefix from bucket `since` on with [(name, bucket, value)].
+    def replace_counts(self, prefix, since, rows):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM counters WHERE name >= ? AND name < ? AND bucket >= ?",
+                (prefix, prefix + "\uffff", since),
+            )
+            conn.executemany("INSERT INTO counters (name, bucket, value) VALUES (?, ?, ?)", rows)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    # Drops the buckets of counters starting with prefix that are older than `before`.
+    def prune_counts(self, prefix, before):
+        self._conn().execute(
+            "DELETE FROM counters WHERE name >= ? AND name < ? AND bucket < ?",
+            (prefix, prefix + "\uffff", before),
+        )
+
+
+    # --- Event log ---
+    # Append-only log behind the push channel (utils/events.py); ids only ever grow.
+
+    # Appends an event and returns its id.
+    def append_event(self, topic, data):
+        return self._conn().execute(
+            "INSERT INTO events (topic, data, created_at) VALUES (?, ?, ?)", (topic, data, time.time())
+        ).lastrowid
+
+    # Returns [(id, topic, data)] for up to `limit` events after after_id, oldest first.
+    def events_after(self, after_id, limit=500):
+        return self._conn().execute(
+            "SELECT id, topic, data FROM events WHERE id > ? ORDER BY id LIMIT ?", (after_id, limit)
+        ).fetchall()
+
+    # Returns (oldest id, newest id) of the events kept, (None, None) when there are none.
+    def event_range(self):
+        return self._conn().execute("SELECT MIN(id), MAX(id) FROM events").fetchone()
+
+    # Drops events older than `before`, always keeping the newest so its id stays the resume point.
+    def prune_events(self, before):
+        self._conn().execute(
+            "DELETE FROM events WHERE created_at < ? AND id < (SELECT MAX(id) FROM events)", (before,)
+        )
+
+
+# One store per process; connections are opened lazily per thread.
+local_store = LocalStore()
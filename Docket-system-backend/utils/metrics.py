@@ -0,0 +1,260 @@
+import hmac
+import os
+import re
+import json
+import time
+import logging
+import tempfile
+from flask import request, g, Response, current_app, has_request_context
+
+# Prometheus metrics for the backend.
+# gunicorn runs several worker processes, so prometheus_client is used in multiprocess mode: each
+# worker writes its samples to files in PROMETHEUS_MULTIPROC_DIR and /metrics merges all of them.
+# The directory has to be known before prometheus_client is imported, hence the setdefault below;
+# gunicorn.conf.py clears it when the master starts and marks workers dead when they exit.
+MULTIPROC_DIR = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "docket_prometheus")
+)
+os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
+from prometheus_client import (  # noqa: E402  (must come after PROMETHEUS_MULTIPROC_DIR is set)
+    CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess, CONTENT_TYPE_LATEST,
+)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "docket_http_request_duration_seconds", "Request latency by route.",
+    ["method", "route"], buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_TOTAL = Counter(
+    "docket_http_requests_total", "Requests by route and status code.",
+    ["method", "route", "status"],
+)
+HTTP_IN_FLIGHT = Gauge(
+    "docket_http_requests_in_flight", "Requests currently being served.",
+    ["route"], multiprocess_mode="livesum",
+)
+DB_QUERY_SECONDS = Histogram(
+    "docket_db_query_duration_seconds", "Statement latency by normalized query fingerprint.",
+    ["query"], buckets=LATENCY_BUCKETS,
+)
+DB_QUERY_ROWS = Counter(
+    "docket_db_query_rows_total", "Rows returned or affected by normalized query fingerprint.",
+    ["query"],
+)
+PDF_RENDER_SECONDS = Histogram(
+    "docket_pdf_render_duration_seconds", "Time to render a docket PDF.",
+    buckets=LATENCY_BUCKETS,
+)
+BCRYPT_SECONDS = Histogram(
+    "docket_bcrypt_duration_seconds", "Time spent verifying bcrypt password hashes.",
+    buckets=LATENCY_BUCKETS,
+)
+
+
+# --- Query fingerprints ---
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_REPEATED_UNION = re.compile(r"(SELECT \? AS \w+(?:, \? AS \w+)*)(?: UNION ALL \1)+", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+_fingerprints = {}
+
+
+# Normalizes a SQL statement so that statements differing only in literals, parameters or the
+# length of an IN (...) list share one label. Results are memoized since the SQL text is static.
+def fingerprint(sql):
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", "replace")
+    cached = _fingerprints.get(sql)
+    if cached is not None:
+        return cached
+
+    fp = _WHITESPACE.sub(" ", sql).strip()
+    fp = _STRING_LITERAL.sub("?", fp)
+    fp = fp.replace("%s", "?")
+    fp = _NUMBER_LITERAL.sub("?", fp)
+    fp = _PLACEHOLDER_LIST.sub("(...)", fp)
+    fp = _REPEATED_UNION.sub(r"\1 UNION ALL ...", fp)
+    fp = fp[:200]
+    if len(_fingerprints) < 5000:
+        _fingerprints[sql] = fp
+    return fp
+
+
+# --- Slow-query log ---
+
+# Statements slower than SLOW_QUERY_MS are written to the "docket.slow_query" logger as one JSON
+# line each. Set SLOW_QUERY_LOG to a file path to send them to their own file.
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 200))
+slow_query_logger = logging.getLogger("docket.slow_query")
+if os.getenv("SLOW_QUERY_LOG"):
+    _handler = logging.FileHandler(os.getenv("SLOW_QUERY_LOG"))
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    slow_query_logger.addHandler(_handler)
+    slow_query_logger.setLevel(logging.WARNING)
+    slow_query_logger.propagate = False
+
+
+# Helper function counting the parameters bound to a statement (all rows for executemany).
+def _param_count(params, many):
+    if not params:
+        return 0
+    if many:
+        params = list(params)
+        return len(params) * len(params[0]) if params else 0
+    return len(params)
+
+
+def _log_slow_query(query, elapsed, param_count, rows):
+    slow_query_logger.warning(json.dumps({
+        "query": query,
+        "duration_ms": round(elapsed * 1000, 1),
+        "params": param_count,
+        "rows": rows,
+        "route": current_route(),
+    }))
+
+
+# --- DB instrumentation ---
+
+# Cursor proxy that times every statement and counts the rows it returns or affects.
+# Everything not overridden here is passed straight through to the mysql.connector cursor.
+class InstrumentedCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._query = None
+
+    def _record(self, operation, started, param_count):
+        elapsed = time.perf_counter() - started
+        self._query = fingerprint(operation)
+        DB_QUERY_SECONDS.labels(self._query).observe(elapsed)
+        rowcount = self._cursor.rowcount
+        if not getattr(self._cursor, "with_rows", False) and rowcount and rowcount > 0:
+            DB_QUERY_ROWS.labels(self._query).inc(rowcount)
+        if elapsed * 1000 >= SLOW_QUERY_MS:
+            _log_slow_query(self._query, elapsed, param_count, rowcount)
+
+    def _count_rows(self, count):
+        if self._query and count:
+            DB_QUERY_ROWS.labels(self._query).inc(count)
+
+    def execute(self, operation, params=(), *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, params, *args, **kwargs)
+        finally:
+            self._record(operation, started, _param_count(params, many=False))
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        seq_params = list(seq_params)
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_params, *args, **kwargs)
+        finally:
+            self._record(operation, started, _param_count(seq_params, many=True))
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        self._count_rows(1 if row is not None else 0)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._count_rows(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._count_rows(len(rows))
+        return rows
+
+    def __iter__(self):
+        for row in self._cursor:
+            self._count_rows(1)
+            yield row
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+
+
+# Connection proxy whose cursors are instrumented.
+class InstrumentedConnection:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+# --- HTTP instrumentation ---
+
+def _route_label():
+    rule = request.url_rule
+    return rule.rule if rule is not None else "unmatched"
+
+
+def _before_request():
+    g.metrics_started = time.perf_counter()
+    g.metrics_route = _route_label()
+    HTTP_IN_FLIGHT.labels(g.metrics_route).inc()
+
+
+def _after_request(response):
+    started = g.pop("metrics_started", None)
+    if started is not None:
+        HTTP_REQUEST_SECONDS.labels(request.method, g.metrics_route).observe(time.perf_counter() - started)
+        HTTP_REQUESTS_TOTAL.labels(request.method, g.metrics_route, str(response.status_code)).inc()
+    return response
+
+
+def _teardown_request(exc):
+    route = g.pop("metrics_route", None)
+    if route is not None:
+        HTTP_IN_FLIGHT.labels(route).dec()
+        if exc is not None and g.pop("metrics_started", None) is not None:
+            # An unhandled exception skips after_request; count it as the 500 it becomes.
+            HTTP_REQUESTS_TOTAL.labels(request.method, route, "500").inc()
+
+
+# Serves every worker's samples merged into one Prometheus text exposition.
+# Scrapers must send METRICS_TOKEN as a Bearer token. Without a token configured the endpoint is
+# hidden (404), since route names, query fingerprints and latencies shouldn't be public; in
+# debug mode it is served without one for local runs.
+def metrics_view():
+    token = os.getenv("METRICS_TOKEN")
+    if not token:
+        if not current_app.debug:
+            return Response("Not Found\n", status=404, mimetype="text/plain")
+    elif not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return Response("Forbidden\n", status=403, mimetype="text/plain")
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+# Returns the route currently being served, for log lines written outside the view.
+def current_route():
+    if has_request_context():
+        return g.get("metrics_route") or _route_label()
+    return None
+
+
+# Registers the request hooks and the /metrics endpoint on the Flask app.
+def init_app(app):
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
+
@@ -0,0 +1,66 @@
+import base64
+import json
+import threading
+import time
+
+# Helpers for keyset-paginated list endpoints.
+# Cursors are opaque to the client: the sort key of the last row, JSON-encoded and base64'd.
+
+
+# Encodes the sort key of the last row on a page into an opaque cursor string.
+def encode_cursor(values):
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+# Decodes a cursor produced by encode_cursor. Raises ValueError for anything malformed.
+def decode_cursor(cursor, length):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != length:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+# Parses the "limit" query argument, clamping it to [1, maximum].
+def parse_limit(raw, default, maximum):
+    if raw in (None, ""):
+        return default
+    try:
+        limit = int(raw)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid limit")
+    return max(1, min(limit, maximum))
+
+
+# Small per-process cache for values that are expensive to compute but fine to serve slightly old,
+# such as the total row count behind a filtered listing.
+class TTLCache:
+    def __init__(self, ttl_seconds, max_entries=256):
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item and item[0] > time.monotonic():
+                return item[1]
+            self._items.pop(key, None)
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            if len(self._items) >= self.max_entries:
+                # Drop the entry closest to expiry to make room
+                oldest = min(self._items, key=lambda k: self._items[k][0])
+                self._items.pop(oldest, None)
+            self._items[key] = (time.monotonic() + self.ttl, value)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
@@ -0,0 +1,135 @@
+import csv
+import io
+from decimal import Decimal, InvalidOperation
+import mysql.connector
+from utils.db import uses_db_triggers
+from repositories import payments, students
+from repositories.clearances import recompute_clearances
+
+# Bulk import of bank-statement payments.
+# A CSV of (student_number, amount, receipt_number) is resolved against the students table
+# in a single query, then written chunk by chunk: payments go in with executemany, balances
+# and clearances are updated set-based for the whole chunk instead of one student at a time.
+# receipt_number is unique in the payments table, so rows already imported are skipped and
+# re-running the same statement is safe.
+
+REQUIRED_COLUMNS = ("student_number", "amount", "receipt_number")
+DEFAULT_CHUNK_SIZE = 500
+
+
+# Helper function to parse the uploaded CSV into clean payment rows.
+# Returns (rows, invalid) where invalid holds the line number and reason for each rejected line.
+def parse_payment_csv(text):
+    reader = csv.DictReader(io.StringIO(text))
+    if not reader.fieldnames:
+        raise ValueError("CSV file is empty.")
+
+    fieldnames = [name.strip().lower() for name in reader.fieldnames]
+    missing = [col for col in REQUIRED_COLUMNS if col not in fieldnames]
+    if missing:
+        raise ValueError(f"CSV is missing required column(s): {', '.join(missing)}")
+    reader.fieldnames = fieldnames
+
+    rows, invalid = [], []
+    for line_no, record in enumerate(reader, start=2):  # Line 1 is the header
+        student_number = (record.get("student_number") or "").strip()
+        receipt_number = (record.get("receipt_number") or "").strip()
+        raw_amount = (record.get("amount") or "").strip()
+
+        if not student_number or not receipt_number:
+            invalid.append({"line": line_no, "error": "Missing student_number or receipt_number"})
+            continue
+        try:
+            amount = Decimal(raw_amount)
+        except InvalidOperation:
+            invalid.append({"line": line_no, "error": f"Invalid amount '{raw_amount}'"})
+            continue
+        if amount <= 0:
+            invalid.append({"line": line_no, "error": "Amount must be greater than zero"})
+            continue
+
+        rows.append({
+            "line": line_no,
+            "student_number": student_number,
+            "amount": amount,
+            "receipt_number": receipt_number,
+        })
+    return rows, invalid
+
+
+# Imports the parsed payment rows and returns a summary of what happened to each of them.
+# Every chunk is its own transaction, so a failing chunk is rolled back and reported
+# while the chunks before it stay committed (a rerun will skip them by receipt_number).
+def import_payments(conn, rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    summary = {
+        "inserted": 0,
+        "duplicates": 0,
+        "unknown_students": [],
+        "no_balance_record": [],
+        "failed_chunks": [],
+        "student_ids": [],
+    }
+    cur = conn.cursor(dictionary=True, buffered=True)
+    manual_updates = not uses_db_triggers()
+
+    try:
+        # One query resolves every student number, with the current-term balance row, so rows
+        # without one can be rejected up front instead of failing halfway through a chunk.
+        resolved = students.get_current_terms_with_balance(cur, sorted({row["student_number"] for row in rows}))
+        conn.commit()  # End the read so each chunk below can start its own transaction
+
+        # Drop rows we can't post and repeated receipts within the file itself.
+        pending, seen_receipts = [], set()
+        for row in rows:
+            student = resolved.get(row["student_number"])
+            if row["receipt_number"] in seen_receipts:
+                summary["duplicates"] += 1
+            elif not student:
+                summary["unknown_students"].append(row["student_number"])
+            elif student["balance_id"] is None:
+                summary["no_balance_record"].append(row["student_number"])
+            else:
+                seen_receipts.add(row["receipt_number"])
+                pending.append((row, student))
+
+        touched_students = set()
+        for start in range(0, len(pending), chunk_size):
+            chunk = pending[start:start + chunk_size]
+            try:
+                conn.start_transaction()
+
+                existing = payments.existing_receipts(cur, [row["receipt_number"] for row, _ in chunk])
+                new_rows = [(row, student) for row, student in chunk if row["receipt_number"] not in existing]
+                summary["duplicates"] += len(chunk) - len(new_rows)
+                if not new_rows:
+                    conn.rollback()
+                    continue
+
+                payments.insert_payments(cur, [
+                    (student["id"], student["programme_id"], row["amount"], row["receipt_number"])
+                    for row, student in new_rows
+                ])
+
+                totals = {}
+                for row, student in new_rows:
+                    totals[student["id"]] = totals.get(student["id"], Decimal("0")) + row["amount"]
+                # On XAMPP the payment trigger already moved the balances, as it does for update_payment.
+                if manual_updates:
+                    payments.apply_balance_totals(cur, totals)
+                recompute_clearances(cur, list(totals))
+
+                conn.commit()
+                summary["inserted"] += len(new_rows)
+                touched_students.update(student["id"] for _, student in new_rows)
+            except mysql.connector.Error as err:
+                conn.rollback()
+                summary["failed_chunks"].append({
+                    "first_line": chunk[0][0]["line"],
+                    "last_line": chunk[-1][0]["line"],
+                    "error": str(err),
+                })
+
+        summary["student_ids"] = sorted(touched_students)
+        return summary
+    finally:
+        cur.close()
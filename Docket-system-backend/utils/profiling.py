@@ -0,0 +1,137 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from flask import request, g
+from utils.auth import get_request_user
+
+# On-demand profiling of a single request, without restarting the server.
+# An admin sends the header "X-Profile: cprofile" (deterministic, pstats output) or
+# "X-Profile: sample" (a sampling profiler producing flamegraph-ready collapsed stacks).
+# The profile is stored in PROFILE_DIR and its name returned in the X-Profile-Id response
+# header; fetch it from /admin/profiles/<name>. Set PROFILING_ENABLED=false to switch this off.
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "docket_profiles"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", 50))
+SAMPLE_INTERVAL_SECONDS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", 5)) / 1000
+
+
+# Samples the stack of one thread at a fixed interval from a background thread.
+# Output is in the "collapsed" format (frame;frame;frame count) read by flamegraph.pl and speedscope.
+class SamplingProfiler:
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL_SECONDS):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _enabled():
+    return os.getenv("PROFILING_ENABLED", "true").lower() != "false"
+
+
+# Removes the oldest stored profiles beyond PROFILE_KEEP.
+def _prune():
+    names = sorted(list_profiles(), reverse=True)
+    for name in names[PROFILE_KEEP:]:
+        try:
+            os.remove(os.path.join(PROFILE_DIR, name))
+        except OSError:
+            pass
+
+
+def _before_request():
+    mode = request.headers.get("X-Profile", "").lower()
+    if mode not in ("cprofile", "sample") or not _enabled():
+        return
+    user = get_request_user()
+    if not user or user.get("role") != "admin":
+        return
+
+    if mode == "sample":
+        profiler = SamplingProfiler(threading.get_ident())
+        profiler.start()
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    g.profiler = (mode, profiler, time.time())
+
+
+def _after_request(response):
+    active = g.pop("profiler", None)
+    if not active:
+        return response
+    mode, profiler, started = active
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    endpoint = (request.endpoint or "unmatched").replace(".", "-")
+    name = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(started))}-{os.getpid()}-{endpoint}"
+
+    if mode == "sample":
+        profiler.stop()
+        name += ".collapsed"
+        profiler.dump(os.path.join(PROFILE_DIR, name))
+    else:
+        profiler.disable()
+        name += ".prof"
+        profiler.dump_stats(os.path.join(PROFILE_DIR, name))
+
+    _prune()
+    response.headers["X-Profile-Id"] = name
+    return response
+
+
+# Lists stored profile file names, newest last.
+def list_profiles():
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    return sorted(n for n in os.listdir(PROFILE_DIR) if n.endswith((".prof", ".collapsed")))
+
+
+# Returns the path of a stored profile, or None if the name is unknown.
+def profile_path(name):
+    if name not in list_profiles():
+        return None
+    return os.path.join(PROFILE_DIR, name)
+
+
+# Renders a stored cProfile dump as the pstats top-N table sorted by cumulative time.
+def profile_summary(path, limit=40):
+    out = io.StringIO()
+    stats = pstats.Stats(path, stream=out)
+    stats.sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
+
+
+# Registers the profiling hooks. The before_request hook goes first so the profile covers the other hooks too.
+def init_app(app):
+    app.before_request_funcs.setdefault(None, []).insert(0, _before_request)
+    app.after_request(_after_request)
@@ -0,0 +1,176 @@
+import os
+import re
+import sqlite3
+from datetime import datetime, date
+from decimal import Decimal
+from mysql.connector import errors
+from utils import env  # noqa: F401  (loads .env before SQLITE_PATH is read)
+
+# SQLite backend, selected with DB_PLATFORM=SQLITE.
+# It lets the whole app, the scripts and the load tests run on a laptop without MySQL or TiDB.
+# The connection and cursor below implement the subset of the mysql.connector API the code uses
+# (dictionary cursors, %s placeholders, start_transaction, lastrowid/rowcount) and raise
+# mysql.connector errors, so routes keep their existing error handling. Statements that really
+# differ between the dialects live in the repositories, which check db_dialect().
+# Create the database file with scripts/init_sqlite.py.
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SQLITE_PATH = os.getenv("SQLITE_PATH", os.path.join(backend_dir, "docket_system2.sqlite3"))
+SCHEMA_FILE = os.path.join(backend_dir, "docket_system2_sqlite.sql")
+
+_FOR_UPDATE = re.compile(r"\s+FOR\s+UPDATE\b", re.IGNORECASE)
+_translated = {}
+
+# DECIMAL and TIMESTAMP columns come back as Decimal and datetime, as they do from mysql.connector.
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_adapter(datetime, lambda value: value.strftime("%Y-%m-%d %H:%M:%S"))
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_converter("DECIMAL", lambda raw: Decimal(raw.decode()))
+sqlite3.register_converter("TIMESTAMP", lambda raw: _parse_timestamp(raw.decode()))
+
+
+def _parse_timestamp(text):
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return None  # MySQL's zero date, as mysql.connector returns it
+
+
+# Rewrites MySQL placeholders and drops row-lock clauses; a write transaction in SQLite
+# (BEGIN IMMEDIATE) already serializes writers, which is what FOR UPDATE is used for here.
+def _translate(sql):
+    translated = _translated.get(sql)
+    if translated is None:
+        translated = _FOR_UPDATE.sub("", sql.replace("%s", "?"))
+        if len(_translated) < 5000:
+            _translated[sql] = translated
+    return translated
+
+
+def _mysql_error(err):
+    message = str(err)
+    if isinstance(err, sqlite3.IntegrityError):
+        return errors.IntegrityError(msg=message, errno=1062 if "UNIQUE" in message else 1452)
+    if isinstance(err, sqlite3.OperationalError):
+        return errors.OperationalError(msg=message)
+    return errors.DatabaseError(msg=message)
+
+
+def _dict_row(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+class SQLiteCursor:
+    def __init__(self, cursor, dictionary):
+        self._cursor = cursor
+        if dictionary:
+            self._cursor.row_factory = _dict_row
+
+    def execute(self, operation, params=()):
+        try:
+            self._cursor.execute(_translate(operation), tuple(params or ()))
+        except sqlite3.Error as err:
+            raise _mysql_error(err) from err
+
+    def executemany(self, operation, seq_params):
+        try:
+            self._cursor.executemany(_translate(operation), [tuple(p) for p in seq_params])
+        except sqlite3.Error as err:
+            raise _mysql_error(err) from err
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=1):
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def with_rows(self):
+        return self._cursor.description is not None
+
+    @property
+    def column_names(self):
+        return tuple(column[0] for column in self._cursor.description or ())
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    def __init__(self, path=SQLITE_PATH):
+        # autocommit=False semantics: Python's sqlite3 opens a transaction before the first write
+        self._conn = sqlite3.connect(path, timeout=30, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.create_function("NOW", 0, _now)
+        self._open = True
+
+    def cursor(self, dictionary=False, buffered=None, **kwargs):
+        return SQLiteCursor(self._conn.cursor(), dictionary)
+
+    # Takes the write lock up front, so the reads that follow see the data they will update.
+    def start_transaction(self, **kwargs):
+        if self._conn.in_transaction:
+            raise errors.ProgrammingError(msg="Transaction already in progress")
+        self._conn.execute("BEGIN IMMEDIATE")
+
+    @property
+    def in_transaction(self):
+        return self._conn.in_transaction
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def is_connected(self):
+        return self._open
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        return None
+
+    def close(self):
+        if self._open:
+            self._open = False
+            self._conn.close()
+
+
+def connect():
+    if not os.path.exists(SQLITE_PATH):
+        raise errors.InterfaceError(msg=f"SQLite database {SQLITE_PATH} does not exist; run scripts/init_sqlite.py")
+    return SQLiteConnection(SQLITE_PATH)
+
+
+# Creates the schema in a new (or existing) database file.
+def create_schema(path=SQLITE_PATH):
+    with open(SCHEMA_FILE) as f:
+        schema = f.read()
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript(schema)
+        conn.commit()
+    finally:
+        conn.close()
@@ -0,0 +1,235 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from flask import jsonify, request, send_file, make_response
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip variants are built
+    brotli = None
+
+# Static frontend pipeline.
+# At startup every file in the frontend folder is read once and:
+#   - CSS, JS and images get a content-hashed name (dashboard.css -> dashboard.1a2b3c4d5e.css),
+#     served with "Cache-Control: public, max-age=31536000, immutable";
+#   - references to them in the HTML pages, manifest.json and the sw.js precache list are
+#     rewritten to the hashed names, and sw.js's CACHE_NAME gets a build version, so a deploy
+#     installs a new service worker with a fresh cache;
+#   - text files are precompressed with gzip and, when the brotli package is installed, brotli.
+# Files up to STATIC_MEMORY_MAX_BYTES are held in memory with their compressed variants; larger
+# ones are sent from disk. HTML pages, sw.js and manifest.json keep their names and are served
+# with "no-cache" so browsers revalidate them with the ETag (a cheap 304).
+# Files added to the frontend folder after startup are picked up on the next restart.
+
+STATIC_MEMORY_MAX_BYTES = int(os.getenv("STATIC_MEMORY_MAX_BYTES", 512 * 1024))
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+# Entry points keep their URLs: pages are linked and bookmarked, the service worker must stay at
+# /sw.js to be updated, and the PWA manifest URL identifies the installed app.
+STABLE_NAMES = {"sw.js", "manifest.json"}
+FINGERPRINT_EXTENSIONS = {".css", ".js", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".ico", ".webp", ".woff", ".woff2"}
+TEXT_EXTENSIONS = {".html", ".css", ".js", ".json", ".svg", ".txt"}
+# Text smaller than this is sent as is; compression headers would outweigh the savings.
+MIN_COMPRESS_BYTES = 256
+
+# A quoted string or url(...) argument that is a local, relative or root-relative path.
+_REFERENCE = re.compile(r"""(?P<open>["'(])/?(?P<path>[\w\-./]+?)(?P<query>\?[^"')]*)?(?=["')])""")
+_CACHE_NAME = re.compile(r"""(const\s+CACHE_NAME\s*=\s*['"])([^'"]+)(['"])""")
+
+
+class Asset:
+    def __init__(self, name, source_path, data, immutable):
+        self.name = name
+        self.source_path = source_path
+        self.mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        self.immutable = immutable
+        self.size = len(data)
+        self.digest = hashlib.sha256(data).hexdigest()[:16]
+        self.in_memory = self.size <= STATIC_MEMORY_MAX_BYTES
+        # encoding -> bytes; "identity" is only kept when the asset is held in memory
+        self.variants = {}
+        if self.in_memory:
+            self.variants["identity"] = data
+            if os.path.splitext(name)[1] in TEXT_EXTENSIONS and self.size >= MIN_COMPRESS_BYTES:
+                self._add_variant("gzip", gzip.compress(data, compresslevel=9, mtime=0))
+                if brotli is not None:
+                    self._add_variant("br", brotli.compress(data, quality=11))
+
+    def _add_variant(self, encoding, compressed):
+        if len(compressed) < self.size:
+            self.variants[encoding] = compressed
+
+    # Each encoding is a different representation, so each gets its own strong ETag.
+    def etag(self, encoding):
+        return self.digest if encoding == "identity" else f"{self.digest}-{encoding}"
+
+
+class AssetTable:
+    def __init__(self):
+        self.assets = {}       # URL path (without the leading "/") -> Asset
+        self.fingerprints = {}  # original name -> hashed name
+        self.version = None
+
+    def get(self, path):
+        return self.assets.get(path)
+
+    def stats(self):
+        return {
+            "files": len({a.source_path for a in self.assets.values()}),
+            "fingerprinted": len(self.fingerprints),
+            "in_memory_bytes": sum(sum(len(v) for v in a.variants.values()) for a in set(self.assets.values())),
+            "brotli": brotli is not None,
+            "version": self.version,
+        }
+
+
+def _hashed_name(name, data):
+    root, ext = os.path.splitext(name)
+    return f"{root}.{hashlib.sha256(data).hexdigest()[:10]}{ext}"
+
+
+# Rewrites references to fingerprinted files in HTML/CSS/JS/JSON text to their hashed URLs.
+# Query strings used for manual cache busting (dashboard.css?v=2) are dropped.
+def rewrite_references(text, fingerprints):
+    def replace(match):
+        hashed = fingerprints.get(match.group("path"))
+        if hashed is None:
+            return match.group(0)
+        return f"{match.group('open')}/{hashed}"
+    return _REFERENCE.sub(replace, text)
+
+
+def _read_tree(source_dir):
+    files = {}
+    for root, _, names in os.walk(source_dir):
+        for filename in names:
+            path = os.path.join(root, filename)
+            name = os.path.relpath(path, source_dir).replace(os.sep, "/")
+            if name.startswith(".") or "/." in name:
+                continue
+            with open(path, "rb") as f:
+                files[name] = (path, f.read())
+    return files
+
+
+# Builds the asset table for a frontend folder. Binary files are hashed first so that CSS/JS
+# referencing them can be rewritten before they are hashed in turn; the stable entry points are
+# rewritten last, once every hashed name is known.
+def build(source_dir):
+    table = AssetTable()
+    files = _read_tree(source_dir)
+    contents = {}
+
+    def fingerprintable(name):
+        return name not in STABLE_NAMES and os.path.splitext(name)[1] in FINGERPRINT_EXTENSIONS
+
+    for name, (_, data) in sorted(files.items()):
+        if fingerprintable(name) and os.path.splitext(name)[1] not in TEXT_EXTENSIONS:
+            contents[name] = data
+            table.fingerprints[name] = _hashed_name(name, data)
+
+    for name, (_, data) in sorted(files.items()):
+        if fingerprintable(name) and os.path.splitext(name)[1] in TEXT_EXTENSIONS:
+            data = rewrite_references(data.decode("utf-8"), table.fingerprints).encode("utf-8")
+            contents[name] = data
+            table.fingerprints[name] = _hashed_name(name, data)
+
+    for name, (_, data) in sorted(files.items()):
+        if name not in contents and os.path.splitext(name)[1] in TEXT_EXTENSIONS and name != "sw.js":
+            data = rewrite_references(data.decode("utf-8"), table.fingerprints).encode("utf-8")
+        contents.setdefault(name, data)
+
+    # The build version covers everything the service worker may cache, so any change to the
+    # frontend changes sw.js and makes browsers install the new worker and drop the old cache.
+    version = hashlib.sha256()
+    for name in sorted(contents):
+        if name != "sw.js":
+            version.update(name.encode("utf-8") + b"\0" + contents[name])
+    table.version = version.hexdigest()[:10]
+    if "sw.js" in files:
+        text = rewrite_references(files["sw.js"][1].decode("utf-8"), table.fingerprints)
+        text = _CACHE_NAME.sub(lambda m: f"{m.group(1)}{m.group(2)}-{table.version}{m.group(3)}", text, count=1)
+        contents["sw.js"] = text.encode("utf-8")
+
+    for name, data in contents.items():
+        source_path = files[name][0]
+        hashed = table.fingerprints.get(name)
+        if hashed:
+            table.assets[hashed] = Asset(hashed, source_path, data, immutable=True)
+            # The original name still works (old pages, bookmarks) but must be revalidated.
+            table.assets[name] = Asset(name, source_path, data, immutable=False)
+        else:
+            table.assets[name] = Asset(name, source_path, data, immutable=False)
+    return table
+
+
+# Helper function picking the best precompressed variant the client accepts (br, then gzip).
+def _negotiate(asset):
+    accepted = request.accept_encodings
+    for encoding in ("br", "gzip"):
+        if encoding in asset.variants and accepted[encoding] > 0:
+            return encoding
+    return "identity"
+
+
+def _if_none_match(etag):
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate.strip('"') == etag:
+            return True
+    return False
+
+
+# Builds the response for an asset, with a 304 when the client already has this representation.
+def serve_asset(asset):
+    encoding = _negotiate(asset) if asset.in_memory else "identity"
+    etag = asset.etag(encoding)
+
+    if _if_none_match(etag):
+        resp = make_response("", 304)
+    elif asset.in_memory:
+        resp = make_response(asset.variants[encoding])
+        resp.mimetype = asset.mimetype
+        if encoding != "identity":
+            resp.headers["Content-Encoding"] = encoding
+    else:
+        resp = send_file(asset.source_path, mimetype=asset.mimetype, etag=False, conditional=False)
+
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = IMMUTABLE_CACHE if asset.immutable else REVALIDATE_CACHE
+    if len(asset.variants) > 1:
+        resp.headers["Vary"] = "Accept-Encoding"
+    return resp
+
+
+# Builds the asset table and registers the routes serving the frontend from it.
+# The Flask app must be created without its own static route (static_folder=None).
+def init_app(app, source_dir, index="admin-login.html"):
+    table = build(source_dir)
+    app.extensions["static_assets"] = table
+    app.logger.info("Static assets ready: %s", table.stats())
+
+    # Serves the main admin portal HTML file.
+    def serve_index():
+        return serve_asset(table.get(index))
+
+    # Serves all other static frontend files (HTML, CSS, JS, images, etc.).
+    def serve_static_files(path):
+        asset = table.get(path)
+        if asset is None:
+            return jsonify({"error": "File not found"}), 404
+        return serve_asset(asset)
+
+    app.add_url_rule("/", "serve_index", serve_index)
+    app.add_url_rule("/<path:path>", "serve_static_files", serve_static_files)
+    return table
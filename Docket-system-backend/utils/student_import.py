@@ -0,0 +1,407 @@
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import secrets
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal, InvalidOperation
+import mysql.connector
+from utils.db import get_db_connection
+from utils.audit import audit
+from utils.local_store import local_store
+from utils import eligibility_cache, sync_cache
+from repositories import payments, programmes, students
+from repositories.clearances import cleared_in_current_term, insert_clearances, recompute_clearances
+
+# Bulk onboarding of a new intake: students, their course enrollments and their fee totals.
+# The students CSV is streamed chunk by chunk rather than read whole. For each chunk:
+# - the students already in the database are looked up with one query and are not created again,
+#   so the same file can be re-run after a partial failure;
+# - the passwords of the new students are hashed in a process pool, with one core per bcrypt
+#   hash (bcrypt takes ~0.25s at 12 rounds). The next chunk is hashed while the current one is
+#   being written;
+# - one transaction inserts the students with executemany, then fills in what the chunk's
+#   students (new or existing) are missing for their current term: a balance (the fee from the
+#   fees CSV, else the programme's total_fee), a clearance row and course enrollments (the
+#   course codes from the enrollments CSV, else the programme's curriculum for that year and
+#   semester). Clearances are then recomputed for the chunk.
+# enrollments, student_balances and clearances have no unique keys, so the rows that exist are
+# read for each chunk and only the missing ones are inserted.
+# scripts/import_students.py runs an import in the foreground. POST /admin/students/import saves
+# the upload and runs it in a background thread (StudentImporter), since hashing an intake's
+# passwords takes far longer than a request may; the job's progress is kept in local_store.
+
+REQUIRED_COLUMNS = ("student_number", "first_name", "last_name", "email", "current_year", "current_semester", "password")
+DEFAULT_CHUNK_SIZE = 500
+STUDENT_IMPORT_HASH_WORKERS = int(os.getenv("STUDENT_IMPORT_HASH_WORKERS", os.cpu_count() or 1))
+STUDENT_IMPORT_BCRYPT_ROUNDS = int(os.getenv("STUDENT_IMPORT_BCRYPT_ROUNDS", 12))
+CREATED_BY = "import"
+STUDENT_NUMBER_LENGTH = 6  # students.student_number is CHAR(6)
+STUDENT_IMPORT_DIR = os.getenv("STUDENT_IMPORT_DIR", os.path.join(tempfile.gettempdir(), "student_imports"))
+
+JOBS_NAMESPACE = "student_import_jobs"
+
+logger = logging.getLogger(__name__)
+
+
+# Helper function normalizing the header of a CSV reader and checking for required columns.
+def _prepare_reader(reader, required, name):
+    if not reader.fieldnames:
+        raise ValueError(f"{name} CSV file is empty.")
+    fieldnames = [field.strip().lower() for field in reader.fieldnames]
+    missing = [col for col in required if col not in fieldnames]
+    if missing:
+        raise ValueError(f"{name} CSV is missing required column(s): {', '.join(missing)}")
+    reader.fieldnames = fieldnames
+    return fieldnames
+
+
+def _positive_int(value):
+    number = int(value)
+    if number <= 0:
+        raise ValueError
+    return number
+
+
+# Helper function to stream the students CSV from an open text file. The header is checked
+# straight away (ValueError); the returned generator yields clean student rows and appends the
+# line number and reason for each rejected line to invalid.
+def read_student_csv(f, invalid):
+    reader = csv.DictReader(f)
+    fieldnames = _prepare_reader(reader, REQUIRED_COLUMNS, "Students")
+    if "programme_code" not in fieldnames and "programme_id" not in fieldnames:
+        raise ValueError("Students CSV needs a programme_code or programme_id column")
+
+    def rows():
+        for line_no, record in enumerate(reader, start=2):  # Line 1 is the header
+            row = {key: (record.get(key) or "").strip() for key in REQUIRED_COLUMNS}
+            programme = (record.get("programme_code") or record.get("programme_id") or "").strip()
+            if not all(row.values()) or not programme:
+                invalid.append({"file": "students", "line": line_no, "error": "Missing a required value"})
+                continue
+            if len(row["student_number"]) > STUDENT_NUMBER_LENGTH:
+                invalid.append({"file": "students", "line": line_no, "error": f"student_number longer than {STUDENT_NUMBER_LENGTH} characters"})
+                continue
+            try:
+                row["current_year"] = _positive_int(row["current_year"])
+                row["current_semester"] = _positive_int(row["current_semester"])
+            except ValueError:
+                invalid.append({"file": "students", "line": line_no, "error": "Invalid current_year or current_semester"})
+                continue
+            row["email"] = row["email"].lower()
+            row["programme"] = programme
+            row["line"] = line_no
+            yield row
+
+    return rows()
+
+
+# Helper function to read the optional enrollments CSV (student_number, course_code) as
+# {student_number: [course_code, ...]}.
+def read_enrollment_csv(f, invalid):
+    reader = csv.DictReader(f)
+    _prepare_reader(reader, ("student_number", "course_code"), "Enrollments")
+    courses = {}
+    for line_no, record in enumerate(reader, start=2):
+        student_number = (record.get("student_number") or "").strip()
+        course_code = (record.get("course_code") or "").strip()
+        if not student_number or not course_code:
+            invalid.append({"file": "enrollments", "line": line_no, "error": "Missing student_number or course_code"})
+            continue
+        courses.setdefault(student_number, []).append(course_code)
+    return courses
+
+
+# Helper function to read the optional fees CSV (student_number, total_fee) as {student_number: Decimal}.
+def read_fee_csv(f, invalid):
+    reader = csv.DictReader(f)
+    _prepare_reader(reader, ("student_number", "total_fee"), "Fees")
+    fees = {}
+    for line_no, record in enumerate(reader, start=2):
+        student_number = (record.get("student_number") or "").strip()
+        raw_fee = (record.get("total_fee") or "").strip()
+        try:
+            fee = Decimal(raw_fee)
+        except InvalidOperation:
+            fee = None
+        if not student_number or fee is None or fee < 0:
+            invalid.append({"file": "fees", "line": line_no, "error": f"Invalid fee row '{student_number}', '{raw_fee}'"})
+            continue
+        fees[student_number] = fee
+    return fees
+
+
+# Runs in the pool's worker processes.
+def _hash_password(job):
+    from passlib.hash import bcrypt
+    password, rounds = job
+    return bcrypt.using(rounds=rounds).hash(password[:72])  # bcrypt only uses the first 72 bytes, as at login
+
+
+# Imports the students streamed from rows (see read_student_csv) and returns a summary.
+# Every chunk is its own transaction, so a failing chunk is rolled back and reported while the
+# chunks before it stay committed (a rerun skips their students by student_number).
+# progress, if given, is called with the summary so far after each chunk.
+def import_students(conn, rows, enrollments=None, fees=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                    workers=STUDENT_IMPORT_HASH_WORKERS, bcrypt_rounds=STUDENT_IMPORT_BCRYPT_ROUNDS,
+                    progress=None):
+    enrollments = enrollments or {}
+    fees = fees or {}
+    summary = {
+        "inserted": 0,
+        "existing": 0,
+        "duplicates": 0,
+        "email_conflicts": [],
+        "unknown_programmes": [],
+        "unknown_courses": [],
+        "balances": 0,
+        "clearances": 0,
+        "enrollments": 0,
+        "failed_chunks": [],
+        "student_ids": [],
+    }
+    cur = conn.cursor(dictionary=True, buffered=True)
+    try:
+        catalogue = _Catalogue(programmes.list_programmes(cur), programmes.list_curriculum(cur))
+        conn.commit()  # End the read so each chunk below can start its own transaction
+
+        seen_numbers, seen_emails, touched = set(), set(), set()
+        # spawn: the pool starts from a clean interpreter instead of forking a threaded worker.
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=max(1, workers), mp_context=context) as pool:
+            pending = None
+            for chunk in _chunks(rows, chunk_size):
+                chunk = _screen(conn, cur, chunk, catalogue, seen_numbers, seen_emails, summary)
+                hashes = pool.map(_hash_password, [(row["password"], bcrypt_rounds) for row in chunk["new"]],
+                                  chunksize=8)
+                if pending:
+                    touched.update(_write_chunk(conn, cur, *pending, catalogue, enrollments, fees, summary))
+                    if progress:
+                        progress(summary)
+                pending = (chunk, hashes)
+            if pending:
+                touched.update(_write_chunk(conn, cur, *pending, catalogue, enrollments, fees, summary))
+
+        summary["student_ids"] = sorted(touched)
+        return summary
+    finally:
+        cur.close()
+
+
+def _chunks(rows, chunk_size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# Programmes by code and id, and their curriculum by course code and by term.
+class _Catalogue:
+    def __init__(self, programme_rows, curriculum_rows):
+        self.programmes = {}
+        for programme in programme_rows:
+            self.programmes[str(programme["programme_id"])] = programme
+            if programme["programme_code"]:
+                self.programmes[programme["programme_code"].upper()] = programme
+        self.by_course = {}
+        self.by_term = {}
+        for entry in curriculum_rows:
+            self.by_course.setdefault((entry["programme_id"], entry["course_code"].upper()), []).append(entry)
+            self.by_term.setdefault((entry["programme_id"], entry["year_of_study"], entry["semester"]), []).append(entry)
+
+    def programme(self, value):
+        return self.programmes.get(value.upper())
+
+    # Returns the curriculum ids for a student's current term: the given course codes (preferring
+    # the entry for that term) or, without any, the programme's curriculum for the term.
+    def curriculum_ids(self, programme_id, year, semester, course_codes, unknown):
+        if not course_codes:
+            return [entry["curriculum_id"] for entry in self.by_term.get((programme_id, year, semester), [])]
+        ids = []
+        for code in course_codes:
+            entries = self.by_course.get((programme_id, code.upper()))
+            if not entries:
+                unknown.append(code)
+                continue
+            match = next((e for e in entries if (e["year_of_study"], e["semester"]) == (year, semester)), entries[0])
+            if match["curriculum_id"] not in ids:
+                ids.append(match["curriculum_id"])
+        return ids
+
+
+# Splits a chunk into the students to create ("new") and the student numbers already in the
+# database ("existing"), dropping repeats within the file, unknown programmes and emails that
+# belong to another student.
+def _screen(conn, cur, chunk, catalogue, seen_numbers, seen_emails, summary):
+    existing = students.get_current_terms_with_balance(cur, sorted({row["student_number"] for row in chunk}))
+    taken_emails = students.existing_emails(cur, sorted({row["email"] for row in chunk
+                                                         if row["student_number"] not in existing}))
+    conn.commit()
+
+    new, known = [], []
+    for row in chunk:
+        if row["student_number"] in seen_numbers:
+            summary["duplicates"] += 1
+            continue
+        seen_numbers.add(row["student_number"])
+        if row["student_number"] in existing:
+            summary["existing"] += 1
+            known.append(row["student_number"])
+            continue
+        programme = catalogue.programme(row["programme"])
+        if not programme:
+            summary["unknown_programmes"].append({"line": row["line"], "programme": row["programme"]})
+        elif row["email"] in taken_emails or row["email"] in seen_emails:
+            summary["email_conflicts"].append({"line": row["line"], "email": row["email"]})
+        else:
+            seen_emails.add(row["email"])
+            row["programme_id"] = programme["programme_id"]
+            new.append(row)
+    return {"new": new, "existing": known, "first_line": chunk[0]["line"], "last_line": chunk[-1]["line"]}
+
+
+# Writes one chunk in a single transaction and returns the ids of the students it changed.
+def _write_chunk(conn, cur, chunk, hashes, catalogue, enrollments, fees, summary):
+    try:
+        password_hashes = list(hashes)  # Waits for the pool to finish this chunk
+        conn.start_transaction()
+        students.insert_students(cur, [
+            (row["student_number"], row["first_name"], row["last_name"], row["email"], row["programme_id"],
+             row["current_year"], row["current_semester"], password_hash, CREATED_BY)
+            for row, password_hash in zip(chunk["new"], password_hashes)
+        ])
+
+        terms = students.get_current_terms_with_balance(cur, [row["student_number"] for row in chunk["new"]] + chunk["existing"])
+        terms = [term for term in terms.values() if term["programme_id"] is not None]
+        ids = [term["id"] for term in terms]
+        cleared = cleared_in_current_term(cur, ids)
+        enrolled = students.enrolled_in_current_term(cur, ids)
+
+        balance_rows, clearance_rows, enrollment_rows = [], [], []
+        for term in terms:
+            key = (term["id"], term["programme_id"], term["current_year"], term["current_semester"])
+            if term["balance_id"] is None:
+                fee = fees.get(term["student_number"], catalogue.programme(str(term["programme_id"]))["total_fee"])
+                balance_rows.append((*key, fee))
+            if term["id"] not in cleared:
+                clearance_rows.append(key)
+            if term["id"] not in enrolled:
+                enrollment_rows += [
+                    (term["id"], curriculum_id, term["current_year"], term["current_semester"])
+                    for curriculum_id in catalogue.curriculum_ids(
+                        term["programme_id"], term["current_year"], term["current_semester"],
+                        enrollments.get(term["student_number"]), summary["unknown_courses"])
+                ]
+
+        payments.insert_balances(cur, balance_rows)
+        insert_clearances(cur, clearance_rows)
+        students.insert_enrollments(cur, enrollment_rows)
+        changed = {row[0] for row in balance_rows + clearance_rows + enrollment_rows}
+        recompute_clearances(cur, sorted(changed))
+        conn.commit()
+    except mysql.connector.Error as err:
+        conn.rollback()
+        summary["failed_chunks"].append({
+            "first_line": chunk["first_line"],
+            "last_line": chunk["last_line"],
+            "error": str(err),
+        })
+        return set()
+
+    summary["inserted"] += len(chunk["new"])
+    summary["balances"] += len(balance_rows)
+    summary["clearances"] += len(clearance_rows)
+    summary["enrollments"] += len(enrollment_rows)
+    return changed
+
+
+# --- Background imports (POST /admin/students/import) ---
+
+# Returns a new path under STUDENT_IMPORT_DIR to save an uploaded students CSV to.
+def upload_path():
+    os.makedirs(STUDENT_IMPORT_DIR, exist_ok=True)
+    return os.path.join(STUDENT_IMPORT_DIR, f"{secrets.token_hex(8)}.csv")
+
+
+def _save_job(job_id, job):
+    job["updated_at"] = time.time()
+    try:
+        local_store.set(JOBS_NAMESPACE, job_id, json.dumps(job, default=str), 0)
+    except sqlite3.Error as e:
+        logger.warning(f"Student import status unavailable: {e}")
+
+
+# Returns the status of an import job, or None for an unknown id.
+def get_job(job_id):
+    row = local_store.get(JOBS_NAMESPACE, job_id)
+    return json.loads(row[0]) if row else None
+
+
+# Runs uploaded imports in a background thread of this process, one at a time.
+class StudentImporter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+
+    # Starts importing the students CSV saved at path and returns the job id, or None when this
+    # process is already running an import. The file is deleted when the import ends.
+    def start(self, path, enrollments, fees, invalid, admin_id=None):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return None
+            job_id = secrets.token_hex(8)
+            job = {"job_id": job_id, "status": "running", "started_at": time.time()}
+            _save_job(job_id, dict(job))
+            self._thread = threading.Thread(
+                target=self._run, args=(job, path, enrollments, fees, invalid, admin_id),
+                name="student-import", daemon=True,
+            )
+            self._thread.start()
+            return job_id
+
+    def _run(self, job, path, enrollments, fees, invalid, admin_id):
+        job_id = job["job_id"]
+        try:
+            with open(path, "r", encoding="utf-8-sig", newline="") as f:
+                conn = get_db_connection()
+                try:
+                    summary = import_students(
+                        conn, read_student_csv(f, invalid), enrollments, fees,
+                        progress=lambda summary: _save_job(job_id, {**job, "inserted": summary["inserted"],
+                                                                    "existing": summary["existing"]}),
+                    )
+                finally:
+                    conn.close()
+        except (mysql.connector.Error, ValueError, UnicodeDecodeError, OSError) as err:
+            logger.error(f"Student import {job_id} failed: {err}")
+            _save_job(job_id, {**job, "status": "failed", "error": str(err), "finished_at": time.time()})
+            return
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            with self._lock:
+                self._thread = None
+
+        touched = summary.pop("student_ids")
+        if summary["inserted"]:
+            sync_cache.students.bump()
+        eligibility_cache.invalidate(student_ids=touched)
+        audit("admin", admin_id, "student_import",
+              f"Imported {summary['inserted']} students, skipped {summary['existing']} existing")
+        _save_job(job_id, {**job, **summary, "invalid_rows": invalid, "finished_at": time.time(),
+                           "status": "partial" if summary["failed_chunks"] else "finished"})
+        logger.info(f"Student import {job_id} created {summary['inserted']} students")
+
+
+student_importer = StudentImporter()
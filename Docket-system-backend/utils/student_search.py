@@ -0,0 +1,185 @@
+import bisect
+import heapq
+import threading
+import time
+import mysql.connector
+from repositories import students
+
+# In-process search index over students.
+# A LIKE '%q%' over names and student numbers can't use an index, so every admin search used to
+# scan the whole students table. Instead each worker keeps:
+#   - a sorted list of (token, id) pairs, where tokens are lower-cased first names, last names and
+#     student numbers, so prefix matches are a bisect away;
+#   - a trigram -> ids map, so substring matches (what LIKE '%q%' gave us) only check a few candidates.
+#     Terms shorter than a trigram are matched by scanning the tokens instead.
+# The index is loaded once and then kept current from students.updated_at (see migration 003),
+# with a periodic full rebuild to drop deleted rows.
+
+REFRESH_INTERVAL_SECONDS = 5
+FULL_REBUILD_INTERVAL_SECONDS = 30 * 60
+
+# Score for each kind of match; a student's score is the sum over all query terms.
+SCORE_EXACT_NUMBER = 100
+SCORE_EXACT_TOKEN = 50
+SCORE_PREFIX = 30
+SCORE_SUBSTRING = 10
+
+
+# Helper function to split a string into lower-cased search tokens.
+def _tokenize(text):
+    return [t for t in (text or "").lower().replace("-", " ").split() if t]
+
+
+# Helper function returning the set of trigrams of a token.
+def _trigrams(token):
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+class StudentSearchIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._docs = {}          # id -> {"tokens": [...], "sort_key": (...)}
+        self._sorted_tokens = []  # sorted [(token, id)]
+        self._trigram_ids = {}    # trigram -> set(ids)
+        self._watermark = None    # latest students.updated_at (or id) seen
+        self._use_updated_at = True
+        self._last_refresh = 0.0
+        self._last_full_build = 0.0
+
+    # --- Maintenance ---
+
+    def _remove(self, student_id):
+        doc = self._docs.pop(student_id, None)
+        if not doc:
+            return
+        for token in doc["tokens"]:
+            pos = bisect.bisect_left(self._sorted_tokens, (token, student_id))
+            if pos < len(self._sorted_tokens) and self._sorted_tokens[pos] == (token, student_id):
+                del self._sorted_tokens[pos]
+            for gram in _trigrams(token):
+                ids = self._trigram_ids.get(gram)
+                if ids:
+                    ids.discard(student_id)
+
+    def _add(self, row, insort=True):
+        student_id = row["id"]
+        tokens = sorted(set(_tokenize(row["first_name"]) + _tokenize(row["last_name"]) + _tokenize(row["student_number"])))
+        self._docs[student_id] = {
+            "tokens": tokens,
+            "student_number": (row["student_number"] or "").lower(),
+            "sort_key": ((row["last_name"] or "").lower(), (row["first_name"] or "").lower(), student_id),
+        }
+        for token in tokens:
+            if insort:
+                bisect.insort(self._sorted_tokens, (token, student_id))
+            else:
+                self._sorted_tokens.append((token, student_id))
+            for gram in _trigrams(token):
+                self._trigram_ids.setdefault(gram, set()).add(student_id)
+
+    def _fetch_rows(self, cur, since):
+        if self._use_updated_at:
+            try:
+                return students.get_index_rows(cur, since, by_updated_at=True)
+            except mysql.connector.Error:
+                # Migration 003 not applied yet: fall back to picking up new ids only.
+                # Re-reading everything once re-seeds the watermark with the highest id.
+                self._use_updated_at = False
+                since = None
+        return students.get_index_rows(cur, since, by_updated_at=False)
+
+    # Rebuilds the whole index from the students table.
+    def rebuild(self, cur):
+        rows = self._fetch_rows(cur, None)
+        with self._lock:
+            self._docs, self._sorted_tokens, self._trigram_ids = {}, [], {}
+            for row in rows:
+                self._add(row, insort=False)
+            self._sorted_tokens.sort()
+            self._watermark = max((row["mark"] for row in rows if row["mark"] is not None), default=None)
+            self._last_refresh = self._last_full_build = time.monotonic()
+
+    # Brings the index up to date: a full rebuild on first use or when it is old,
+    # otherwise only the students changed since the watermark.
+    def refresh(self, cur, force=False):
+        now = time.monotonic()
+        if not force and self._last_refresh and now - self._last_refresh < REFRESH_INTERVAL_SECONDS:
+            return
+        if self._watermark is None or now - self._last_full_build > FULL_REBUILD_INTERVAL_SECONDS:
+            self.rebuild(cur)
+            return
+
+        use_updated_at = self._use_updated_at
+        rows = self._fetch_rows(cur, self._watermark)
+        if use_updated_at != self._use_updated_at:
+            # Switched to the id watermark, so the old one no longer compares
+            self.rebuild(cur)
+            return
+        with self._lock:
+            for row in rows:
+                self._remove(row["id"])
+                self._add(row)
+                if row["mark"] is not None and row["mark"] > self._watermark:
+                    self._watermark = row["mark"]
+            self._last_refresh = now
+
+    # --- Lookup ---
+
+    def _prefix_ids(self, term):
+        ids, exact = set(), set()
+        pos = bisect.bisect_left(self._sorted_tokens, (term, -1))
+        while pos < len(self._sorted_tokens) and self._sorted_tokens[pos][0].startswith(term):
+            token, student_id = self._sorted_tokens[pos]
+            ids.add(student_id)
+            if token == term:
+                exact.add(student_id)
+            pos += 1
+        return ids, exact
+
+    def _substring_ids(self, term):
+        if len(term) < 3:
+            # Too short for a trigram: scan the tokens. A one or two character infix matches
+            # much of the table anyway, so this costs little more than ranking the results.
+            return {i for i, doc in self._docs.items() if any(term in token for token in doc["tokens"])}
+        grams = sorted(_trigrams(term), key=lambda g: len(self._trigram_ids.get(g, ())))
+        candidates = set(self._trigram_ids.get(grams[0], ()))
+        for gram in grams[1:]:
+            candidates &= self._trigram_ids.get(gram, set())
+            if not candidates:
+                break
+        # Trigrams can match across positions, so confirm the term really is a substring.
+        return {i for i in candidates if any(term in token for token in self._docs[i]["tokens"])}
+
+    # Returns matching student ids, best match first (only the first `limit` when given).
+    # Every term of the query has to match (by prefix or substring) for a student to be returned.
+    def search(self, query, limit=None):
+        terms = _tokenize(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            scores = None
+            for term in terms:
+                prefix, exact = self._prefix_ids(term)
+                substring = self._substring_ids(term) - prefix
+                term_scores = {i: SCORE_SUBSTRING for i in substring}
+                for i in prefix:
+                    term_scores[i] = SCORE_EXACT_TOKEN if i in exact else SCORE_PREFIX
+                    if self._docs[i]["student_number"] == term:
+                        term_scores[i] = SCORE_EXACT_NUMBER
+
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {i: scores[i] + s for i, s in term_scores.items() if i in scores}
+                if not scores:
+                    return []
+
+            rank = lambda i: (-scores[i], self._docs[i]["sort_key"])
+            if limit is not None:
+                return heapq.nsmallest(limit, scores, key=rank)
+            return sorted(scores, key=rank)
+
+
+# One index per worker process, shared by all requests it serves.
+student_index = StudentSearchIndex()
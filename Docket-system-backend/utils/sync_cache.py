@@ -0,0 +1,181 @@
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from flask import Response, request
+from utils.compression import COMPRESS_MIN_BYTES, compress, negotiate
+from utils.json_provider import dumps_bytes
+from utils.local_store import local_store
+
+# Coalesced, briefly cached payloads for the scanners' sync reads (/dockets/sync/students and
+# /dockets/sync/tokens).
+# When a session opens every scanner asks for the same full list within seconds. Concurrent
+# requests for a list share one in-flight query (single flight), and the result is kept as
+# serialized JSON plus its gzip/brotli variants, each compressed once, so N scanners cost about
+# one query and one compression per worker. An entry is reused while the list's version stamp in
+# local_store is unchanged and it is younger than SYNC_CACHE_SECONDS. Write paths that change a
+# list bump its stamp (bump()); the age limit bounds staleness for changes that don't, such as a
+# token being used (the scan itself is always checked against the database).
+
+SYNC_CACHE_SECONDS = float(os.getenv("SYNC_CACHE_SECONDS", 10))
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+# Runs fn once per key at a time: callers arriving while it runs wait for and share its result.
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+
+# SingleFlight for coroutines on one event loop (the async app).
+class AsyncSingleFlight:
+    def __init__(self):
+        self._flights = {}
+
+    async def do(self, key, fn):
+        future = self._flights.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+        future = self._flights[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await fn()
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # followers re-raise it; don't warn when there are none
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._flights[key]
+
+
+# One serialized list and its compressed variants.
+class Payload:
+    def __init__(self, version, body):
+        self.version = version
+        self.created = time.monotonic()
+        self.etag = hashlib.sha1(body).hexdigest()[:16]
+        self._variants = {None: body}
+        self._lock = threading.Lock()
+
+    def is_fresh(self, version):
+        return self.version == version and time.monotonic() - self.created < SYNC_CACHE_SECONDS
+
+    # Returns the body for an encoding (None for identity), compressing it on first use only.
+    def encoded(self, encoding):
+        data = self._variants.get(encoding)
+        if data is None:
+            with self._lock:
+                data = self._variants.get(encoding)
+                if data is None:
+                    data = self._variants[encoding] = compress(self._variants[None], encoding)
+        return data
+
+    # Picks the variant for a request: (status, body, headers). Answers 304 when the client
+    # already has these bytes.
+    def respond(self, accept_encoding, if_none_match):
+        encoding = negotiate(accept_encoding) if len(self._variants[None]) >= COMPRESS_MIN_BYTES else None
+        etag = f'"{self.etag}-{encoding}"' if encoding else f'"{self.etag}"'
+        headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "private, no-cache"}
+        if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+            return 304, b"", headers
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return 200, self.encoded(encoding), headers
+
+
+class SyncCache:
+    def __init__(self, name):
+        self.name = name
+        self.version_name = f"sync_{name}"
+        self._payload = None
+        self._flight = SingleFlight()
+        self._async_flight = AsyncSingleFlight()
+
+    def _version(self):
+        try:
+            return local_store.get_version(self.version_name)
+        except sqlite3.Error as e:
+            logger.warning(f"Sync cache version unavailable: {e}")
+            return None
+
+    def _fresh(self, version):
+        payload = self._payload
+        return payload if payload is not None and payload.is_fresh(version) else None
+
+    # Returns the current Payload, running build() (which returns the response body) on a miss.
+    # The version is read before building, so a bump made meanwhile leaves the result stale.
+    def get(self, build):
+        version = self._version()
+        payload = self._fresh(version)
+        if payload is None:
+            payload = self._flight.do(version, lambda: self._fresh(version) or self._store(version, build()))
+        return payload
+
+    # Same as get() for the async app; build is a coroutine function and serialization runs in
+    # a thread so the event loop keeps serving.
+    async def aget(self, build, run_in_thread):
+        version = await run_in_thread(self._version)
+        payload = self._fresh(version)
+        if payload is None:
+            async def load():
+                return self._fresh(version) or await run_in_thread(self._store, version, await build())
+            payload = await self._async_flight.do(version, load)
+        return payload
+
+    def _store(self, version, body):
+        payload = Payload(version, dumps_bytes(body))
+        self._payload = payload
+        return payload
+
+    # Marks the list as changed, in every worker on this machine.
+    def bump(self):
+        try:
+            local_store.bump_version(self.version_name)
+        except sqlite3.Error as e:
+            logger.warning(f"Sync cache version bump failed: {e}")
+
+
+students = SyncCache("students")
+tokens = SyncCache("tokens")
+
+
+# Builds the Flask response for a payload.
+def flask_response(payload):
+    status, body, headers = payload.respond(request.headers.get("Accept-Encoding"), request.headers.get("If-None-Match"))
+    return Response(body, status=status, headers=headers, mimetype="application/json")
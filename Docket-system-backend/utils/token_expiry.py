@@ -0,0 +1,127 @@
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime, time as day_time, timedelta
+import mysql.connector
+from utils.db import get_db_connection
+from utils.audit import audit
+from utils import eligibility_cache, sync_cache
+from utils.events import publish
+from repositories import dockets
+
+# Docket token expiry.
+# Issued dockets and tokens get an expires_at: the end of the exam's last day from the
+# "exam_calendar" in exam_settings.json ({"ca1": "2025-10-24", ...}), or DOCKET_TOKEN_TTL_DAYS
+# after issue when the exam has no date (or it has already passed). Verification rejects tokens
+# past their expires_at in the lookup itself.
+# When the active exam switches, the tokens of every other exam are expired by a sweep that runs
+# in a background thread, in batches of TOKEN_SWEEP_BATCH_SIZE rows so no long transaction holds
+# locks that scans are waiting on. That keeps the active-token list the scanners sync down to the
+# current exam. scripts/expire_tokens.py runs the same sweep from the command line.
+
+DOCKET_TOKEN_TTL_DAYS = int(os.getenv("DOCKET_TOKEN_TTL_DAYS", 30))
+TOKEN_SWEEP_BATCH_SIZE = int(os.getenv("TOKEN_SWEEP_BATCH_SIZE", 500))
+TOKEN_SWEEP_PAUSE_SECONDS = float(os.getenv("TOKEN_SWEEP_PAUSE_SECONDS", 0.05))
+
+logger = logging.getLogger(__name__)
+
+
+# Helper function validating an exam calendar from a settings update: {exam_type: "YYYY-MM-DD"
+# or null}. Returns it with the dates normalized; raises ValueError for anything else.
+def parse_exam_calendar(calendar, exam_types):
+    if not isinstance(calendar, dict):
+        raise ValueError("exam_calendar must be an object of exam type to date.")
+    parsed = {}
+    for exam_type, value in calendar.items():
+        if exam_type not in exam_types:
+            raise ValueError(f"Invalid exam type '{exam_type}' in exam_calendar.")
+        if value is None:
+            continue
+        try:
+            parsed[exam_type] = date.fromisoformat(str(value)).isoformat()
+        except ValueError:
+            raise ValueError(f"Invalid date for {exam_type} in exam_calendar (expected YYYY-MM-DD).")
+    return parsed
+
+
+# Returns the expires_at for a docket of exam_type issued now, from the settings' exam calendar.
+def token_expiry(settings, exam_type, now=None):
+    now = now or datetime.now()
+    last_day = (settings.get("exam_calendar") or {}).get(exam_type)
+    if last_day:
+        try:
+            expires_at = datetime.combine(date.fromisoformat(last_day), day_time(23, 59, 59))
+            if expires_at > now:
+                return expires_at
+            logger.warning(f"Exam calendar date for {exam_type} ({last_day}) has passed; using DOCKET_TOKEN_TTL_DAYS")
+        except ValueError:
+            logger.warning(f"Ignoring invalid exam calendar date for {exam_type}: {last_day}")
+    return now + timedelta(days=DOCKET_TOKEN_TTL_DAYS) if DOCKET_TOKEN_TTL_DAYS > 0 else None
+
+
+# Expires every active token that is past its expires_at or not for active_exam, one batch per
+# transaction. Returns the number of tokens expired.
+def sweep_expired_tokens(active_exam, batch_size=TOKEN_SWEEP_BATCH_SIZE, pause=TOKEN_SWEEP_PAUSE_SECONDS):
+    conn = get_db_connection()
+    cur = conn.cursor(dictionary=True)
+    expired, after_id = 0, 0
+    try:
+        while True:
+            token_ids = dockets.next_expirable_tokens(cur, active_exam, after_id, batch_size)
+            if not token_ids:
+                conn.commit()
+                break
+            after_id = token_ids[-1]
+            expired += dockets.expire_tokens(cur, token_ids)
+            conn.commit()
+            if pause:
+                time.sleep(pause)
+    except mysql.connector.Error:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+        if expired:
+            sync_cache.tokens.bump()
+            eligibility_cache.invalidate_all()  # dashboards show the expired dockets
+            publish("tokens", change="expired", count=expired, resync=True, exam_type=active_exam)
+    return expired
+
+
+# Runs sweeps in a background thread of this process. A switch made while a sweep is running
+# queues one more sweep for the newest exam, started as soon as the current one ends.
+class TokenSweeper:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._next = None
+
+    # Starts (or queues) a sweep for active_exam; admin_id is recorded in the audit trail.
+    def start(self, active_exam, admin_id=None):
+        with self._lock:
+            self._next = (active_exam, admin_id)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="token-sweeper", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if self._next is None:
+                    self._thread = None
+                    return
+                active_exam, admin_id = self._next
+                self._next = None
+            started = time.perf_counter()
+            try:
+                expired = sweep_expired_tokens(active_exam)
+            except mysql.connector.Error as err:
+                logger.error(f"Token sweep for {active_exam} failed: {err}")
+                continue
+            logger.info(f"Token sweep for {active_exam} expired {expired} tokens in {time.perf_counter() - started:.1f}s")
+            audit("admin", admin_id, "expire_tokens", f"Expired {expired} docket tokens after switching to {active_exam}")
+
+
+token_sweeper = TokenSweeper()
@@ -0,0 +1,196 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+import mysql.connector
+from utils.db import get_db_connection
+from utils.local_store import local_store
+from repositories import clearances, verifications
+
+# Live verification stats for the exam-day dashboard (GET /verification/stats).
+# Aggregating `verifications` on every dashboard refresh would load the database while scanning
+# is at its peak, so verify and sync add to per-minute counters in local_store (shared by the
+# workers on one machine) and the dashboard reads nothing else:
+#   valid:scans, rejected:scans                       scans per minute
+#   valid:device:<device>, rejected:device:<device>   scans per minute per scanner
+#   total:admitted:<exam>, total:eligible:<exam>      running totals (bucket 0)
+# Counters can drift (a worker killed between commit and count, scans served by another machine,
+# students scanned on two dockets), so when the dashboard is read and the last reconciliation is
+# older than VERIFICATION_STATS_RECONCILE_SECONDS, a background thread recounts the valid scans in
+# the window and the admitted/eligible totals from the database and replaces those counters.
+# Rejected scans aren't stored in `verifications` (most have no docket to log against), so their
+# counters are never corrected, only dropped once they fall out of the window.
+
+VERIFICATION_STATS_WINDOW_MINUTES = int(os.getenv("VERIFICATION_STATS_WINDOW_MINUTES", 60))
+VERIFICATION_STATS_RECONCILE_SECONDS = int(os.getenv("VERIFICATION_STATS_RECONCILE_SECONDS", 300))
+RATE_MINUTES = 5  # scans per minute is averaged over the last few minutes
+
+NAMESPACE = "verification_stats"
+
+logger = logging.getLogger(__name__)
+
+
+def _bucket(timestamp):
+    return int(timestamp // 60)
+
+
+# Helper function reading the optional scanner id (device_registry.device_id) sent with a scan.
+def parse_device_id(value):
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+# Scans are counted per registered scanner, or per admin account when the scanner sent no id.
+def device_key(device_id, scanned_by):
+    return f"device-{device_id}" if device_id is not None else f"admin-{scanned_by}"
+
+
+# Counts scans in the current minute: valid ones (admitting students to exam_type) and rejected ones.
+def record_scans(device, valid=0, rejected=0, exam_type=None):
+    bucket = _bucket(time.time())
+    rows = []
+    for result, count in (("valid", valid), ("rejected", rejected)):
+        if count:
+            rows += [(f"{result}:scans", bucket, count), (f"{result}:device:{device}", bucket, count)]
+    if valid and exam_type:
+        rows.append((f"total:admitted:{exam_type}", 0, valid))
+    if not rows:
+        return
+    try:
+        local_store.add_counts(rows)
+    except sqlite3.Error as e:
+        logger.warning(f"Verification stats unavailable: {e}")
+
+
+# Returns the dashboard from the counters alone, and starts a reconciliation when one is due.
+def dashboard(active_exam):
+    now_bucket = _bucket(time.time())
+    since = now_bucket - VERIFICATION_STATS_WINDOW_MINUTES + 1
+    try:
+        rows = local_store.get_counts("valid:", since) + local_store.get_counts("rejected:", since)
+        totals = local_store.get_counts("total:")
+        reconciled = local_store.get(NAMESPACE, "reconciled_at")
+        claimed = local_store.get(NAMESPACE, "reconcile_claimed_at")
+    except sqlite3.Error as e:
+        logger.warning(f"Verification stats unavailable: {e}")
+        rows, totals, reconciled, claimed = [], [], None, None
+
+    minutes = {bucket: {"valid": 0, "rejected": 0} for bucket in range(since, now_bucket + 1)}
+    devices = {}
+    for name, bucket, value in rows:
+        result, kind, *device = name.split(":", 2)
+        if bucket not in minutes:
+            continue
+        if kind == "scans":
+            minutes[bucket][result] += value
+        else:
+            entry = devices.setdefault(device[0], {"device": device[0], "valid": 0, "rejected": 0, "last_scan_minute": bucket})
+            entry[result] += value
+            entry["last_scan_minute"] = max(entry["last_scan_minute"], bucket)
+
+    exams = {}
+    for name, _, value in totals:
+        _, total, exam_type = name.split(":", 2)
+        exams.setdefault(exam_type, {"admitted": 0, "eligible": 0})[total] = value
+
+    recent = [minutes[bucket] for bucket in range(now_bucket - RATE_MINUTES + 1, now_bucket + 1) if bucket in minutes]
+    reconciled_at = float(reconciled[0]) if reconciled else None
+    # The claim keeps the other workers polling the dashboard from starting the same reconciliation.
+    last_attempt = max(reconciled_at or 0, float(claimed[0]) if claimed else 0)
+    if time.time() - last_attempt >= VERIFICATION_STATS_RECONCILE_SECONDS:
+        stats_reconciler.start()
+
+    for entry in devices.values():
+        entry["last_scan_minute"] = _minute(entry["last_scan_minute"])
+    progress = exams.get(active_exam, {"admitted": 0, "eligible": 0})
+    return {
+        "window_minutes": VERIFICATION_STATS_WINDOW_MINUTES,
+        "scans_per_minute": round(sum(m["valid"] + m["rejected"] for m in recent) / max(len(recent), 1), 1),
+        "totals": {
+            "valid": sum(m["valid"] for m in minutes.values()),
+            "rejected": sum(m["rejected"] for m in minutes.values()),
+        },
+        "minutes": [{"minute": _minute(bucket), **counts} for bucket, counts in minutes.items()],
+        "devices": sorted(devices.values(), key=lambda entry: entry["device"]),
+        "exams": exams,
+        "progress": {
+            "exam_type": active_exam,
+            **progress,
+            "summary": f"{progress['admitted']:,} of {progress['eligible']:,} students admitted",
+        },
+        "reconciled_at": datetime.fromtimestamp(reconciled_at).isoformat(timespec="seconds") if reconciled_at else None,
+    }
+
+
+def _minute(bucket):
+    return datetime.fromtimestamp(bucket * 60).isoformat(timespec="minutes")
+
+
+# Recounts the valid scans in the window and the exam totals from the database and replaces
+# their counters; old minute buckets are dropped at the same time.
+def reconcile():
+    since = _bucket(time.time()) - VERIFICATION_STATS_WINDOW_MINUTES + 1
+    conn = get_db_connection()
+    cur = conn.cursor(dictionary=True)
+    try:
+        scans = verifications.list_valid_since(cur, datetime.fromtimestamp(since * 60))
+        admitted = verifications.count_admitted(cur)
+        eligible = clearances.count_cleared_students(cur)
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+
+    counts = Counter()
+    for scan in scans:
+        if scan["scanned_at"] is None:
+            continue
+        bucket = _bucket(scan["scanned_at"].timestamp())
+        counts[("valid:scans", bucket)] += 1
+        counts[(f"valid:device:{device_key(scan['device_id'], scan['scanned_by'])}", bucket)] += 1
+    totals = [(f"total:admitted:{exam_type}", 0, count) for exam_type, count in admitted.items()]
+    totals += [(f"total:eligible:{exam_type}", 0, count) for exam_type, count in eligible.items()]
+
+    local_store.replace_counts("valid:", since, [(name, bucket, count) for (name, bucket), count in counts.items()])
+    local_store.replace_counts("total:", 0, totals)
+    local_store.prune_counts("valid:", since)
+    local_store.prune_counts("rejected:", since)
+    local_store.set(NAMESPACE, "reconciled_at", str(time.time()), 0)
+    return len(scans)
+
+
+# Runs reconciliations in a background thread of this process, one at a time.
+class StatsReconciler:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                try:
+                    local_store.set(NAMESPACE, "reconcile_claimed_at", str(time.time()), 0)
+                except sqlite3.Error as e:
+                    logger.warning(f"Verification stats unavailable: {e}")
+                self._thread = threading.Thread(target=self._run, name="verification-stats", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        started = time.perf_counter()
+        try:
+            scans = reconcile()
+        except (mysql.connector.Error, sqlite3.Error) as err:
+            logger.error(f"Verification stats reconciliation failed: {err}")
+            return
+        finally:
+            with self._lock:
+                self._thread = None
+        logger.info(f"Reconciled verification stats ({scans} valid scans) in {time.perf_counter() - started:.2f}s")
+
+
+stats_reconciler = StatsReconciler()
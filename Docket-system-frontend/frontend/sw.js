@@ -17,6 +17,16 @@ self.addEventListener('install', event => {
   );
 });
 
+// Activate event: removes caches left by earlier versions of the app.
+// The server appends a build version to CACHE_NAME, so every deploy gets a fresh cache.
+self.addEventListener('activate', event => {
+  event.waitUntil(
+    caches.keys().then(names => Promise.all(
+      names.filter(name => name !== CACHE_NAME).map(name => caches.delete(name))
+    ))
+  );
+});
+
 // Fetch event: serves assets from the cache first.
 // If the request is not in the cache, it fetches it from the network.
 self.addEventListener('fetch', event => {